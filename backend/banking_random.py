@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Seeded Bulk Random Draws for the Synthetic Data Generators
+Wraps numpy.random.Generator so that IDs, dates and amounts are drawn in arrays
+and a given seed reproduces the same dataset
+"""
+
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+DAYS_PER_YEAR = 365
+# What make_rng accepts: an int, or a sequence of ints (e.g. [seed, rows already written]) mixed into one seed
+Seed = Union[None, int, Sequence[int]]
+
+
+def make_rng(seed: Seed = None) -> np.random.Generator:
+    """Create the generator every draw goes through; None seeds from OS entropy"""
+    return np.random.default_rng(seed)
+
+
+def uuid4_bytes(rng: np.random.Generator, n: int) -> List[bytes]:
+    """Draw n version-4 UUIDs as 16-byte values, derived entirely from rng"""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    flat = raw.tobytes()
+    return [flat[i:i + 16] for i in range(0, 16 * n, 16)]
+
+
+def hex_ids(rng: np.random.Generator, n: int, length: int = 8) -> List[str]:
+    """Draw n random lowercase hex strings of the given length"""
+    nbytes = (length + 1) // 2
+    flat = rng.bytes(nbytes * n).hex()
+    step = 2 * nbytes
+    return [flat[i:i + length] for i in range(0, step * n, step)]
+
+
+def round_cents(values: np.ndarray) -> List[float]:
+    """Round an array of amounts to cents and return plain Python floats"""
+    return np.round(values, 2).tolist()
+
+
+def random_dates(rng: np.random.Generator, start, end, n: int) -> List[date]:
+    """Draw n dates uniformly from [start, end]; start/end may be dates or arrays of ordinals"""
+    start_ord = np.asarray(start.toordinal() if isinstance(start, date) else start, dtype=np.int64)
+    end_ord = np.asarray(end.toordinal() if isinstance(end, date) else end, dtype=np.int64)
+    span = np.maximum(end_ord - start_ord, 0) + 1
+    ordinals = start_ord + (rng.random(n) * span).astype(np.int64)
+    return [date.fromordinal(o) for o in ordinals.tolist()]
+
+
+def random_datetimes(rng: np.random.Generator, start: datetime, end: datetime, n: int) -> List[datetime]:
+    """Draw n datetimes (microsecond resolution) uniformly from [start, end)"""
+    span_us = int((end - start) / timedelta(microseconds=1))
+    base = np.datetime64(start, "us")
+    offsets = rng.integers(0, max(span_us, 1), size=n).astype("timedelta64[us]")
+    return (base + offsets).tolist()
+
+
+def years_before(moment: date, years: int) -> date:
+    """Go back a whole number of 365-day years from moment"""
+    return moment - timedelta(days=DAYS_PER_YEAR * years)
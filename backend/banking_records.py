@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Compact Record Types for Synthetic Banking Data
+Slot-based customer, account and transaction records with 16-byte binary UUIDs
+and interned enum codes, serialized directly to the generators' JSON layout
+"""
+
+import json
+import os
+import sys
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, TextIO
+
+import dataset_cache
+from fast_json import AccountRecord, CustomerRecord, TransactionRecord
+
+# Enum tables - records store the index into these lists instead of the string
+ACCOUNT_TYPES = ["checking", "savings", "credit", "loan"]
+ACCOUNT_STATUSES = ["active", "closed", "frozen"]
+TRANSACTION_TYPES = ["debit", "credit", "transfer", "payment"]
+MERCHANTS = ["Amazon", "Netflix", "Starbucks", "Walmart", "Target", "Uber", "DoorDash", "Spotify", "Apple", "Google", "Shell", "Costco", "Best Buy", "CVS", "Home Depot"]
+CATEGORIES = ["shopping", "food", "transportation", "entertainment", "utilities", "health", "travel", "bills"]
+
+# Descriptions only depend on (type, merchant), so build every combination once
+_DESCRIPTIONS = [[f"{txn_type.title()} at {merchant}" for merchant in MERCHANTS] for txn_type in TRANSACTION_TYPES]
+
+
+def uuid_str(raw: bytes) -> str:
+    """Format a 16-byte binary UUID as its canonical string"""
+    return str(uuid.UUID(bytes=raw))
+
+
+def uuid_bytes(value: str) -> bytes:
+    """Parse a canonical UUID string into its 16-byte binary form"""
+    return uuid.UUID(value).bytes
+
+
+class Customer:
+    """A generated customer; UUIDs are stored as 16 raw bytes"""
+
+    __slots__ = ("customer_id", "first_name", "last_name", "email", "phone", "address",
+                 "dob", "credit_score", "income", "created_at")
+
+    def __init__(self, customer_id: bytes, first_name: str, last_name: str, email: str, phone: str,
+                 address: str, dob: date, credit_score: int, income: float, created_at: date):
+        self.customer_id = customer_id
+        self.first_name = sys.intern(first_name)
+        self.last_name = sys.intern(last_name)
+        self.email = email
+        self.phone = phone
+        self.address = address
+        self.dob = dob
+        self.credit_score = credit_score
+        self.income = income
+        self.created_at = created_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to the customers.json layout"""
+        return {
+            "customer_id": uuid_str(self.customer_id),
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "email": self.email,
+            "phone": self.phone,
+            "address": self.address,
+            "dob": self.dob.isoformat(),
+            "credit_score": self.credit_score,
+            "income": self.income,
+            "created_at": self.created_at.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Customer":
+        """Build a record from a customers.json entry"""
+        return cls(
+            uuid_bytes(data["customer_id"]), data["first_name"], data["last_name"], data["email"],
+            data["phone"], data["address"], date.fromisoformat(data["dob"]), data["credit_score"],
+            data["income"], date.fromisoformat(data["created_at"].split('T')[0])
+        )
+
+
+class Account:
+    """A generated account; type and status are enum codes"""
+
+    __slots__ = ("account_id", "customer_id", "account_type", "open_date", "status", "balance")
+
+    def __init__(self, account_id: bytes, customer_id: bytes, account_type: int, open_date: date,
+                 status: int, balance: float):
+        self.account_id = account_id
+        self.customer_id = customer_id
+        self.account_type = account_type
+        self.open_date = open_date
+        self.status = status
+        self.balance = balance
+
+    @property
+    def account_type_name(self) -> str:
+        return ACCOUNT_TYPES[self.account_type]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to the accounts.json layout"""
+        return {
+            "account_id": uuid_str(self.account_id),
+            "customer_id": uuid_str(self.customer_id),
+            "account_type": ACCOUNT_TYPES[self.account_type],
+            "open_date": self.open_date.isoformat(),
+            "status": ACCOUNT_STATUSES[self.status],
+            "balance": self.balance
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Account":
+        """Build a record from an accounts.json entry"""
+        return cls(
+            uuid_bytes(data["account_id"]), uuid_bytes(data["customer_id"]),
+            ACCOUNT_TYPES.index(data["account_type"]), date.fromisoformat(data["open_date"]),
+            ACCOUNT_STATUSES.index(data["status"]), data["balance"]
+        )
+
+
+class Transaction:
+    """A generated transaction; type, merchant and category are enum codes"""
+
+    __slots__ = ("transaction_id", "account_id", "date", "amount", "type", "merchant", "category", "is_fraud")
+
+    def __init__(self, transaction_id: bytes, account_id: bytes, date: datetime, amount: float,
+                 type: int, merchant: int, category: int, is_fraud: bool):
+        self.transaction_id = transaction_id
+        self.account_id = account_id
+        self.date = date
+        self.amount = amount
+        self.type = type
+        self.merchant = merchant
+        self.category = category
+        self.is_fraud = is_fraud
+
+    @property
+    def description(self) -> str:
+        return _DESCRIPTIONS[self.type][self.merchant]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to the transactions.json layout"""
+        return {
+            "transaction_id": uuid_str(self.transaction_id),
+            "account_id": uuid_str(self.account_id),
+            "date": self.date.isoformat(),
+            "amount": self.amount,
+            "type": TRANSACTION_TYPES[self.type],
+            "merchant": MERCHANTS[self.merchant],
+            "category": CATEGORIES[self.category],
+            "description": _DESCRIPTIONS[self.type][self.merchant],
+            "is_fraud": self.is_fraud
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Transaction":
+        """Build a record from a transactions.json entry"""
+        return cls(
+            uuid_bytes(data["transaction_id"]), uuid_bytes(data["account_id"]),
+            datetime.fromisoformat(data["date"]), data["amount"],
+            TRANSACTION_TYPES.index(data["type"]), MERCHANTS.index(data["merchant"]),
+            CATEGORIES.index(data["category"]), data["is_fraud"]
+        )
+
+
+_SCHEMAS = {Customer: CustomerRecord, Account: AccountRecord, Transaction: TransactionRecord}
+
+
+def write_json_array(items: Iterable[Dict[str, Any]], f: TextIO, indent: int = 2, ensure_ascii: bool = True) -> int:
+    """Stream dicts to f as a JSON array, byte-identical to json.dump(list(items), f, indent=indent).
+
+    Only one item is serialized at a time, so the full list never has to exist as dicts.
+    Returns the number of items written.
+    """
+    pad = " " * indent
+    count = 0
+    for item in items:
+        encoded = json.dumps(item, indent=indent, ensure_ascii=ensure_ascii)
+        f.write("[\n" if count == 0 else ",\n")
+        f.write(pad + encoded.replace("\n", "\n" + pad))
+        count += 1
+    f.write("\n]" if count else "[]")
+    return count
+
+
+def append_json_array(items: Iterable[Dict[str, Any]], filename: str, indent: int = 2, ensure_ascii: bool = True) -> int:
+    """Append dicts to a JSON array file written by write_json_array, in place.
+
+    The existing elements are neither parsed nor rewritten: the closing bracket is
+    trimmed and the new elements are written after it. Returns the number appended.
+    """
+    pad = " " * indent
+    with open(filename, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(size - 64, 0))
+        tail = f.read()
+        body = tail[:tail.rindex(b"]")].rstrip()
+        empty = body.endswith(b"[")
+        f.seek(size - len(tail) + len(body))
+        f.truncate()
+        count = 0
+        for item in items:
+            encoded = json.dumps(item, indent=indent, ensure_ascii=ensure_ascii)
+            f.write(b"\n" if count == 0 and empty else b",\n")
+            f.write((pad + encoded.replace("\n", "\n" + pad)).encode("utf-8"))
+            count += 1
+        f.write(b"]" if empty and count == 0 else b"\n]")
+    return count
+
+
+def dump_records(records: Iterable[Any], filename: str, indent: int = 2) -> int:
+    """Serialize records straight to a JSON file without building an intermediate list"""
+    with open(filename, "w", encoding="utf-8") as f:
+        return write_json_array((record.to_dict() for record in records), f, indent=indent)
+
+
+def iter_json_array(filename: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Lazily yield the elements of a top-level JSON array of objects or arrays.
+
+    The file is read in chunks and decoded one element at a time, so memory is
+    bounded by the largest element rather than the file size.
+    """
+    decoder = json.JSONDecoder()
+    whitespace = " \t\n\r"
+    with open(filename, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size)
+        pos = 0
+        eof = not buffer
+
+        def skip_whitespace():
+            nonlocal buffer, pos, eof
+            while True:
+                while pos < len(buffer) and buffer[pos] in whitespace:
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                buffer, pos = f.read(chunk_size), 0
+                eof = not buffer
+
+        skip_whitespace()
+        if buffer[pos:pos + 1] != "[":
+            raise ValueError(f"{filename} does not contain a JSON array")
+        pos += 1
+        expect_comma = False
+        while True:
+            skip_whitespace()
+            if eof and pos >= len(buffer):
+                raise ValueError(f"Unexpected end of file in {filename}")
+            if buffer[pos] == "]":
+                return
+            if expect_comma:
+                if buffer[pos] != ",":
+                    raise ValueError(f"Expected ',' between array elements in {filename}")
+                pos += 1
+                expect_comma = False
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Element spans the chunk boundary: keep the unread tail and read more
+                more = f.read(max(chunk_size, len(buffer)))
+                eof = not more
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            pos = end
+            expect_comma = True
+            yield item
+
+
+def load_records(record_type: Any, filename: str) -> List[Any]:
+    """Load a generated JSON file back into compact records, validating it against the record's schema"""
+    return [record_type.from_dict(entry) for entry in dataset_cache.load(filename, List[_SCHEMAS[record_type]])]
@@ -0,0 +1,66 @@
+"""crew_agent.py cold start against stub_ollama, and the fraud model hot path"""
+
+import atexit
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+from run_benchmarks import BACKEND_DIR, SkipBenchmark, benchmark
+
+CREW_AGENT = os.path.join(BACKEND_DIR, "crew_agent.py")
+REQUEST = {"query": "I see a suspicious charge on my card", "amount": 950,
+           "merchant": "Luxury Electronics", "location": "overseas"}
+
+
+def require_crewai():
+    if importlib.util.find_spec("crewai") is None:
+        raise SkipBenchmark("crewai is not installed")
+
+
+def stub_server() -> str:
+    """Start stub_ollama on a free port for the rest of the run; returns its base URL"""
+    require_crewai()
+    from stub_ollama import start_in_thread
+    server = start_in_thread()
+    atexit.register(server.shutdown)
+    return server.url
+
+
+@benchmark(setup=stub_server, repeat=3)
+def cold_start(base_url):
+    """Process spawn to result frame: imports, Ollama probe, agent setup, fraud model and one kickoff"""
+    env = {**os.environ, "OLLAMA_BASE_URL": base_url, "CREW_LOG_LEVEL": "ERROR"}
+    completed = subprocess.run([sys.executable, CREW_AGENT], input=json.dumps(REQUEST).encode("utf-8"),
+                               capture_output=True, env=env, cwd=BACKEND_DIR, timeout=300)
+    if completed.returncode != 0:
+        raise RuntimeError(f"crew_agent.py exited with {completed.returncode}: {completed.stderr[-500:]!r}")
+
+
+def query_fraud():
+    import query_fraud
+    return query_fraud
+
+
+@benchmark(setup=query_fraud, repeat=7, number=1000, items=1, unit="queries")
+def extract_features(module):
+    module.extract_features_from_query(REQUEST["query"], REQUEST["amount"], REQUEST["merchant"], REQUEST["location"])
+
+
+@benchmark(setup=query_fraud, repeat=5)
+def fraud_model_training(module):
+    """Loading the labeled data and the two fits, as paid by the first fraud request of a process"""
+    module.get_fraud_model.cache_clear()
+    module.get_fraud_model()
+
+
+@benchmark(setup=query_fraud, repeat=7, number=100, items=1, unit="queries")
+def fraud_detection_warm(module):
+    module.semi_supervised_fraud_detection(REQUEST["query"], REQUEST["amount"], REQUEST["merchant"],
+                                           REQUEST["location"])
+
+
+@benchmark(setup=query_fraud, repeat=7, number=20, items=32, unit="queries")
+def fraud_detection_batch(module):
+    module.score_fraud_batch([REQUEST] * 32)
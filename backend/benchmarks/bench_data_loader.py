@@ -0,0 +1,58 @@
+"""BankingDataLoader load, lookup and statistics over a seeded 10k-conversation dataset"""
+
+import atexit
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+from run_benchmarks import benchmark
+
+NUM_CONVERSATIONS = 10_000
+_DATASET = None
+
+
+def dataset_path() -> str:
+    """Write the benchmark dataset once per run (template generator, fixed seed and clock)"""
+    global _DATASET
+    if _DATASET is None:
+        from template_conversation_generator import TemplateConversationGenerator
+        directory = tempfile.mkdtemp(prefix="bench_loader_")
+        atexit.register(shutil.rmtree, directory, ignore_errors=True)
+        generator = TemplateConversationGenerator(seed=42, reference_time=datetime(2024, 1, 1))
+        dataset = generator.generate_dataset(NUM_CONVERSATIONS // len(generator.conversation_templates))
+        _DATASET = os.path.join(directory, "dataset.json")
+        generator.save_dataset(dataset, _DATASET)
+    return _DATASET
+
+
+def loaded():
+    from data_loader import BankingDataLoader
+    return BankingDataLoader(dataset_path())
+
+
+@benchmark(setup=dataset_path, repeat=5, items=NUM_CONVERSATIONS, unit="conversations")
+def load(path):
+    from data_loader import BankingDataLoader
+    BankingDataLoader(path)
+
+
+@benchmark(setup=loaded, repeat=7, number=10, items=NUM_CONVERSATIONS, unit="conversations")
+def conversations_by_intent(loader):
+    loader.get_conversations_by_intent("fraud_alert")
+
+
+@benchmark(setup=loaded, repeat=7, number=10)
+def training_data_for_agent(loader):
+    loader.get_training_data_for_agent("fraud", num_samples=100)
+
+
+@benchmark(setup=loaded, repeat=5, items=NUM_CONVERSATIONS, unit="conversations")
+def dataset_statistics(loader):
+    loader.get_dataset_statistics()
+
+
+@benchmark(setup=dataset_path, repeat=5, items=NUM_CONVERSATIONS, unit="conversations")
+def streaming_statistics(path):
+    from data_loader import BankingDataLoader
+    BankingDataLoader(path, lazy=True).get_dataset_statistics()
@@ -0,0 +1,39 @@
+"""Dataset snapshots: attaching and decoding versus parsing the JSON, on the data_loader benchmark dataset"""
+
+import atexit
+import shutil
+import tempfile
+
+from bench_data_loader import NUM_CONVERSATIONS, dataset_path
+from run_benchmarks import benchmark
+
+
+def snapshot_dir():
+    import dataset_cache
+    from fast_json import Conversation, List
+    directory = tempfile.mkdtemp(prefix="bench_snapshots_")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    dataset_cache.attach(dataset_path(), List[Conversation], directory).close()
+    return directory
+
+
+@benchmark(setup=dataset_path, repeat=5, items=NUM_CONVERSATIONS, unit="conversations")
+def parse_json(path):
+    from fast_json import Conversation, List, load_file
+    load_file(path, List[Conversation])
+
+
+@benchmark(setup=snapshot_dir, repeat=7, number=100, items=1, unit="attaches")
+def attach(directory):
+    import dataset_cache
+    from fast_json import Conversation, List
+    dataset_cache.attach(dataset_path(), List[Conversation], directory).close()
+
+
+@benchmark(setup=snapshot_dir, repeat=5, items=NUM_CONVERSATIONS, unit="conversations")
+def attach_and_decode(directory):
+    import dataset_cache
+    from fast_json import Conversation, List
+    with dataset_cache.attach(dataset_path(), List[Conversation], directory) as snapshot:
+        for _ in snapshot:
+            pass
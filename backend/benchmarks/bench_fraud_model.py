@@ -0,0 +1,45 @@
+"""Incremental fraud model: partial_fit and scoring throughput on generated transactions"""
+
+from datetime import datetime
+
+from run_benchmarks import benchmark
+
+AS_OF = datetime(2024, 1, 1)
+NUM_CUSTOMERS = 2_000
+BATCH_SIZE = 5_000
+
+
+def transactions():
+    from banking_random import make_rng
+    from generate_synthetic_banking_data import FakerPools, generate_accounts, generate_customers, generate_transactions
+    rng = make_rng(11)
+    accounts, _ = generate_accounts(generate_customers(NUM_CUSTOMERS, rng, AS_OF, FakerPools(rng)), rng, AS_OF)
+    rows = generate_transactions(accounts, rng, AS_OF, report=False)
+    rows.sort(key=lambda t: t.date)
+    return rows
+
+
+def trained():
+    from fraud_model import FraudModel
+    rows = transactions()
+    return FraudModel().fit_batches(rows, BATCH_SIZE), rows
+
+
+@benchmark(setup=transactions, repeat=5, unit="transactions")
+def train_incremental(rows):
+    from fraud_model import FraudModel
+    FraudModel().fit_batches(rows, BATCH_SIZE)
+    return len(rows)
+
+
+@benchmark(setup=trained, repeat=7, unit="transactions")
+def score_batch(state):
+    model, rows = state
+    model.predict_proba(rows)
+    return len(rows)
+
+
+@benchmark(setup=trained, repeat=7, number=200, items=1, unit="transactions")
+def score_single(state):
+    model, rows = state
+    model.predict_proba(rows[:1])
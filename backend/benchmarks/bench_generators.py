@@ -0,0 +1,99 @@
+"""Synthetic data generator throughput: customer/account/transaction rows and dataset saves"""
+
+import atexit
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+from run_benchmarks import benchmark
+
+AS_OF = datetime(2024, 1, 1)
+NUM_CUSTOMERS = 2_000
+CONVERSATIONS_PER_INTENT = 400
+
+
+@benchmark(repeat=3, items=NUM_CUSTOMERS, unit="rows")
+def customers_faker():
+    from banking_random import make_rng
+    from generate_synthetic_banking_data import generate_customers
+    generate_customers(NUM_CUSTOMERS, make_rng(7), as_of=AS_OF)
+
+
+@benchmark(repeat=5, items=NUM_CUSTOMERS, unit="rows")
+def customers_pooled():
+    from banking_random import make_rng
+    from generate_synthetic_banking_data import FakerPools, generate_customers
+    rng = make_rng(7)
+    generate_customers(NUM_CUSTOMERS, rng, as_of=AS_OF, pools=FakerPools(rng))
+
+
+def customers():
+    from banking_random import make_rng
+    from generate_synthetic_banking_data import FakerPools, generate_customers
+    rng = make_rng(7)
+    return generate_customers(NUM_CUSTOMERS, rng, as_of=AS_OF, pools=FakerPools(rng))
+
+
+def accounts():
+    from banking_random import make_rng
+    from generate_synthetic_banking_data import generate_accounts
+    return generate_accounts(customers(), make_rng(8), as_of=AS_OF)[0]
+
+
+def transactions():
+    from banking_random import make_rng
+    from generate_synthetic_banking_data import generate_transactions
+    directory = tempfile.mkdtemp(prefix="bench_records_")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    return generate_transactions(accounts(), make_rng(9), as_of=AS_OF), os.path.join(directory, "transactions.json")
+
+
+@benchmark(setup=customers, repeat=5, items=NUM_CUSTOMERS, unit="customers")
+def accounts_for_customers(rows):
+    from banking_random import make_rng
+    from generate_synthetic_banking_data import generate_accounts
+    generate_accounts(rows, make_rng(8), as_of=AS_OF)
+
+
+@benchmark(setup=accounts, repeat=5, unit="transactions")
+def transactions_for_accounts(rows):
+    from banking_random import make_rng
+    from generate_synthetic_banking_data import generate_transactions
+    return len(generate_transactions(rows, make_rng(9), as_of=AS_OF))
+
+
+@benchmark(setup=transactions, repeat=5, unit="rows")
+def dump_transactions(state):
+    from banking_records import dump_records
+    rows, filename = state
+    return dump_records(rows, filename)
+
+
+def conversations():
+    from template_conversation_generator import TemplateConversationGenerator
+    directory = tempfile.mkdtemp(prefix="bench_save_")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    generator = TemplateConversationGenerator(seed=42, reference_time=AS_OF)
+    dataset = generator.generate_dataset(CONVERSATIONS_PER_INTENT)
+    return generator, dataset, os.path.join(directory, "dataset.json")
+
+
+@benchmark(setup=conversations, repeat=5, unit="conversations")
+def save_dataset(state):
+    generator, dataset, filename = state
+    generator.save_dataset(dataset, filename)
+    return len(dataset)
+
+
+@benchmark(repeat=5, unit="conversations")
+def template_generate_dataset():
+    from template_conversation_generator import TemplateConversationGenerator
+    return len(TemplateConversationGenerator(seed=42, reference_time=AS_OF).generate_dataset(CONVERSATIONS_PER_INTENT))
+
+
+@benchmark(repeat=3, unit="conversations")
+def comprehensive_generate_dataset():
+    from comprehensive_data_generator import ComprehensiveBankingDataGenerator
+    generator = ComprehensiveBankingDataGenerator(seed=42, reference_time=AS_OF)
+    return len(generator.generate_dataset(CONVERSATIONS_PER_INTENT // 4))
@@ -0,0 +1,27 @@
+"""Velocity features: per-event update throughput of the decayed per-account windows"""
+
+from run_benchmarks import benchmark
+
+NUM_EVENTS = 200_000
+NUM_ACCOUNTS = 10_000
+
+
+def events():
+    from velocity_features import synthetic_events
+    return synthetic_events(NUM_EVENTS, NUM_ACCOUNTS)
+
+
+@benchmark(setup=events, repeat=5, unit="events")
+def process_batch(columns):
+    from velocity_features import VelocityEngine
+    VelocityEngine().process(*columns)
+    return NUM_EVENTS
+
+
+@benchmark(setup=events, repeat=5, unit="events")
+def stream(columns):
+    from velocity_features import VelocityEngine
+    accounts, timestamps, amounts = columns
+    for _ in VelocityEngine().stream(zip(accounts, timestamps.tolist(), amounts.tolist())):
+        pass
+    return NUM_EVENTS
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Benchmark Runner for the Banking Backend Hot Paths
+asv-style suite without extra dependencies: bench_*.py modules register timed
+functions, results are saved as JSON per commit and two result files can be
+compared for regressions
+"""
+
+import argparse
+import contextlib
+import glob
+import importlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+# The backend modules import each other as top-level scripts
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+_REGISTRY: List["Benchmark"] = []
+
+
+class SkipBenchmark(Exception):
+    """Raised by a setup function when the benchmark cannot run here (missing dependency, no Ollama...)"""
+
+
+class Benchmark:
+    """A timed function: setup() runs once and its return value is passed to fn.
+
+    Each of `repeat` samples times `number` calls; `items` is the work per call
+    (rows, conversations...) used to report a throughput. When items is not
+    fixed, a function may return its own item count instead.
+    """
+
+    def __init__(self, name: str, fn: Callable, setup: Optional[Callable], repeat: int, number: int,
+                 items: Optional[int], unit: str):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.repeat = repeat
+        self.number = number
+        self.items = items
+        self.unit = unit
+
+    def run(self) -> Dict[str, Any]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            state = self.setup() if self.setup else None
+            call = (lambda: self.fn(state)) if self.setup else self.fn
+            returned = call()  # warm-up, also catches errors before timing
+            samples = []
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                for _ in range(self.number):
+                    call()
+                samples.append((time.perf_counter() - start) / self.number)
+        result = {
+            "seconds_min": min(samples),
+            "seconds_median": statistics.median(samples),
+            "seconds_mean": statistics.fmean(samples),
+            "seconds_stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "repeat": self.repeat,
+            "number": self.number,
+        }
+        items = self.items or (returned if isinstance(returned, int) else None)
+        if items:
+            result["items"] = items
+            result["unit"] = self.unit
+            result[f"{self.unit}_per_second"] = items / result["seconds_median"]
+        return result
+
+
+def benchmark(name: Optional[str] = None, setup: Optional[Callable] = None, repeat: int = 5, number: int = 1,
+              items: Optional[int] = None, unit: str = "items"):
+    """Register a benchmark function (used as a decorator in bench_*.py modules)"""
+    def register(fn: Callable) -> Callable:
+        module = fn.__module__.rsplit(".", 1)[-1].replace("bench_", "")
+        _REGISTRY.append(Benchmark(name or f"{module}.{fn.__name__}", fn, setup, repeat, number, items, unit))
+        return fn
+    return register
+
+
+def discover():
+    """Import every bench_*.py next to this file so their benchmarks register"""
+    if BENCH_DIR not in sys.path:
+        sys.path.insert(0, BENCH_DIR)
+    # Run as a script this module is __main__; the bench modules must register into this registry
+    sys.modules.setdefault("run_benchmarks", sys.modules[__name__])
+    for path in sorted(glob.glob(os.path.join(BENCH_DIR, "bench_*.py"))):
+        importlib.import_module(os.path.splitext(os.path.basename(path))[0])
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(pattern: Optional[str] = None) -> Dict[str, Any]:
+    """Run the registered benchmarks whose name contains pattern"""
+    results: Dict[str, Any] = {}
+    for bench in _REGISTRY:
+        if pattern and pattern not in bench.name:
+            continue
+        try:
+            result = bench.run()
+        except SkipBenchmark as e:
+            print(f"  {bench.name:<45} skipped: {e}")
+            results[bench.name] = {"skipped": str(e)}
+            continue
+        results[bench.name] = result
+        rate = f"  {result[result['unit'] + '_per_second']:>12,.0f} {result['unit']}/s" if "unit" in result else ""
+        print(f"  {bench.name:<45} {result['seconds_median'] * 1000:>10.3f} ms{rate}")
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float = 0.10) -> List[str]:
+    """Print median-time ratios head/base; return the names that regressed beyond threshold"""
+    regressions = []
+    print(f"Comparing {head.get('commit')} against {base.get('commit')} (threshold {threshold:.0%})")
+    for name, new in head["benchmarks"].items():
+        old = base["benchmarks"].get(name)
+        if not old or "skipped" in old or "skipped" in new:
+            continue
+        ratio = new["seconds_median"] / old["seconds_median"]
+        if ratio > 1 + threshold:
+            verdict = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            verdict = "faster"
+        else:
+            verdict = ""
+        print(f"  {name:<45} {old['seconds_median'] * 1000:>10.3f} ms -> {new['seconds_median'] * 1000:>10.3f} ms"
+              f"  x{ratio:.2f} {verdict}")
+    return regressions
+
+
+def main():
+    """Run the suite, save the results as JSON and optionally compare them with an earlier run"""
+    parser = argparse.ArgumentParser(description="Benchmark the banking backend hot paths")
+    parser.add_argument("-k", "--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", metavar="BASE_JSON", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown of the median that counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on a regression")
+    args = parser.parse_args()
+
+    discover()
+    print(f"Running {len(_REGISTRY)} benchmarks...")
+    results = run_suite(args.filter)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        if compare(base, results, args.threshold) and args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
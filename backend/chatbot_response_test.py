@@ -8,7 +8,8 @@ import sys
 import os
 import signal
 import time
-import json
+import dataset_cache
+from profiling import profiled
 import platform
 from datetime import datetime
 import matplotlib.pyplot as plt
@@ -34,10 +35,9 @@ OUTPUT_CSV = "chatbot_test_results.csv"
 TEST_CUSTOMER_ID = "8455d7af-01b7-4570-9984-1c7b1fe28aa5"  # Mariah Martin
 
 def load_test_cases(filename='chatbot_test_cases.json'):
-    """Load test cases from external JSON file"""
+    """Load test cases from external JSON file, as a read-only sequence (see dataset_cache.load)"""
     test_cases_file = os.path.join(os.path.dirname(__file__), filename)
-    with open(test_cases_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return dataset_cache.load(test_cases_file)
 
 def start_server():
     """Start the backend server with retry logic"""
@@ -687,7 +687,8 @@ def main():
             
             try:
                 # Test the chatbot
-                result = test_chatbot_response(test_case, test_number)
+                with profiled("chatbot_response_test", f"test{test_number}"):
+                    result = test_chatbot_response(test_case, test_number)
                 results.append(result)
                 
             except Exception as e:
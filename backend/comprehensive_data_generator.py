@@ -4,15 +4,31 @@ Comprehensive Synthetic Data Generator for Banking Chatbot
 Generates realistic banking conversations for all scenarios
 """
 
-import json
-import random
+import argparse
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-import uuid
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set
+import numpy as np
+from banking_random import Seed, make_rng, hex_ids, round_cents
+from banking_records import write_json_array, append_json_array
+from dataset_stats import DatasetStatsAccumulator
+from fast_json import Conversation, load_file
+from profiling import profiled
+
+FIRST_NAMES = ["John", "Sarah", "Michael", "Emily", "David", "Lisa", "James", "Jennifer", "Robert", "Amanda"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez"]
+_FIRST_NAMES_LOWER = [name.lower() for name in FIRST_NAMES]
+_LAST_NAMES_LOWER = [name.lower() for name in LAST_NAMES]
+PROFILE_ACCOUNT_TYPES = ["checking", "savings", "premium", "student", "senior"]
 
 class ComprehensiveBankingDataGenerator:
-    def __init__(self):
-        """Initialize the data generator"""
+    def __init__(self, seed: Seed = None, reference_time: Optional[datetime] = None):
+        """Initialize the data generator
+
+        seed makes every draw (IDs included) reproducible; reference_time is the
+        'now' that timestamps are generated relative to (defaults to the current time).
+        """
+        self.rng = make_rng(seed)
+        self.reference_time = reference_time or datetime.now()
         self.conversation_templates = {
             "balance_inquiry": [
                 {
@@ -59,27 +75,75 @@ class ComprehensiveBankingDataGenerator:
     
     def generate_user_profile(self) -> Dict[str, Any]:
         """Generate a realistic user profile"""
-        first_names = ["John", "Sarah", "Michael", "Emily", "David", "Lisa", "James", "Jennifer", "Robert", "Amanda"]
-        last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez"]
+        return self.generate_user_profiles(1)[0]
+    
+    def _unique_hex_ids(self, count: int, used: Optional[Set[str]]) -> List[str]:
+        """Draw count hex IDs, redrawing any that collide with (and then adding them to) used"""
+        ids = hex_ids(self.rng, count)
+        if used is None:
+            return ids
+        for i, value in enumerate(ids):
+            while value in used:
+                value = hex_ids(self.rng, 1)[0]
+            ids[i] = value
+            used.add(value)
+        return ids
+    
+    def generate_user_profiles(self, count: int, used_ids: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """Generate count user profiles, drawing every field as one array
+
+        used_ids holds the hex part of user IDs already taken; new IDs avoid and extend it.
+        """
+        rng = self.rng
+        user_ids = self._unique_hex_ids(count, used_ids)
+        first = rng.integers(0, len(FIRST_NAMES), size=count).tolist()
+        last = rng.integers(0, len(LAST_NAMES), size=count).tolist()
+        email_first = rng.integers(0, len(FIRST_NAMES), size=count).tolist()
+        email_last = rng.integers(0, len(LAST_NAMES), size=count).tolist()
+        area = rng.integers(100, 1000, size=count).tolist()
+        line = rng.integers(1000, 10000, size=count).tolist()
+        account_types = rng.integers(0, len(PROFILE_ACCOUNT_TYPES), size=count).tolist()
+        balances = round_cents(rng.uniform(100, 50000, size=count))
+        account_numbers = rng.integers(1000000000, 10000000000, size=count).tolist()
+        member_days = rng.integers(30, 365*5 + 1, size=count)
+        member_since = np.datetime_as_string(
+            np.datetime64(self.reference_time, "us") - member_days.astype("timedelta64[D]"), unit="D"
+        ).tolist()
         
-        return {
-            "user_id": f"user_{uuid.uuid4().hex[:8]}",
-            "first_name": random.choice(first_names),
-            "last_name": random.choice(last_names),
-            "email": f"{random.choice(first_names).lower()}.{random.choice(last_names).lower()}@email.com",
-            "phone": f"+1-555-{random.randint(100, 999)}-{random.randint(1000, 9999)}",
-            "account_type": random.choice(["checking", "savings", "premium", "student", "senior"]),
-            "balance": round(random.uniform(100, 50000), 2),
-            "account_number": f"{random.randint(1000000000, 9999999999)}",
-            "member_since": (datetime.now() - timedelta(days=random.randint(30, 365*5))).strftime("%Y-%m-%d")
-        }
+        return [
+            {
+                "user_id": f"user_{user_ids[i]}",
+                "first_name": FIRST_NAMES[first[i]],
+                "last_name": LAST_NAMES[last[i]],
+                "email": f"{_FIRST_NAMES_LOWER[email_first[i]]}.{_LAST_NAMES_LOWER[email_last[i]]}@email.com",
+                "phone": f"+1-555-{area[i]}-{line[i]}",
+                "account_type": PROFILE_ACCOUNT_TYPES[account_types[i]],
+                "balance": balances[i],
+                "account_number": f"{account_numbers[i]}",
+                "member_since": member_since[i]
+            }
+            for i in range(count)
+        ]
     
-    def generate_conversation(self, intent: str, user_profile: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate a conversation based on intent"""
+    def generate_conversation(self, intent: str, user_profile: Dict[str, Any],
+                              minutes_ago: Optional[int] = None,
+                              satisfaction_score: Optional[int] = None,
+                              conversation_id: Optional[str] = None) -> Dict[str, Any]:
+        """Generate a conversation based on intent
+
+        minutes_ago, satisfaction_score and conversation_id are drawn from the
+        generator's RNG when not supplied (generate_dataset supplies them in bulk).
+        """
         template = self.conversation_templates[intent][0]
+        if minutes_ago is None:
+            minutes_ago = int(self.rng.integers(1, 61))
+        if satisfaction_score is None:
+            satisfaction_score = int(self.rng.integers(3, 6))
+        if conversation_id is None:
+            conversation_id = hex_ids(self.rng, 1)[0]
         
         # Add realistic timestamps
-        start_time = datetime.now() - timedelta(minutes=random.randint(1, 60))
+        start_time = self.reference_time - timedelta(minutes=minutes_ago)
         
         conversation = []
         
@@ -134,17 +198,17 @@ class ComprehensiveBankingDataGenerator:
             })
         
         return {
-            "conversation_id": f"conv_{uuid.uuid4().hex[:8]}",
+            "conversation_id": f"conv_{conversation_id}",
             "user_id": user_profile["user_id"],
             "intent": intent,
             "user_name": f"{user_profile['first_name']} {user_profile['last_name']}",
             "conversation": conversation,
             "user_profile": user_profile,
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": self.reference_time.isoformat(),
             "metadata": {
                 "conversation_length": len(conversation),
                 "duration_seconds": 120,
-                "satisfaction_score": random.randint(3, 5),
+                "satisfaction_score": satisfaction_score,
                 "resolution_status": "resolved"
             }
         }
@@ -157,52 +221,157 @@ class ComprehensiveBankingDataGenerator:
         print(f"Generating {conversations_per_intent} conversations per intent...")
         print(f"Total conversations: {conversations_per_intent * len(intents)}")
         
-        for intent in intents:
-            print(f"\nGenerating {intent} conversations...")
+        self.extend_dataset(dataset, conversations_per_intent)
+        return dataset
+    
+    def generate_intent_batch(self, intent: str, count: int, used_conversation_ids: Optional[Set[str]] = None,
+                              used_user_ids: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """Generate count conversations for one intent
+
+        The used_* sets hold the hex part of IDs already taken; new IDs avoid and extend them.
+        """
+        # Draw every random value for this intent up front
+        user_profiles = self.generate_user_profiles(count, used_user_ids)
+        minutes_ago = self.rng.integers(1, 61, size=count).tolist()
+        satisfaction = self.rng.integers(3, 6, size=count).tolist()
+        conversation_ids = self._unique_hex_ids(count, used_conversation_ids)
+        
+        conversations = []
+        for i in range(count):
+            if i % 10 == 0:
+                print(f"  Generated {i} {intent} conversations...")
             
-            for i in range(conversations_per_intent):
-                if i % 10 == 0:
-                    print(f"  Generated {i} {intent} conversations...")
-                
-                # Generate user profile
-                user_profile = self.generate_user_profile()
-                
-                # Generate conversation
-                conversation = self.generate_conversation(intent, user_profile)
-                dataset.append(conversation)
+            # Generate conversation
+            conversations.append(self.generate_conversation(
+                intent, user_profiles[i], minutes_ago[i], satisfaction[i], conversation_ids[i]
+            ))
+        return conversations
+    
+    def extend_dataset(self, dataset: List[Dict[str, Any]], conversations_per_intent: int) -> List[Dict[str, Any]]:
+        """Append conversations_per_intent new conversations per intent to dataset in place
+
+        Conversation and user IDs already present in dataset are never reused.
+        Returns only the newly generated conversations.
+        """
+        used_conversation_ids = {conv["conversation_id"][len("conv_"):] for conv in dataset}
+        used_user_ids = {conv["user_id"][len("user_"):] for conv in dataset}
+        added = []
         
-        return dataset
+        for intent in self.conversation_templates:
+            print(f"\nGenerating {intent} conversations...")
+            added.extend(self.generate_intent_batch(
+                intent, conversations_per_intent, used_conversation_ids, used_user_ids
+            ))
+        
+        dataset.extend(added)
+        return added
+    
+    def generate_batches(self, conversations_per_intent: int, used_conversation_ids: Set[str],
+                         used_user_ids: Set[str], batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Yield conversations_per_intent new conversations per intent in batches of at most batch_size
+
+        Nothing is kept between batches, so memory is bounded by one batch. The
+        used_* sets are extended as IDs are drawn; batch boundaries change the
+        random stream, so the output differs from extend_dataset for the same seed.
+        """
+        for intent in self.conversation_templates:
+            for start in range(0, conversations_per_intent, batch_size):
+                yield self.generate_intent_batch(intent, min(batch_size, conversations_per_intent - start),
+                                                 used_conversation_ids, used_user_ids)
     
-    def save_dataset(self, dataset: List[Dict[str, Any]], filename: str = "comprehensive_banking_dataset.json"):
-        """Save the dataset to a JSON file"""
+    @staticmethod
+    def load_dataset(filename: str) -> List[Dict[str, Any]]:
+        """Load a previously saved dataset so it can be extended"""
+        return load_file(filename, List[Conversation])
+    
+    @staticmethod
+    def _tracked(conversations: List[Dict[str, Any]], stats: DatasetStatsAccumulator):
+        """Yield conversations while folding them into stats, so writing and counting share one pass"""
+        for conversation in conversations:
+            stats.update(conversation)
+            yield conversation
+    
+    def save_dataset(self, dataset: List[Dict[str, Any]], filename: str = "comprehensive_banking_dataset.json",
+                     stats: Optional[DatasetStatsAccumulator] = None) -> DatasetStatsAccumulator:
+        """Save the dataset to a JSON file
+
+        Statistics are accumulated while writing unless stats for the dataset are passed in.
+        Returns the statistics so later appends can merge onto them.
+        """
+        items = dataset
+        if stats is None:
+            stats = DatasetStatsAccumulator()
+            items = self._tracked(dataset, stats)
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(dataset, f, indent=2, ensure_ascii=False)
+            write_json_array(items, f, indent=2, ensure_ascii=False)
         
         print(f"\nDataset saved to {filename}")
-        print(f"Total conversations: {len(dataset)}")
+        stats.print_summary()
+        return stats
+    
+    def append_to_saved_dataset(self, conversations: List[Dict[str, Any]], filename: str,
+                                stats: Optional[DatasetStatsAccumulator] = None) -> DatasetStatsAccumulator:
+        """Append conversations to a dataset file in place, without rewriting its existing entries
+
+        stats describe what is already in the file; only the new conversations are
+        accumulated and merged onto a copy of them. Returns the combined statistics.
+        """
+        added = DatasetStatsAccumulator()
+        append_json_array(self._tracked(conversations, added), filename, indent=2, ensure_ascii=False)
+        combined = DatasetStatsAccumulator().merge(stats).merge(added) if stats is not None else added
         
-        # Print statistics
-        intent_counts = {}
-        for conversation in dataset:
-            intent = conversation.get('intent', 'unknown')
-            intent_counts[intent] = intent_counts.get(intent, 0) + 1
+        print(f"\nAppended {len(conversations)} conversations to {filename}")
+        combined.print_summary()
+        return combined
+    
+    def append_batches_to_saved_dataset(self, batches: Iterable[List[Dict[str, Any]]], filename: str,
+                                        stats: Optional[DatasetStatsAccumulator] = None) -> DatasetStatsAccumulator:
+        """Append batches (e.g. from generate_batches) to a dataset file as each one is generated
+
+        Only one batch is in memory at a time. stats describe what is already in
+        the file; returns the combined statistics.
+        """
+        combined = DatasetStatsAccumulator().merge(stats) if stats is not None else DatasetStatsAccumulator()
+        count = 0
+        for batch in batches:
+            count += append_json_array(self._tracked(batch, combined), filename, indent=2, ensure_ascii=False)
         
-        print("\nIntent distribution:")
-        for intent, count in intent_counts.items():
-            print(f"  {intent}: {count} conversations")
+        print(f"\nAppended {count} conversations to {filename}")
+        combined.print_summary()
+        return combined
 
+@profiled("comprehensive_data_generator")
 def main():
     """Main function to generate the dataset"""
-    print("🚀 Starting Comprehensive Banking Synthetic Data Generation...")
+    parser = argparse.ArgumentParser(description="Generate template-based banking conversations")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible output")
+    parser.add_argument("--as-of", type=datetime.fromisoformat, default=None,
+                        help="Reference time (ISO format) for generated timestamps; defaults to now")
+    parser.add_argument("--conversations-per-intent", type=int, default=50)
+    parser.add_argument("--output", default="comprehensive_banking_dataset.json")
+    parser.add_argument("--append", action="store_true",
+                        help="Add conversations to the existing output file instead of regenerating it")
+    args = parser.parse_args()
     
-    # Initialize generator
-    generator = ComprehensiveBankingDataGenerator()
-    
-    # Generate dataset (start with 50 conversations per intent for testing)
-    dataset = generator.generate_dataset(conversations_per_intent=50)
+    print("🚀 Starting Comprehensive Banking Synthetic Data Generation...")
     
-    # Save dataset
-    generator.save_dataset(dataset, "comprehensive_banking_dataset.json")
+    if args.append:
+        existing = ComprehensiveBankingDataGenerator.load_dataset(args.output)
+        # Offset the seed by the existing size so appended rows don't replay the original stream
+        seed = [args.seed, len(existing)] if args.seed is not None else None
+        generator = ComprehensiveBankingDataGenerator(seed=seed, reference_time=args.as_of)
+        stats = DatasetStatsAccumulator.from_conversations(existing)
+        added = generator.extend_dataset(existing, args.conversations_per_intent)
+        generator.append_to_saved_dataset(added, args.output, stats)
+    else:
+        # Initialize generator
+        generator = ComprehensiveBankingDataGenerator(seed=args.seed, reference_time=args.as_of)
+        
+        # Generate dataset (start with 50 conversations per intent for testing)
+        dataset = generator.generate_dataset(conversations_per_intent=args.conversations_per_intent)
+        
+        # Save dataset
+        generator.save_dataset(dataset, args.output)
     
     print("✅ Dataset generation completed!")
 
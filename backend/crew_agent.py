@@ -1,21 +1,57 @@
+import time
+_IMPORTS_STARTED = time.perf_counter()  # import cost is reported as the first timing stage
 import sys
-import json
+import argparse
+import logging
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging.handlers import RotatingFileHandler
+import fast_json
+from crew_protocol import read_frame, read_frames, write_frame
 from crewai import Agent, Task, Crew, Process, LLM
 from datetime import datetime, timedelta
 import random
 import requests
 import os
-import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
-from sklearn.utils import shuffle
+from dataset_stats import RunningMoments
+from query_fraud import get_fraud_model, get_fraud_score_table, score_fraud_batch, semi_supervised_fraud_detection
+import profiling
+import stage_timings
+from stage_timings import StageTimer
+_IMPORTS_FINISHED = time.perf_counter()
+
+# Production mode keeps CrewAI quiet; CREW_VERBOSE=1 turns its step-by-step output back on
+VERBOSE = os.getenv('CREW_VERBOSE', '').lower() in ('1', 'true', 'yes')
+
+# Point these at another server (e.g. a local fake Ollama) without editing the script
+OLLAMA_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434').rstrip('/')
+OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'mistral')
+
+# Optional per-request timing export: CREW_TIMINGS_FORMAT=prometheus|otel, written to
+# CREW_TIMINGS_FILE (stderr when unset)
+TIMINGS_FORMAT = os.getenv('CREW_TIMINGS_FORMAT', '').lower() or None
+TIMINGS_FILE = os.getenv('CREW_TIMINGS_FILE') or None
+
+logger = logging.getLogger('crew_agent')
+
+def configure_logging():
+    """Send logs to stderr, or to a rotating file when CREW_LOG_FILE is set"""
+    log_file = os.getenv('CREW_LOG_FILE')
+    if log_file:
+        handler = RotatingFileHandler(log_file, maxBytes=5 * 1024 * 1024, backupCount=3)
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(os.getenv('CREW_LOG_LEVEL', 'DEBUG' if VERBOSE else 'WARNING').upper())
 
 # Test Ollama connection
 def test_ollama_connection():
     """Test if Ollama is running and accessible"""
     try:
-        response = requests.get("http://localhost:11434/api/version", timeout=5)
+        response = requests.get(f"{OLLAMA_BASE_URL}/api/version", timeout=5)
         if response.status_code == 200:
             return True
         else:
@@ -23,215 +59,511 @@ def test_ollama_connection():
     except:
         return False
 
-# Configure Ollama as the LLM provider
-if not test_ollama_connection():
-    print(json.dumps({
-        "success": False, 
-        "error": "Ollama service not accessible. Please ensure Ollama is running.",
-        "fallback": "Cannot connect to Ollama service"
-    }))
-    sys.exit(1)
-
-llm = LLM(
-    model="ollama/mistral",
-    base_url="http://localhost:11434",
-    temperature=0.7,
-    max_tokens=1024,
-    request_timeout=600
-)
-
-# Read input JSON file path from command line
-if len(sys.argv) < 2:
-    print(json.dumps({"success": False, "error": "No input file provided"}))
-    sys.exit(1)
-
-input_file = sys.argv[1]
-
-try:
-    with open(input_file, 'r') as f:
-        input_data = json.load(f)
-except Exception as e:
-    print(json.dumps({"success": False, "error": f"Failed to read input file: {e}"}))
-    sys.exit(1)
-
-# Extract data from input
-query = input_data.get('query', '')
-user_id = input_data.get('userId', 'user123')
-mock_balance = input_data.get('mockBalance', 5000.0)
-transaction_history = input_data.get('transactionHistory', [])
-amount = input_data.get('amount', 0)
-transaction_type = input_data.get('type', '')
-description = input_data.get('description', '')
-category = input_data.get('category', '')
-merchant = input_data.get('merchant', '')
-location = input_data.get('location', '')
-
-# Create all 4 banking agents (removed verification agent for simplicity)
-inquiry_agent = Agent(
-    role='Customer Inquiry Specialist',
-    goal='Handle general banking inquiries and provide account information',
-    backstory='I am a banking customer service expert with deep knowledge of banking products, services, and policies. I help customers understand their accounts and banking options.',
-    verbose=True,  # Enable verbose for debugging
-    allow_delegation=False,
-    llm=llm
-)
-
-transaction_agent = Agent(
-    role='Transaction Processing Specialist',
-    goal='Process banking transactions, transfers, and payments',
-    backstory='I am a transaction processing expert with expertise in fund transfers, bill payments, and transaction history analysis. I ensure secure and accurate financial transactions.',
-    verbose=True,  # Enable verbose for debugging
-    allow_delegation=False,
-    llm=llm
-)
-
-fraud_detection_agent = Agent(
-    role='Fraud Detection Specialist',
-    goal='Detect and prevent fraudulent activities',
-    backstory='I am a cybersecurity and fraud detection expert with advanced pattern recognition skills. I analyze transactions for suspicious activity and protect customers from fraud.',
-    verbose=True,  # Enable verbose for debugging
-    allow_delegation=False,
-    llm=llm
-)
-
-advisor_agent = Agent(
-    role='Financial Advisor',
-    goal='Provide personalized financial advice and recommendations',
-    backstory='I am a certified financial advisor with expertise in personal finance, investment strategies, budgeting, and financial planning. I help customers make informed financial decisions.',
-    verbose=True,  # Enable verbose for debugging
-    allow_delegation=False,
-    llm=llm
-)
-
-# Simplified task creation based on query type
-query_lower = query.lower()
-
-# Determine the appropriate agent and create task
-if 'balance' in query_lower or 'account' in query_lower:
-    agent = inquiry_agent
-    task_description = f"Provide account balance information for user {user_id}. Current balance: ${mock_balance}. Query: {query}"
-    expected_output = "Clear account balance information with formatting"
-elif 'transaction' in query_lower or 'transfer' in query_lower or 'payment' in query_lower:
-    agent = transaction_agent
-    task_description = f"Process transaction request: {query}. Amount: ${amount}, Type: {transaction_type}, Description: {description}. Current balance: ${mock_balance}."
-    expected_output = "Transaction processing result with confirmation or error details"
-elif 'fraud' in query_lower or 'suspicious' in query_lower:
-    # Run semi-supervised fraud detection
-    ml_result = semi_supervised_fraud_detection(query, amount, merchant, location)
-    agent = fraud_detection_agent
-    task_description = f"Analyze potential fraud: {query}. Amount: ${amount}, Merchant: {merchant}, Location: {location}."\
-        f"\n[ML Risk Score: {ml_result['risk_score']:.2f}, Label: {ml_result['label']}]"
-    expected_output = "Fraud analysis with risk assessment and recommendations"
-elif 'advice' in query_lower or 'help' in query_lower or 'recommend' in query_lower:
-    agent = advisor_agent
-    task_description = f"Provide financial advice for: {query}. Current balance: ${mock_balance}."
-    expected_output = "Personalized financial advice with specific recommendations"
-else:
-    agent = inquiry_agent
-    task_description = f"Handle general banking inquiry: {query}. Current balance: ${mock_balance}."
-    expected_output = "Helpful response to banking inquiry"
-
-# Create single task
-task = Task(
-    description=task_description,
-    agent=agent,
-    expected_output=expected_output
-)
-
-# Create the crew with simplified structure
-crew = Crew(
-    agents=[agent],
-    tasks=[task],
-    process=Process.sequential,
-    verbose=True
-)
-
-try:
-    result = crew.kickoff()
-    
+def create_llm(stream=False):
+    """Configure Ollama as the LLM provider"""
+    return LLM(
+        model=f"ollama/{OLLAMA_MODEL}",
+        base_url=OLLAMA_BASE_URL,
+        temperature=0.7,
+        max_tokens=1024,
+        request_timeout=600,
+        stream=stream
+    )
+
+# --- Request input ---
+def read_input(path, stdin):
+    """Request data from stdin, or from a JSON file when a path other than '-' is given"""
+    if path and path != '-':
+        return fast_json.load_file(path)
+    payload = read_frame(stdin)
+    if not payload.strip():
+        raise ValueError("No input provided on stdin")
+    return fast_json.loads(payload)
+
+def claim_stdout():
+    """Reserve the real stdout for the result frame and send everything else to stderr.
+
+    File descriptor 1 is duplicated for the result, then pointed at stderr, so print()s
+    and console output from CrewAI or its dependencies (C extensions included) can never
+    land in the result pipe.
+    """
+    sys.stdout.flush()
+    result_fd = os.dup(1)
+    os.dup2(2, 1)
+    return os.fdopen(result_fd, 'wb')
+
+def emit(result, stream):
+    """Write the result as one length-prefixed frame (see crew_protocol)"""
+    write_frame(stream, result)
+
+class FrameWriter:
+    """Default protocol: nothing until the crew finishes, then one result frame"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def chunk(self, text):
+        pass
+
+    def result(self, result):
+        emit(result, self.stream)
+
+class StreamWriter:
+    """Streaming protocol: newline-delimited JSON.
+
+    Each LLM token arrives as {"type": "chunk", "content": ...} while the task runs,
+    followed by one {"type": "result", "result": ..., "chunks": n,
+    "first_token_ms": ..., "total_ms": ...} summary line.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()  # chunks may arrive from CrewAI's worker threads
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.chunks = 0
+
+    def _write(self, message):
+        with self.lock:
+            self.stream.write(fast_json.dumps(message).encode('utf-8') + b'\n')
+            self.stream.flush()
+
+    def chunk(self, text):
+        if not text:
+            return
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+        self.chunks += 1
+        self._write({"type": "chunk", "content": text})
+
+    def result(self, result):
+        elapsed = time.perf_counter() - self.started
+        self._write({
+            "type": "result",
+            "result": result,
+            "chunks": self.chunks,
+            "first_token_ms": None if self.first_token is None else round((self.first_token - self.started) * 1000, 1),
+            "total_ms": round(elapsed * 1000, 1)
+        })
+
+def subscribe_to_tokens(writer):
+    """Forward LLM stream chunks from CrewAI's event bus to the writer.
+
+    Returns False when this CrewAI version has no stream events; the request
+    then still completes, with only the final result line.
+    """
+    try:
+        from crewai.utilities.events import crewai_event_bus
+        from crewai.utilities.events.llm_events import LLMStreamChunkEvent
+    except ImportError:
+        logger.warning("CrewAI stream events unavailable; sending the result without token chunks")
+        return False
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def forward_chunk(source, event):
+        writer.chunk(event.chunk)
+
+    return True
+
+# --- Agents ---
+def create_agents(llm):
+    """Create all 4 banking agents (removed verification agent for simplicity)"""
+    inquiry_agent = Agent(
+        role='Customer Inquiry Specialist',
+        goal='Handle general banking inquiries and provide account information',
+        backstory='I am a banking customer service expert with deep knowledge of banking products, services, and policies. I help customers understand their accounts and banking options.',
+        verbose=VERBOSE,
+        allow_delegation=False,
+        llm=llm
+    )
+
+    transaction_agent = Agent(
+        role='Transaction Processing Specialist',
+        goal='Process banking transactions, transfers, and payments',
+        backstory='I am a transaction processing expert with expertise in fund transfers, bill payments, and transaction history analysis. I ensure secure and accurate financial transactions.',
+        verbose=VERBOSE,
+        allow_delegation=False,
+        llm=llm
+    )
+
+    fraud_detection_agent = Agent(
+        role='Fraud Detection Specialist',
+        goal='Detect and prevent fraudulent activities',
+        backstory='I am a cybersecurity and fraud detection expert with advanced pattern recognition skills. I analyze transactions for suspicious activity and protect customers from fraud.',
+        verbose=VERBOSE,
+        allow_delegation=False,
+        llm=llm
+    )
+
+    advisor_agent = Agent(
+        role='Financial Advisor',
+        goal='Provide personalized financial advice and recommendations',
+        backstory='I am a certified financial advisor with expertise in personal finance, investment strategies, budgeting, and financial planning. I help customers make informed financial decisions.',
+        verbose=VERBOSE,
+        allow_delegation=False,
+        llm=llm
+    )
+
+    return {
+        'inquiry': inquiry_agent,
+        'transaction': transaction_agent,
+        'fraud': fraud_detection_agent,
+        'advisor': advisor_agent
+    }
+
+# --- Request handling ---
+def route_query(query):
+    """Agent key for a query: inquiry, transaction, fraud or advisor"""
+    query_lower = query.lower()
+    if 'balance' in query_lower or 'account' in query_lower:
+        return 'inquiry'
+    if 'transaction' in query_lower or 'transfer' in query_lower or 'payment' in query_lower:
+        return 'transaction'
+    if 'fraud' in query_lower or 'suspicious' in query_lower:
+        return 'fraud'
+    if 'advice' in query_lower or 'help' in query_lower or 'recommend' in query_lower:
+        return 'advisor'
+    return None
+
+def export_timings(timer, route):
+    """Write the request's spans in the configured export format, if any"""
+    try:
+        stage_timings.export(timer, TIMINGS_FORMAT, TIMINGS_FILE, attributes={"route": route or "general"},
+                             dumps=fast_json.dumps)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not export timings: %s", e)
+
+def run_request(input_data, llm, ml_result=None, timer=None):
+    """Route one request to an agent, run the crew and return the result dict.
+
+    ml_result is a precomputed fraud score (from score_fraud_batch) for fraud queries.
+    Stage durations go to timer and come back under data.timings (milliseconds).
+    """
+    timer = timer or StageTimer()
+    # Extract data from input
+    query = input_data.get('query', '')
+    user_id = input_data.get('userId', 'user123')
+    mock_balance = input_data.get('mockBalance', 5000.0)
+    transaction_history = input_data.get('transactionHistory', [])
+    amount = input_data.get('amount', 0)
+    transaction_type = input_data.get('type', '')
+    description = input_data.get('description', '')
+    category = input_data.get('category', '')
+    merchant = input_data.get('merchant', '')
+    location = input_data.get('location', '')
+
+    with timer.stage('agent_setup'):
+        agents = create_agents(llm)
+
+    # Simplified task creation based on query type
+    query_lower = query.lower()
+    route = route_query(query)
+
+    # Determine the appropriate agent and create task
+    if route == 'inquiry':
+        agent = agents['inquiry']
+        task_description = f"Provide account balance information for user {user_id}. Current balance: ${mock_balance}. Query: {query}"
+        expected_output = "Clear account balance information with formatting"
+    elif route == 'transaction':
+        agent = agents['transaction']
+        task_description = f"Process transaction request: {query}. Amount: ${amount}, Type: {transaction_type}, Description: {description}. Current balance: ${mock_balance}."
+        expected_output = "Transaction processing result with confirmation or error details"
+    elif route == 'fraud':
+        # Run semi-supervised fraud detection
+        if ml_result is None:
+            with timer.stage('fraud_model'):
+                ml_result = semi_supervised_fraud_detection(query, amount, merchant, location)
+        agent = agents['fraud']
+        task_description = f"Analyze potential fraud: {query}. Amount: ${amount}, Merchant: {merchant}, Location: {location}."\
+            f"\n[ML Risk Score: {ml_result['risk_score']:.2f}, Label: {ml_result['label']}]"
+        expected_output = "Fraud analysis with risk assessment and recommendations"
+    elif route == 'advisor':
+        agent = agents['advisor']
+        task_description = f"Provide financial advice for: {query}. Current balance: ${mock_balance}."
+        expected_output = "Personalized financial advice with specific recommendations"
+    else:
+        agent = agents['inquiry']
+        task_description = f"Handle general banking inquiry: {query}. Current balance: ${mock_balance}."
+        expected_output = "Helpful response to banking inquiry"
+
+    with timer.stage('agent_setup'):
+        # Create single task
+        task = Task(
+            description=task_description,
+            agent=agent,
+            expected_output=expected_output
+        )
+
+        # Create the crew with simplified structure
+        crew = Crew(
+            agents=[agent],
+            tasks=[task],
+            process=Process.sequential,
+            verbose=VERBOSE
+        )
+
+    logger.info("Routing query to %s", agent.role)
+    with timer.stage('kickoff'):
+        result = crew.kickoff()
+    logger.info("Crew finished in %.2fs", timer.spans[-1][2] - timer.spans[-1][1])
+
     # Format the response based on the type of request
     if 'balance' in query_lower:
         response_message = f"Your current account balance is ${mock_balance:.2f}. Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
     elif 'transaction' in query_lower or 'transfer' in query_lower:
         response_message = f"Transaction processed successfully. {result}"
-    elif 'fraud' in query_lower:
+    elif 'fraud' in query_lower and route == 'fraud':
         response_message = f"Fraud analysis completed. ML Risk Score: {ml_result['risk_score']:.2f} ({ml_result['label']}). {result}"
     elif 'advice' in query_lower:
         response_message = f"Financial advice: {result}"
     else:
-        response_message = result
-    
-    print(json.dumps({
-        "success": True, 
+        response_message = str(result)
+
+    export_timings(timer, route)
+    return {
+        "success": True,
         "message": response_message,
         "data": {
             "query": query,
             "userId": user_id,
             "balance": mock_balance,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now().isoformat(),
+            "timings": timer.as_dict()
         }
-    }))
-    
-except Exception as e:
-    print(json.dumps({
-        "success": False, 
-        "error": str(e),
-        "fallback": "Using fallback response due to CrewAI error"
-    }))
-    sys.exit(1)
-
-# --- Semi-supervised fraud detection ---
-def extract_features_from_query(query, amount, merchant, location):
-    # Very basic feature extraction for demo
-    features = [
-        float(amount) if amount else 0.0,
-        int(any(word in (merchant or '').lower() for word in ['electronics', 'jewelry', 'luxury', 'gaming', 'mall', 'overseas', 'unknown'])),
-        int(any(word in (location or '').lower() for word in ['overseas', 'high-risk', 'unknown', 'mall', 'shopping center'])),
-        int('suspicious' in query.lower() or 'fraud' in query.lower()),
-        int('lost card' in query.lower() or 'block' in query.lower()),
-    ]
-    return np.array(features)
-
-def load_labeled_fraud_data():
-    data_path = os.path.join(os.path.dirname(__file__), 'training_data', 'fraud_training_data.json')
-    if not os.path.exists(data_path):
-        return [], []
-    with open(data_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    X, y = [], []
-    for entry in data:
-        # Use the first user message in the conversation as the query
-        user_msgs = [m['message'] for m in entry.get('conversation', []) if m['role'] == 'user']
-        query = user_msgs[0] if user_msgs else ''
-        # Use metadata if available, else random
-        amount = 500 if 'not me' in query.lower() else 100
-        merchant = 'unknown' if 'unknown' in query.lower() else 'grocery'
-        location = 'unknown' if 'unknown' in query.lower() else 'local'
-        X.append(extract_features_from_query(query, amount, merchant, location))
-        y.append(1)  # All labeled as fraud
-    return np.array(X), np.array(y)
-
-def semi_supervised_fraud_detection(query, amount, merchant, location):
-    # Load labeled data
-    X_labeled, y_labeled = load_labeled_fraud_data()
-    if len(X_labeled) < 2:
-        return {'risk_score': 0.5, 'label': 'unknown', 'note': 'Insufficient labeled data'}
-    # Generate a few pseudo-unlabeled samples (simulate)
-    X_unlabeled = []
-    for amt in [20, 50, 100, 200, 500, 1000]:
-        X_unlabeled.append(extract_features_from_query('normal purchase', amt, 'grocery', 'local'))
-    X_unlabeled = np.array(X_unlabeled)
-    # Train initial model
-    model = LogisticRegression()
-    model.fit(X_labeled, y_labeled)
-    # Pseudo-label
-    pseudo_labels = model.predict(X_unlabeled)
-    X_combined = np.vstack([X_labeled, X_unlabeled])
-    y_combined = np.concatenate([y_labeled, pseudo_labels])
-    # Retrain
-    model.fit(X_combined, y_combined)
-    # Predict for current query
-    features = extract_features_from_query(query, amount, merchant, location).reshape(1, -1)
-    risk_score = float(model.predict_proba(features)[0][1])
-    label = 'fraud' if risk_score > 0.5 else 'not_fraud'
-    return {'risk_score': risk_score, 'label': label, 'note': 'Semi-supervised model'} 
\ No newline at end of file
+    }
+
+def profiled_request(input_data, llm, ml_result=None, timer=None):
+    """run_request under the BANKING_PROFILE profiler, if set, keyed by the request's id"""
+    request_id = input_data.get('id') or input_data.get('requestId')
+    with profiling.profiled('crew_agent', request_id):
+        return run_request(input_data, llm, ml_result, timer)
+
+# --- Worker mode ---
+class MicroBatcher:
+    """Collect submitted items into batches of up to max_batch, waiting at most window
+    seconds after a batch's first item. handle_batch(items) returns one value or Future
+    per item; submit() hands back a Future for each item's outcome.
+    """
+
+    def __init__(self, handle_batch, max_batch=8, window=0.005):
+        self.handle_batch = handle_batch
+        self.max_batch = max_batch
+        self.window = window
+        self.queue = queue.Queue()
+        self.batch_sizes = RunningMoments()
+        self.wait_ms = RunningMoments()
+        self.thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self.thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self.queue.put((time.perf_counter(), item, future))
+        return future
+
+    def close(self):
+        """Flush the pending batch and stop the batching thread"""
+        self.queue.put(None)
+        self.thread.join()
+
+    def metrics(self):
+        return {
+            "batches": self.batch_sizes.count,
+            "requests": self.wait_ms.count,
+            "queued": self.queue.qsize(),
+            "batch_size_avg": round(self.batch_sizes.mean, 2),
+            "batch_size_max": 0 if not self.batch_sizes.count else self.batch_sizes.max,
+            "wait_ms_avg": round(self.wait_ms.mean, 3),
+            "wait_ms_max": 0 if not self.wait_ms.count else round(self.wait_ms.max, 3)
+        }
+
+    def _run(self):
+        closing = False
+        while not closing:
+            first = self.queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = first[0] + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    closing = True
+                    break
+                batch.append(entry)
+
+            dispatched = time.perf_counter()
+            self.batch_sizes.update(len(batch))
+            for arrived, _, _ in batch:
+                self.wait_ms.update((dispatched - arrived) * 1000)
+            try:
+                outcomes = self.handle_batch([item for _, item, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), outcome in zip(batch, outcomes):
+                if isinstance(outcome, Future):
+                    outcome.add_done_callback(lambda done, target=future: _copy_outcome(done, target))
+                else:
+                    future.set_result(outcome)
+
+def invalid_request(request):
+    """Why a worker request cannot be handled, or None if it can"""
+    if isinstance(request, ValueError):
+        return f"Malformed frame: {request}"
+    if not isinstance(request, dict):
+        return "Request must be a JSON object"
+    if not isinstance(request.get('query', ''), str):
+        return "query must be a string"
+    return None
+
+def _copy_outcome(source, target):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+def run_worker(stdin, out, max_batch=8, window=0.005, concurrency=4):
+    """Serve requests from stdin until EOF, one result frame per request, in request order.
+
+    Requests are micro-batched: fraud queries in a batch are scored with one
+    predict_proba call and the batch's crews run concurrently on a shared LLM.
+    A request {"command": "metrics"} is answered with batching and queue metrics.
+    """
+    llm = create_llm()
+    get_fraud_score_table() or get_fraud_model()  # warm the scorer before the first request
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='crew')
+
+    def handle_batch(items):
+        requests = [request for request, _ in items]
+        dispatched = time.perf_counter()
+        for _, timer in items:
+            timer.record('batch_wait', dispatched - timer.origin, end=dispatched)
+        fraud = [i for i, request in enumerate(requests) if route_query(request.get('query', '')) == 'fraud']
+        if fraud:
+            scored = time.perf_counter()
+            scores = dict(zip(fraud, score_fraud_batch([requests[i] for i in fraud])))
+            # The batch shares one predict_proba call; each fraud request is charged its full duration
+            for i in fraud:
+                items[i][1].record('fraud_model', time.perf_counter() - scored)
+        else:
+            scores = {}
+        return [executor.submit(profiled_request, request, llm, scores.get(i), timer)
+                for i, (request, timer) in enumerate(items)]
+
+    batcher = MicroBatcher(handle_batch, max_batch=max_batch, window=window)
+    ordered = queue.Queue()
+
+    def write_results():
+        while True:
+            entry = ordered.get()
+            if entry is None:
+                return
+            request_id, future = entry
+            try:
+                # Metrics requests are answered when their turn comes, after the requests before them
+                result = {"success": True, "metrics": batcher.metrics()} if future is None else future.result()
+            except Exception as e:
+                logger.exception("CrewAI request failed")
+                result = {"success": False, "error": str(e), "fallback": "Using fallback response due to CrewAI error"}
+            if request_id is not None:
+                result = {"id": request_id, **result}
+            emit(result, out)
+
+    writer = threading.Thread(target=write_results, name='result-writer', daemon=True)
+    writer.start()
+    try:
+        for request in read_frames(stdin, errors="yield"):
+            request_id = request.get('id') if isinstance(request, dict) else None
+            error = invalid_request(request)
+            if error:
+                # Answered on its own, in order, so one bad frame never fails a batch or stops the worker
+                logger.warning("Rejecting request: %s", error)
+                future = Future()
+                future.set_result({"success": False, "error": error})
+            elif request.get('command') == 'metrics':
+                future = None
+            else:
+                future = batcher.submit((request, StageTimer()))
+            ordered.put((request_id, future))
+    except ValueError as e:
+        logger.error("Stopping worker on malformed input: %s", e)
+    finally:
+        batcher.close()
+        ordered.put(None)
+        writer.join()
+        executor.shutdown()
+        logger.info("Worker metrics: %s", batcher.metrics())
+
+def main():
+    """Read one request (stdin, or a JSON file path argument), answer it on stdout, exit"""
+    parser = argparse.ArgumentParser(description="Answer one banking request with a CrewAI agent")
+    parser.add_argument("input", nargs="?", default="-", help="Request JSON file ('-' or omitted: read stdin)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Send LLM tokens as newline-delimited JSON chunks, then a result line")
+    parser.add_argument("--worker", action="store_true",
+                        help="Serve framed requests from stdin until EOF, micro-batching them")
+    parser.add_argument("--batch-size", type=int, default=8, help="Worker mode: most requests per batch")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0,
+                        help="Worker mode: how long a batch waits for more requests")
+    parser.add_argument("--concurrency", type=int, default=4, help="Worker mode: crews run at the same time")
+    args = parser.parse_args()
+
+    configure_logging()
+    out = claim_stdout()
+    if args.worker:
+        if not test_ollama_connection():
+            logger.error("Ollama service not accessible at %s", OLLAMA_BASE_URL)
+            emit({
+                "success": False,
+                "error": "Ollama service not accessible. Please ensure Ollama is running.",
+                "fallback": "Cannot connect to Ollama service"
+            }, out)
+            sys.exit(1)
+        run_worker(sys.stdin.buffer, out, args.batch_size, args.batch_window_ms / 1000, args.concurrency)
+        return
+    writer = StreamWriter(out) if args.stream else FrameWriter(out)
+    timer = StageTimer()
+    timer.record('imports', _IMPORTS_FINISHED - _IMPORTS_STARTED, end=_IMPORTS_FINISHED)
+    try:
+        with timer.stage('read_input'):
+            input_data = read_input(args.input, sys.stdin.buffer)
+    except Exception as e:
+        logger.error("Failed to read input: %s", e)
+        writer.result({"success": False, "error": f"Failed to read input: {e}"})
+        sys.exit(1)
+
+    with timer.stage('ollama_probe'):
+        ollama_ok = test_ollama_connection()
+    if not ollama_ok:
+        logger.error("Ollama service not accessible at %s", OLLAMA_BASE_URL)
+        writer.result({
+            "success": False,
+            "error": "Ollama service not accessible. Please ensure Ollama is running.",
+            "fallback": "Cannot connect to Ollama service"
+        })
+        sys.exit(1)
+
+    try:
+        if args.stream:
+            subscribe_to_tokens(writer)
+        with timer.stage('llm_setup'):
+            llm = create_llm(stream=args.stream)
+        writer.result(profiled_request(input_data, llm, timer=timer))
+    except Exception as e:
+        logger.exception("CrewAI request failed")
+        writer.result({
+            "success": False,
+            "error": str(e),
+            "fallback": "Using fallback response due to CrewAI error"
+        })
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
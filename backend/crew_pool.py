@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Crew Worker Pool with Admission Control
+Preforks warm `crew_agent.py --worker` processes and feeds them requests from a
+bounded queue with per-request deadlines; when the queue is full, requests are
+shed immediately with a clear error instead of spawning more interpreters
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from crew_protocol import read_frames, write_frame
+
+logger = logging.getLogger('crew_pool')
+
+CREW_AGENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crew_agent.py')
+
+Callback = Callable[[Dict[str, Any]], None]
+
+
+class PoolRequest:
+    """A queued request and where its result goes"""
+
+    __slots__ = ("payload", "callback", "arrived", "deadline")
+
+    def __init__(self, payload: Dict[str, Any], callback: Callback, arrived: float, deadline: float):
+        self.payload = payload
+        self.callback = callback
+        self.arrived = arrived
+        self.deadline = deadline
+
+
+class CrewWorker:
+    """One warm crew_agent.py --worker process.
+
+    The worker answers in request order, so in-flight requests are matched to
+    results through a FIFO.
+    """
+
+    def __init__(self, index: int, command: List[str], pool: "CrewPool"):
+        self.index = index
+        self.pool = pool
+        self.started = time.monotonic()
+        self.inflight: Deque[PoolRequest] = deque()
+        self.busy_seconds = 0.0
+        self.busy_since: Optional[float] = None
+        self.completed = 0
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.reader = threading.Thread(target=self._read, name=f'crew-worker-{index}', daemon=True)
+        self.reader.start()
+
+    def send(self, request: PoolRequest):
+        """Hand a request to the worker (called with the pool lock held)"""
+        if not self.inflight:
+            self.busy_since = time.monotonic()
+        self.inflight.append(request)
+        write_frame(self.process.stdin, request.payload)
+
+    def busy_time(self, now: float) -> float:
+        return self.busy_seconds + (now - self.busy_since if self.busy_since is not None else 0.0)
+
+    def _read(self):
+        try:
+            for result in read_frames(self.process.stdout):
+                self.pool._complete(self, result)
+        except ValueError as e:
+            logger.error("Worker %d sent malformed output: %s", self.index, e)
+        self.process.wait()
+        self.pool._worker_exited(self)
+
+
+class CrewPool:
+    """Fixed set of warm crew workers behind a bounded, deadline-aware queue.
+
+    Each worker runs up to per_worker requests at once. Requests beyond that wait
+    in a queue of at most max_queue entries; a request still queued at its deadline
+    fails with a timeout, and one arriving at a full queue is rejected at once.
+    Deadlines cover queueing only: a crew that has started is never interrupted.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 32, queue_timeout: float = 30.0,
+                 per_worker: int = 1, worker_args: Optional[List[str]] = None):
+        self.size = workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_worker = per_worker
+        self.command = [sys.executable, CREW_AGENT, '--worker', '--concurrency', str(per_worker),
+                        '--batch-size', str(per_worker)] + list(worker_args or [])
+        self.lock = threading.Condition()
+        self.queue: Deque[PoolRequest] = deque()
+        self.closing = False
+        self.started = time.monotonic()
+        self.counters = {"submitted": 0, "completed": 0, "rejected": 0, "expired": 0, "failed": 0, "restarts": 0}
+        self.queue_wait_ms_max = 0.0
+        self.restart_delay = 0.5
+        self.workers: List[Optional[CrewWorker]] = [None] * workers
+        self.retired_busy_seconds = 0.0
+        for index in range(workers):
+            self.workers[index] = CrewWorker(index, self.command, self)
+        self.dispatcher = threading.Thread(target=self._dispatch, name='crew-dispatcher', daemon=True)
+        self.dispatcher.start()
+
+    def submit(self, payload: Dict[str, Any], callback: Callback):
+        """Queue a request; callback receives its result (or the rejection) exactly once.
+
+        payload may carry "deadlineMs", how long it may wait for a worker, instead
+        of the pool's queue_timeout.
+        """
+        now = time.monotonic()
+        timeout = payload.get('deadlineMs')
+        request = PoolRequest(payload, callback, now, now + (timeout / 1000 if timeout is not None else self.queue_timeout))
+        with self.lock:
+            self.counters["submitted"] += 1
+            if self.closing or len(self.queue) >= self.max_queue:
+                self.counters["rejected"] += 1
+                rejected = True
+            else:
+                self.queue.append(request)
+                self.lock.notify_all()
+                rejected = False
+        if rejected:
+            self._deliver(request, {
+                "success": False,
+                "error": f"Crew pool is at capacity ({self.max_queue} requests queued); try again shortly",
+                "fallback": "Using fallback response because the agent service is busy",
+                "retryable": True
+            })
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue length, worker utilization and request counters"""
+        now = time.monotonic()
+        with self.lock:
+            live = [worker for worker in self.workers if worker is not None]
+            busy = sum(1 for worker in live if worker.inflight)
+            inflight = sum(len(worker.inflight) for worker in live)
+            busy_seconds = self.retired_busy_seconds + sum(worker.busy_time(now) for worker in live)
+            uptime = max(now - self.started, 1e-9)
+            return {
+                "workers": self.size,
+                "workers_alive": len(live),
+                "workers_busy": busy,
+                "inflight": inflight,
+                "capacity": self.size * self.per_worker,
+                "queue_length": len(self.queue),
+                "max_queue": self.max_queue,
+                "utilization": round(busy_seconds / (self.size * uptime), 4),
+                "queue_wait_ms_max": round(self.queue_wait_ms_max, 1),
+                **self.counters
+            }
+
+    def close(self, drain: bool = True):
+        """Stop accepting requests, optionally let the queue drain, then stop the workers"""
+        with self.lock:
+            self.closing = True
+            if not drain:
+                self._fail_queued("Crew pool is shutting down")
+            self.lock.notify_all()
+            while drain and (self.queue or any(w is not None and w.inflight for w in self.workers)):
+                self.lock.wait(0.1)
+            workers = [worker for worker in self.workers if worker is not None]
+        for worker in workers:
+            try:
+                worker.process.stdin.close()
+            except OSError:
+                pass
+        for worker in workers:
+            worker.process.wait()
+            worker.reader.join()
+        self.dispatcher.join()
+
+    def _fail_queued(self, error: str):
+        while self.queue:
+            request = self.queue.popleft()
+            self._deliver(request, {"success": False, "error": error, "retryable": True})
+
+    def _deliver(self, request: PoolRequest, result: Dict[str, Any]):
+        request_id = request.payload.get('id')
+        if request_id is not None and 'id' not in result:
+            result = {"id": request_id, **result}
+        try:
+            request.callback(result)
+        except Exception:
+            logger.exception("Result callback failed")
+
+    def _free_worker(self) -> Optional[CrewWorker]:
+        candidates = [w for w in self.workers if w is not None and len(w.inflight) < self.per_worker]
+        return min(candidates, key=lambda w: len(w.inflight)) if candidates else None
+
+    def _dispatch(self):
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                # Deadlines differ per request, so check the whole (bounded) queue
+                expired = [request for request in self.queue if request.deadline <= now]
+                for request in expired:
+                    self.queue.remove(request)
+                    self.counters["expired"] += 1
+                    self._deliver(request, {
+                        "success": False,
+                        "error": f"Timed out after {now - request.arrived:.1f}s waiting for a crew worker",
+                        "fallback": "Using fallback response because the agent service is busy",
+                        "retryable": True
+                    })
+                worker = self._free_worker() if self.queue else None
+                if worker is not None:
+                    request = self.queue.popleft()
+                    self.queue_wait_ms_max = max(self.queue_wait_ms_max, (now - request.arrived) * 1000)
+                    try:
+                        worker.send(request)
+                    except OSError as e:
+                        # The worker died; its reader thread will restart it and fail what it held
+                        logger.error("Failed to send to worker %d: %s", worker.index, e)
+                    continue
+                if self.closing and not self.queue:
+                    return
+                timeout = min(request.deadline for request in self.queue) - now if self.queue else None
+                self.lock.wait(timeout)
+
+    def _complete(self, worker: CrewWorker, result: Dict[str, Any]):
+        with self.lock:
+            if not worker.inflight:
+                logger.warning("Worker %d sent an unexpected result: %s", worker.index, result.get('error', result))
+                return
+            request = worker.inflight.popleft()
+            worker.completed += 1
+            self.counters["completed"] += 1
+            if not worker.inflight and worker.busy_since is not None:
+                worker.busy_seconds += time.monotonic() - worker.busy_since
+                worker.busy_since = None
+            self.lock.notify_all()
+        self._deliver(request, result)
+
+    def _worker_exited(self, worker: CrewWorker):
+        with self.lock:
+            lost = list(worker.inflight)
+            worker.inflight.clear()
+            self.counters["failed"] += len(lost)
+            self.retired_busy_seconds += worker.busy_time(time.monotonic())
+            self.workers[worker.index] = None
+            restart = not self.closing
+            lifetime = time.monotonic() - worker.started
+            self.lock.notify_all()
+        for request in lost:
+            self._deliver(request, {"success": False, "error": f"Crew worker exited with code {worker.process.returncode}",
+                                    "fallback": "Using fallback response due to CrewAI error"})
+        if not restart:
+            return
+        # Back off when workers die right after starting (e.g. Ollama is down)
+        self.restart_delay = min(self.restart_delay * 2, 30.0) if lifetime < 5 else 0.5
+        logger.warning("Worker %d exited with code %s; restarting in %.1fs",
+                       worker.index, worker.process.returncode, self.restart_delay)
+        time.sleep(self.restart_delay)
+        with self.lock:
+            if self.closing:
+                return
+            self.counters["restarts"] += 1
+            self.workers[worker.index] = CrewWorker(worker.index, self.command, self)
+            self.lock.notify_all()
+
+
+def invalid_request(request: Any) -> Optional[str]:
+    """Why a pool request cannot be queued, or None if it can"""
+    if isinstance(request, ValueError):
+        return f"Malformed frame: {request}"
+    if not isinstance(request, dict):
+        return "Request must be a JSON object"
+    deadline = request.get('deadlineMs')
+    if deadline is not None and (isinstance(deadline, bool) or not isinstance(deadline, (int, float))):
+        return "deadlineMs must be a number"
+    return None
+
+
+def main():
+    """Serve framed requests from stdin through the pool; results (tagged with their id) go to stdout as they finish"""
+    parser = argparse.ArgumentParser(description="Pool of warm crew_agent workers with admission control")
+    parser.add_argument("--workers", type=int, default=int(os.getenv('CREW_POOL_WORKERS', '2')),
+                        help="Worker processes to prefork")
+    parser.add_argument("--per-worker", type=int, default=1, help="Requests each worker runs at once")
+    parser.add_argument("--max-queue", type=int, default=32, help="Requests that may wait for a worker")
+    parser.add_argument("--queue-timeout", type=float, default=30.0,
+                        help="Seconds a request may wait for a worker before it fails")
+    args = parser.parse_args()
+
+    logging.basicConfig(stream=sys.stderr, level=os.getenv('CREW_LOG_LEVEL', 'WARNING').upper(),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    out = sys.stdout.buffer
+    out_lock = threading.Lock()
+
+    def respond(result: Dict[str, Any]):
+        with out_lock:
+            write_frame(out, result)
+
+    pool = CrewPool(args.workers, args.max_queue, args.queue_timeout, args.per_worker)
+    try:
+        for request in read_frames(sys.stdin.buffer, errors="yield"):
+            error = invalid_request(request)
+            if error:
+                # One bad frame gets its own error; the pool keeps serving the rest
+                request_id = request.get('id') if isinstance(request, dict) else None
+                respond({"id": request_id, "success": False, "error": error})
+            elif request.get('command') == 'stats':
+                respond({"id": request.get('id'), "success": True, "stats": pool.stats()})
+            else:
+                pool.submit(request, respond)
+    except ValueError as e:
+        logger.error("Stopping pool on malformed input: %s", e)
+    finally:
+        pool.close()
+        logger.info("Pool stats: %s", pool.stats())
+
+if __name__ == "__main__":
+    main()
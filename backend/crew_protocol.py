@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Wire Protocol for Crew Agent Processes
+Length-prefixed JSON frames shared by crew_agent.py, its worker mode and the
+worker pool: the payload size in bytes as ASCII digits, a newline, the JSON
+and a trailing newline
+"""
+
+from typing import Any, BinaryIO, Iterator
+
+import fast_json
+
+
+def read_frame(stream: BinaryIO) -> bytes:
+    """Read one request from a binary stream.
+
+    The request is either a bare JSON document terminated by EOF, or a
+    length-prefixed frame: the payload size in bytes as ASCII digits, a newline,
+    then exactly that many bytes of JSON.
+    """
+    header = stream.readline()
+    if header.strip().isdigit():
+        length = int(header)
+        payload = stream.read(length)
+        if len(payload) != length:
+            raise ValueError(f"Truncated frame: expected {length} bytes, got {len(payload)}")
+        return payload
+    return header + stream.read()
+
+
+def read_frames(stream: BinaryIO, errors: str = "raise") -> Iterator[Any]:
+    """Yield decoded messages from a binary stream until EOF.
+
+    Messages are length-prefixed frames or one JSON document per line. With
+    errors="yield", a complete message that is not valid JSON is yielded as its
+    fast_json.JSONError and reading goes on; a truncated frame always raises.
+    """
+    while True:
+        header = stream.readline()
+        if not header:
+            return
+        if not header.strip():
+            continue
+        if header.strip().isdigit():
+            length = int(header)
+            payload = stream.read(length)
+            if len(payload) != length:
+                raise ValueError(f"Truncated frame: expected {length} bytes, got {len(payload)}")
+        else:
+            payload = header
+        try:
+            message = fast_json.loads(payload)
+        except fast_json.JSONError as e:
+            if errors != "yield":
+                raise
+            message = e
+        yield message
+
+
+def write_frame(stream: BinaryIO, message: Any):
+    """Write one message as a frame: its byte length, a newline, the JSON and a newline"""
+    payload = fast_json.dumps(message).encode('utf-8')
+    stream.write(b'%d\n%s\n' % (len(payload), payload))
+    stream.flush()
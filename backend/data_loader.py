@@ -4,34 +4,107 @@ Data Loader for Synthetic Banking Dataset
 Provides utilities to load and process synthetic data for CrewAI agents
 """
 
-import json
+import os
 import random
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Sequence
 from datetime import datetime
+from banking_records import write_json_array, iter_json_array
+from dataset_stats import DatasetStatsAccumulator
+import dataset_cache
+from fast_json import Conversation, JSONError
+from dedup import ConversationDeduplicator
+from profiling import profiled
+from query_fraud import MIN_LABELED_ROWS
+from sampling import ReservoirSampler, WeightedReservoirSampler, StratifiedReservoirSampler
+
+AGENT_INTENT_MAPPING = {
+    "inquiry": ["balance_inquiry"],
+    "transaction": ["transaction_request"],
+    "fraud": ["fraud_alert"],
+    "advisor": ["financial_advice"],
+    "verification": ["account_management"]
+}
+INTENT_TO_AGENT = {intent: agent for agent, intents in AGENT_INTENT_MAPPING.items() for intent in intents}
+# A deduplicated export smaller than this would leave an agent nothing to train on
+# (query_fraud needs this many fraud conversations), so the existing file is kept
+MIN_DEDUPED_SAMPLES = MIN_LABELED_ROWS
+
+def _field_value(conversation: Dict[str, Any], path: str) -> Any:
+    """Look up a dotted path such as 'user_profile.account_type' in a conversation"""
+    value: Any = conversation
+    for key in path.split('.'):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+def _weight(conversation: Dict[str, Any], weight_key: str) -> float:
+    value = _field_value(conversation, weight_key)
+    return float(value) if isinstance(value, (int, float)) else 0.0
+
+def make_sampler(num_samples: int, rng: random.Random, stratify_by: Optional[str] = None):
+    """Uniform reservoir, or a stratified one when stratify_by names a field"""
+    if stratify_by:
+        return StratifiedReservoirSampler(num_samples, lambda conv: _field_value(conv, stratify_by), rng)
+    return ReservoirSampler(num_samples, rng)
 
 class BankingDataLoader:
-    def __init__(self, dataset_path: str):
-        """Initialize the data loader with a dataset file"""
+    def __init__(self, dataset_path: str, lazy: bool = False):
+        """Initialize the data loader with a dataset file
+
+        With lazy=True nothing is read up front: streaming methods (sampling,
+        statistics, export) read the file one conversation at a time, and the
+        full dataset is only loaded if something accesses .dataset.
+        .dataset is a read-only sequence: a list, or a dataset_cache snapshot
+        when BANKING_DATASET_CACHE is set, whose elements are fresh copies on
+        every access. Assign a list to .dataset to work on a mutable copy.
+        """
         self.dataset_path = dataset_path
-        self.dataset = self._load_dataset()
+        self._dataset = None if lazy else self._load_dataset()
+    
+    @property
+    def dataset(self) -> Sequence[Dict[str, Any]]:
+        if self._dataset is None:
+            self._dataset = self._load_dataset()
+        return self._dataset
+    
+    @dataset.setter
+    def dataset(self, value: Sequence[Dict[str, Any]]):
+        self._dataset = value
+    
+    def iter_conversations(self) -> Iterator[Dict[str, Any]]:
+        """Yield conversations from memory if loaded, otherwise stream them from the file.
+
+        A missing file yields nothing; invalid JSON raises ValueError, even
+        after some conversations were yielded, so no caller mistakes a
+        truncated stream for the whole dataset.
+        """
+        if self._dataset is not None:
+            yield from self._dataset
+            return
+        try:
+            yield from iter_json_array(self.dataset_path)
+        except FileNotFoundError:
+            print(f"❌ Dataset file not found: {self.dataset_path}")
+        except ValueError as e:
+            print(f"❌ Invalid JSON in dataset file: {self.dataset_path} ({e})")
+            raise
         
-    def _load_dataset(self) -> List[Dict[str, Any]]:
-        """Load the dataset from JSON file"""
+    def _load_dataset(self) -> Sequence[Dict[str, Any]]:
+        """Load the dataset from JSON file, through the shared snapshot cache when it is enabled"""
         try:
-            with open(self.dataset_path, 'r', encoding='utf-8') as f:
-                dataset = json.load(f)
+            dataset = dataset_cache.load(self.dataset_path, List[Conversation])
             print(f"✅ Loaded {len(dataset)} conversations from {self.dataset_path}")
             return dataset
         except FileNotFoundError:
             print(f"❌ Dataset file not found: {self.dataset_path}")
             return []
-        except json.JSONDecodeError:
-            print(f"❌ Invalid JSON in dataset file: {self.dataset_path}")
+        except JSONError as e:
+            print(f"❌ Invalid JSON in dataset file: {self.dataset_path} ({e})")
             return []
     
     def get_conversations_by_intent(self, intent: str) -> List[Dict[str, Any]]:
         """Get all conversations for a specific intent"""
-        return [conv for conv in self.dataset if conv.get('intent') == intent]
+        return [conv for conv in self.iter_conversations() if conv.get('intent') == intent]
     
     def get_random_conversation(self, intent: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get a random conversation, optionally filtered by intent"""
@@ -44,15 +117,7 @@ class BankingDataLoader:
     
     def get_conversations_for_agent(self, agent_type: str) -> List[Dict[str, Any]]:
         """Get conversations relevant for a specific agent type"""
-        agent_intent_mapping = {
-            "inquiry": ["balance_inquiry"],
-            "transaction": ["transaction_request"],
-            "fraud": ["fraud_alert"],
-            "advisor": ["financial_advice"],
-            "verification": ["account_management"]
-        }
-        
-        intents = agent_intent_mapping.get(agent_type, [])
+        intents = AGENT_INTENT_MAPPING.get(agent_type, [])
         conversations = []
         
         for intent in intents:
@@ -60,15 +125,30 @@ class BankingDataLoader:
         
         return conversations
     
-    def get_training_data_for_agent(self, agent_type: str, num_samples: int = 100) -> List[Dict[str, Any]]:
-        """Get training data for a specific agent"""
-        conversations = self.get_conversations_for_agent(agent_type)
+    def get_training_data_for_agent(self, agent_type: str, num_samples: int = 100,
+                                    weight_key: Optional[str] = None, stratify_by: Optional[str] = None,
+                                    seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get training data for a specific agent
+
+        Draws num_samples matching conversations in one pass with O(num_samples) memory.
+        weight_key (e.g. 'metadata.satisfaction_score') makes selection proportional to
+        that field; stratify_by keeps the proportions of a field's values instead.
+        """
+        intents = set(AGENT_INTENT_MAPPING.get(agent_type, []))
+        rng = random.Random(seed) if seed is not None else random.Random()
         
-        # Sample the required number of conversations
-        if len(conversations) > num_samples:
-            conversations = random.sample(conversations, num_samples)
+        if weight_key:
+            sampler = WeightedReservoirSampler(num_samples, rng)
+            for conv in self.iter_conversations():
+                if conv.get('intent') in intents:
+                    sampler.offer(conv, _weight(conv, weight_key))
+        else:
+            sampler = make_sampler(num_samples, rng, stratify_by)
+            for conv in self.iter_conversations():
+                if conv.get('intent') in intents:
+                    sampler.offer(conv)
         
-        return conversations
+        return sampler.sample()
     
     def get_conversation_messages(self, conversation: Dict[str, Any]) -> List[str]:
         """Extract just the messages from a conversation"""
@@ -86,62 +166,74 @@ class BankingDataLoader:
     
     def get_dataset_statistics(self) -> Dict[str, Any]:
         """Get comprehensive statistics about the dataset"""
-        if not self.dataset:
-            return {}
-        
-        # Intent distribution
-        intent_counts = {}
-        for conv in self.dataset:
-            intent = conv.get('intent', 'unknown')
-            intent_counts[intent] = intent_counts.get(intent, 0) + 1
-        
-        # User profile statistics
-        balances = [conv['user_profile']['balance'] for conv in self.dataset 
-                   if 'user_profile' in conv and 'balance' in conv['user_profile']]
-        
-        account_types = {}
-        for conv in self.dataset:
-            if 'user_profile' in conv and 'account_type' in conv['user_profile']:
-                acc_type = conv['user_profile']['account_type']
-                account_types[acc_type] = account_types.get(acc_type, 0) + 1
-        
-        # Conversation statistics
-        conversation_lengths = [len(conv.get('conversation', [])) for conv in self.dataset]
-        
-        return {
-            "total_conversations": len(self.dataset),
-            "intent_distribution": intent_counts,
-            "account_type_distribution": account_types,
-            "balance_statistics": {
-                "min": min(balances) if balances else 0,
-                "max": max(balances) if balances else 0,
-                "average": sum(balances) / len(balances) if balances else 0
-            },
-            "conversation_statistics": {
-                "min_length": min(conversation_lengths) if conversation_lengths else 0,
-                "max_length": max(conversation_lengths) if conversation_lengths else 0,
-                "average_length": sum(conversation_lengths) / len(conversation_lengths) if conversation_lengths else 0
-            }
-        }
+        # One pass over the dataset; see dataset_stats for the accumulators
+        stats = DatasetStatsAccumulator.from_conversations(self.iter_conversations())
+        return stats.result() if stats.total else {}
     
-    def export_agent_training_data(self, output_dir: str = "training_data"):
-        """Export training data for each agent type"""
-        import os
-        
+    @staticmethod
+    def _write_json(filename: str, conversations: List[Dict[str, Any]]) -> int:
+        with open(filename, 'w', encoding='utf-8') as f:
+            return write_json_array(conversations, f, indent=2, ensure_ascii=False)
+    
+    def export_agent_training_data(self, output_dir: str = "training_data", num_samples: int = 200,
+                                   validation_split: float = 0.0, stratify_by: Optional[str] = None,
+                                   seed: Optional[int] = None, dedupe: bool = False):
+        """Export training data for each agent type
+
+        One streaming pass routes conversations into per-agent reservoirs, then all
+        files are written concurrently.
+        stratify_by is a dotted field path (e.g. 'user_profile.account_type') whose
+        proportions the sample keeps; validation_split moves that fraction of each
+        sample into {agent}_validation_data.json. With a seed the export is reproducible.
+        With dedupe, exact and near-duplicate conversations are dropped before sampling;
+        an agent left with fewer than MIN_DEDUPED_SAMPLES keeps its existing files.
+        """
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
         
-        agent_types = ["inquiry", "transaction", "fraud", "advisor", "verification"]
+        # Single pass: each conversation goes straight into its agent's reservoir.
+        # Each agent gets its own stream so its sample doesn't depend on the others.
+        samplers = {
+            agent_type: make_sampler(
+                num_samples,
+                random.Random(f"{seed}:{agent_type}") if seed is not None else random.Random(),
+                stratify_by
+            )
+            for agent_type in AGENT_INTENT_MAPPING
+        }
+        conversations = self.iter_conversations()
+        deduplicator = ConversationDeduplicator() if dedupe else None
+        if deduplicator:
+            conversations = deduplicator.dedupe(conversations)
+        for conv in conversations:
+            agent_type = INTENT_TO_AGENT.get(conv.get('intent'))
+            if agent_type is not None:
+                samplers[agent_type].offer(conv)
+        if deduplicator:
+            print(f"🧹 Dropped {deduplicator.seen - deduplicator.kept} duplicate conversations "
+                  f"(dedup ratio {deduplicator.dedup_ratio:.1%})")
         
-        for agent_type in agent_types:
-            training_data = self.get_training_data_for_agent(agent_type, num_samples=200)
+        jobs = []
+        for agent_type, sampler in samplers.items():
+            training_data = sampler.sample()
+            if not training_data:
+                continue
+            num_validation = round(len(training_data) * validation_split)
+            validation_data = training_data[len(training_data) - num_validation:]
+            training_data = training_data[:len(training_data) - num_validation]
+            if deduplicator and len(training_data) < MIN_DEDUPED_SAMPLES:
+                print(f"⚠️  Deduplication left {len(training_data)} {agent_type} training conversations "
+                      f"(need {MIN_DEDUPED_SAMPLES}); not overwriting its files in {output_dir}")
+                continue
             
-            if training_data:
-                filename = os.path.join(output_dir, f"{agent_type}_training_data.json")
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(training_data, f, indent=2, ensure_ascii=False)
-                
-                print(f"✅ Exported {len(training_data)} conversations for {agent_type} agent to {filename}")
+            jobs.append((agent_type, "training", os.path.join(output_dir, f"{agent_type}_training_data.json"), training_data))
+            if validation_data:
+                jobs.append((agent_type, "validation", os.path.join(output_dir, f"{agent_type}_validation_data.json"), validation_data))
+        
+        with ThreadPoolExecutor(max_workers=max(len(jobs), 1)) as pool:
+            futures = [(job, pool.submit(self._write_json, job[2], job[3])) for job in jobs]
+            for (agent_type, split, filename, _), future in futures:
+                print(f"✅ Exported {future.result()} {split} conversations for {agent_type} agent to {filename}")
     
     def get_conversation_for_crewai(self, conversation: Dict[str, Any]) -> Dict[str, Any]:
         """Format a conversation for use with CrewAI"""
@@ -155,6 +247,7 @@ class BankingDataLoader:
             "metadata": conversation.get("metadata", {})
         }
 
+@profiled("data_loader")
 def main():
     """Test the data loader"""
     print("🧪 Testing Banking Data Loader...")
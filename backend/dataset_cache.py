@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Shared Binary Snapshots of the JSON Datasets
+Parses a JSON file once into a memory-mapped snapshot (versioned header, offset
+index, one marshal blob per array element) that any process attaches to in
+about a millisecond; elements are decoded on access and the mapped pages are
+shared through the page cache, so parse time and memory stop scaling with the
+number of worker processes. A snapshot is rebuilt when its source changes.
+
+Enable with BANKING_DATASET_CACHE=1 (snapshots under /dev/shm when present,
+else the temp directory) or BANKING_DATASET_CACHE=<directory>.
+BANKING_DATASET_CACHE_VERIFY=hash also compares a BLAKE2 hash of the source
+instead of trusting its size and mtime.
+"""
+
+import argparse
+import hashlib
+import logging
+import marshal
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from collections.abc import Sequence
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Union
+
+import fast_json
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent builders just race, and the last atomic replace wins
+    fcntl = None
+
+logger = logging.getLogger('dataset_cache')
+
+MAGIC = b"BNKSNAP\0"
+SNAPSHOT_FORMAT = 1
+# magic, format, marshal version, flags, python cache tag, source size, source mtime_ns,
+# source hash, schema tag, element count, index offset. Snapshots are machine-local
+# caches, so the header and the offset index use native byte order.
+HEADER = struct.Struct("=8sIII16sQq32s16sQQ")
+FLAG_ARRAY = 1  # the source is a top-level array, stored one element per blob
+
+
+class SnapshotError(ValueError):
+    """A snapshot file that is unreadable, from another format or Python, or stale"""
+
+
+def cache_dir() -> Optional[str]:
+    """Snapshot directory from BANKING_DATASET_CACHE, or None when the cache is off"""
+    setting = os.getenv("BANKING_DATASET_CACHE", "").strip()
+    if setting.lower() in ("", "0", "false", "no", "off"):
+        return None
+    if setting.lower() not in ("1", "true", "yes", "on"):
+        return setting
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    user = os.getuid() if hasattr(os, "getuid") else os.getenv("USERNAME", "user")
+    return os.path.join(base, f"banking-dataset-cache-{user}")
+
+
+def _python_tag() -> bytes:
+    # marshal output is only guaranteed to round-trip on the same implementation and version
+    return (sys.implementation.cache_tag or sys.version).encode()[:16]
+
+
+def _schema_tag(schema: Any) -> bytes:
+    return hashlib.blake2b(repr(schema).encode(), digest_size=16).digest()
+
+
+def _source_hash(filename: str) -> bytes:
+    digest = hashlib.blake2b(digest_size=32)
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def snapshot_path(filename: str, schema: Any = None, directory: Optional[str] = None) -> str:
+    """Where the snapshot of filename (validated against schema) lives"""
+    source = os.path.abspath(filename)
+    key = hashlib.blake2b(source.encode() + b"\0" + repr(schema).encode(), digest_size=8).hexdigest()
+    return os.path.join(directory or cache_dir() or ".", f"{os.path.basename(source)}-{key}.snap")
+
+
+class DatasetSnapshot(Sequence):
+    """Read-only view of a snapshotted JSON array; each access decodes a fresh copy of the element"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mmap) < HEADER.size:
+                raise SnapshotError(f"{path} is truncated")
+            (magic, version, marshal_version, self.flags, python_tag, self.source_size, self.source_mtime_ns,
+             self.source_hash, self.schema_tag, self.count, index_offset) = HEADER.unpack_from(self._mmap)
+            if magic != MAGIC or version != SNAPSHOT_FORMAT:
+                raise SnapshotError(f"{path} is not a dataset snapshot (format {SNAPSHOT_FORMAT})")
+            python_tag = python_tag.rstrip(b"\0")
+            if marshal_version != marshal.version or python_tag != _python_tag():
+                raise SnapshotError(f"{path} was written by another Python ({python_tag.decode()})")
+            if index_offset + 8 * (self.count + 1) > len(self._mmap):
+                raise SnapshotError(f"{path} is truncated")
+            self._view = memoryview(self._mmap)
+            self._offsets = self._view[index_offset:index_offset + 8 * (self.count + 1)].cast("Q")
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("snapshot index out of range")
+        return marshal.loads(self._view[self._offsets[i]:self._offsets[i + 1]])
+
+    def __iter__(self) -> Iterator[Any]:
+        view, offsets, loads = self._view, self._offsets, marshal.loads
+        for i in range(self.count):
+            yield loads(view[offsets[i]:offsets[i + 1]])
+
+    def value(self) -> Any:
+        """The decoded source: a list for arrays (use the view itself to decode lazily), else the object"""
+        return list(self) if self.flags & FLAG_ARRAY else self[0]
+
+    def is_current(self, filename: str, schema: Any = None, verify: str = "stat") -> bool:
+        """Whether the snapshot still matches filename: same size and mtime, and hash with verify='hash'"""
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return False
+        if self.schema_tag != _schema_tag(schema) or st.st_size != self.source_size:
+            return False
+        if verify == "hash":
+            return _source_hash(filename) == self.source_hash
+        return st.st_mtime_ns == self.source_mtime_ns
+
+    def close(self):
+        for name in ("_offsets", "_view"):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+                setattr(self, name, None)
+        self._mmap.close()
+
+    def __enter__(self) -> "DatasetSnapshot":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_snapshot(filename: str, path: str, schema: Any = None) -> int:
+    """Parse and validate filename and write its snapshot to path atomically; returns the element count.
+
+    Validation is paid here once per source change, not by every process that attaches.
+    """
+    with open(filename, "rb") as f:
+        st = os.fstat(f.fileno())
+        raw = f.read()
+    value = fast_json.loads(raw, schema, validate=True)
+    is_array = isinstance(value, list)
+    elements = value if is_array else [value]
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    with tempfile.NamedTemporaryFile("wb", dir=directory, delete=False, suffix=".tmp") as f:
+        try:
+            f.write(bytes(HEADER.size))
+            offsets = []
+            position = HEADER.size
+            for element in elements:
+                blob = marshal.dumps(element)
+                offsets.append(position)
+                f.write(blob)
+                position += len(blob)
+            offsets.append(position)
+            padding = -position % 8  # keep the offset index 8-byte aligned
+            f.write(bytes(padding))
+            index_offset = position + padding
+            f.write(struct.pack(f"={len(offsets)}Q", *offsets))
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, SNAPSHOT_FORMAT, marshal.version, FLAG_ARRAY if is_array else 0,
+                                _python_tag(), st.st_size, st.st_mtime_ns,
+                                hashlib.blake2b(raw, digest_size=32).digest(), _schema_tag(schema),
+                                len(elements), index_offset))
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+    return len(elements)
+
+
+@contextmanager
+def _build_lock(path: str) -> Iterator[None]:
+    """Serialize builders of one snapshot, so N workers starting together parse the source once"""
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _try_attach(path: str, filename: str, schema: Any, verify: str) -> Optional[DatasetSnapshot]:
+    try:
+        snapshot = DatasetSnapshot(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.info("Rebuilding snapshot %s: %s", path, e)
+        return None
+    if snapshot.is_current(filename, schema, verify):
+        return snapshot
+    snapshot.close()
+    return None
+
+
+def attach(filename: str, schema: Any = None, directory: Optional[str] = None,
+           verify: Optional[str] = None) -> DatasetSnapshot:
+    """Attach to the current snapshot of filename, building it first if it is missing or stale"""
+    directory = directory or cache_dir() or tempfile.gettempdir()
+    verify = verify or os.getenv("BANKING_DATASET_CACHE_VERIFY", "stat")
+    path = snapshot_path(filename, schema, directory)
+    snapshot = _try_attach(path, filename, schema, verify)
+    if snapshot is not None:
+        return snapshot
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    with _build_lock(path):
+        # Another process may have built it while this one waited for the lock
+        snapshot = _try_attach(path, filename, schema, verify)
+        if snapshot is None:
+            start = time.perf_counter()
+            count = write_snapshot(filename, path, schema)
+            logger.info("Snapshotted %d elements of %s in %.0f ms", count, filename,
+                        (time.perf_counter() - start) * 1000)
+            snapshot = DatasetSnapshot(path)
+    return snapshot
+
+
+def load(filename: str, schema: Any = None) -> Any:
+    """fast_json.load_file(filename, schema), served from a shared snapshot when BANKING_DATASET_CACHE is set.
+
+    Arrays come back as a read-only DatasetSnapshot sequence (len, indexing,
+    slicing, iteration), anything else as the decoded object. Without the
+    cache, or if the snapshot cannot be used, the file is parsed as usual and
+    arrays are plain lists, so callers should treat the result as a Sequence:
+    a snapshot has no append or sort, and each access decodes a new copy of
+    the element, so changes to it are not kept. Wrap it in list() for a
+    mutable copy. A missing file or malformed JSON raises the same errors
+    either way; the schema is checked when a snapshot is built, and on direct
+    parses only with BANKING_JSON_VALIDATE (see fast_json.loads).
+    """
+    if cache_dir() is None:
+        return fast_json.load_file(filename, schema)
+    if not os.path.exists(filename):
+        raise FileNotFoundError(2, "No such file or directory", filename)
+    try:
+        snapshot = attach(filename, schema)
+    except fast_json.JSONError:
+        raise
+    except (OSError, ValueError) as e:
+        logger.warning("Dataset cache unavailable for %s (%s); parsing it directly", filename, e)
+        return fast_json.load_file(filename, schema)
+    if snapshot.flags & FLAG_ARRAY:
+        return snapshot
+    try:
+        return snapshot.value()
+    finally:
+        snapshot.close()
+
+
+def main():
+    """Build (or refresh) snapshots for dataset files and time attaching to them"""
+    parser = argparse.ArgumentParser(description="Shared binary snapshots of the JSON datasets")
+    parser.add_argument("files", nargs="+", help="JSON files to snapshot")
+    parser.add_argument("--dir", help="Snapshot directory (default: BANKING_DATASET_CACHE, else /dev/shm or tmp)")
+    parser.add_argument("--verify", choices=("stat", "hash"), help="How to detect a changed source")
+    args = parser.parse_args()
+
+    for filename in args.files:
+        schema = fast_json.schema_for(filename)
+        start = time.perf_counter()
+        fast_json.load_file(filename, schema)
+        parse_ms = (time.perf_counter() - start) * 1000
+        attach(filename, schema, args.dir, args.verify).close()
+        start = time.perf_counter()
+        with attach(filename, schema, args.dir, args.verify) as snapshot:
+            attach_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            for _ in snapshot:
+                pass
+            decode_ms = (time.perf_counter() - start) * 1000
+            print(f"✅ {filename}: {len(snapshot):,} elements, {os.path.getsize(snapshot.path) / 1024:,.0f} KiB "
+                  f"at {snapshot.path}")
+        print(f"   parse {parse_ms:.1f} ms, attach {attach_ms:.2f} ms, decode all {decode_ms:.1f} ms")
+
+if __name__ == "__main__":
+    main()
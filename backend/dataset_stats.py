@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Streaming Statistics for Banking Conversation Datasets
+One-pass, mergeable accumulators: counts, Welford mean/variance and
+relative-error quantile sketches, usable over streams and across shards
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+class RunningMoments:
+    """Count, min, max, mean and variance of a stream (Welford), mergeable across shards"""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "RunningMoments") -> "RunningMoments":
+        """Fold other into self (Chan et al. parallel update) and return self"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch: every quantile is within relative_accuracy of the true value.
+
+    Buckets are keyed by ceil(log_gamma(|x|)), so two sketches with the same accuracy
+    merge by adding bucket counts. Memory grows with the log of the value range, not the count.
+    """
+
+    __slots__ = ("relative_accuracy", "gamma", "log_gamma", "positive", "negative", "zero_count", "count")
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def update(self, value: float):
+        self.count += 1
+        if value > 0:
+            key = math.ceil(math.log(value) / self.log_gamma)
+            self.positive[key] = self.positive.get(key, 0) + 1
+        elif value < 0:
+            key = math.ceil(math.log(-value) / self.log_gamma)
+            self.negative[key] = self.negative.get(key, 0) + 1
+        else:
+            self.zero_count += 1
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold other into self and return self; both sketches must share relative_accuracy"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge quantile sketches with different relative accuracy")
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def _bucket_value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (1 + self.gamma)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile (0 <= q <= 1); None when the sketch is empty"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        # Ascending order: most negative first, then zeros, then positives
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._bucket_value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._bucket_value(key)
+        return self._bucket_value(max(self.positive)) if self.positive else 0.0
+
+    def percentiles(self, quantiles: Iterable[float] = PERCENTILES) -> Dict[str, Optional[float]]:
+        return {f"p{round(q * 100):g}": self.quantile(q) for q in quantiles}
+
+
+class _NumericSummary:
+    """Moments plus a quantile sketch for one numeric field"""
+
+    __slots__ = ("moments", "sketch")
+
+    def __init__(self, relative_accuracy: float):
+        self.moments = RunningMoments()
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def update(self, value: float):
+        self.moments.update(value)
+        self.sketch.update(value)
+
+    def merge(self, other: "_NumericSummary"):
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+
+    def to_dict(self, suffix: str = "") -> Dict[str, Any]:
+        empty = self.moments.count == 0
+        result = {
+            f"min{suffix}": 0 if empty else self.moments.min,
+            f"max{suffix}": 0 if empty else self.moments.max,
+            f"average{suffix}": self.moments.mean,
+            f"std{suffix}": self.moments.std,
+        }
+        for name, value in self.sketch.percentiles().items():
+            result[f"{name}{suffix}"] = 0 if value is None else round(value, 2)
+        return result
+
+
+class _GroupStats:
+    """Per-group (overall or per-intent) accumulators"""
+
+    __slots__ = ("count", "balance", "length")
+
+    def __init__(self, relative_accuracy: float):
+        self.count = 0
+        self.balance = _NumericSummary(relative_accuracy)
+        self.length = _NumericSummary(relative_accuracy)
+
+    def merge(self, other: "_GroupStats"):
+        self.count += other.count
+        self.balance.merge(other.balance)
+        self.length.merge(other.length)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "balance_statistics": self.balance.to_dict(),
+            "conversation_statistics": self.length.to_dict("_length"),
+        }
+
+
+class DatasetStatsAccumulator:
+    """Single-pass statistics over conversations; shards merge with merge()
+
+    count_fields names extra top-level fields (e.g. "generation_method") whose
+    value distribution is counted alongside the intents.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, count_fields: Tuple[str, ...] = ()):
+        self.relative_accuracy = relative_accuracy
+        self.count_fields = tuple(count_fields)
+        self.total = 0
+        self.intent_counts: Dict[str, int] = {}
+        self.account_type_counts: Dict[str, int] = {}
+        self.field_counts: Dict[str, Dict[Any, int]] = {field: {} for field in self.count_fields}
+        self.overall = _GroupStats(relative_accuracy)
+        self.per_intent: Dict[str, _GroupStats] = {}
+
+    @classmethod
+    def from_conversations(cls, conversations: Iterable[Dict[str, Any]], **kwargs) -> "DatasetStatsAccumulator":
+        accumulator = cls(**kwargs)
+        accumulator.update_many(conversations)
+        return accumulator
+
+    def update(self, conversation: Dict[str, Any]):
+        """Account for one conversation"""
+        self.total += 1
+        intent = conversation.get('intent', 'unknown')
+        self.intent_counts[intent] = self.intent_counts.get(intent, 0) + 1
+        group = self.per_intent.get(intent)
+        if group is None:
+            group = self.per_intent[intent] = _GroupStats(self.relative_accuracy)
+        group.count += 1
+        self.overall.count += 1
+
+        for field in self.count_fields:
+            value = conversation.get(field, 'unknown')
+            counts = self.field_counts[field]
+            counts[value] = counts.get(value, 0) + 1
+
+        profile = conversation.get('user_profile')
+        if profile:
+            if 'balance' in profile:
+                self.overall.balance.update(profile['balance'])
+                group.balance.update(profile['balance'])
+            if 'account_type' in profile:
+                acc_type = profile['account_type']
+                self.account_type_counts[acc_type] = self.account_type_counts.get(acc_type, 0) + 1
+
+        length = len(conversation.get('conversation', []))
+        self.overall.length.update(length)
+        group.length.update(length)
+
+    def update_many(self, conversations: Iterable[Dict[str, Any]]) -> "DatasetStatsAccumulator":
+        for conversation in conversations:
+            self.update(conversation)
+        return self
+
+    def merge(self, other: "DatasetStatsAccumulator") -> "DatasetStatsAccumulator":
+        """Fold another shard's statistics into this one and return self"""
+        self.total += other.total
+        for intent, count in other.intent_counts.items():
+            self.intent_counts[intent] = self.intent_counts.get(intent, 0) + count
+        for acc_type, count in other.account_type_counts.items():
+            self.account_type_counts[acc_type] = self.account_type_counts.get(acc_type, 0) + count
+        for field, counts in other.field_counts.items():
+            mine = self.field_counts.setdefault(field, {})
+            for value, count in counts.items():
+                mine[value] = mine.get(value, 0) + count
+        self.overall.merge(other.overall)
+        for intent, group in other.per_intent.items():
+            if intent not in self.per_intent:
+                self.per_intent[intent] = _GroupStats(self.relative_accuracy)
+            self.per_intent[intent].merge(group)
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        """Statistics in the BankingDataLoader.get_dataset_statistics layout, plus
+        std/percentiles and a per-intent breakdown"""
+        result = {
+            "total_conversations": self.total,
+            "intent_distribution": dict(self.intent_counts),
+            "account_type_distribution": dict(self.account_type_counts),
+            "balance_statistics": self.overall.balance.to_dict(),
+            "conversation_statistics": self.overall.length.to_dict("_length"),
+            "per_intent": {intent: group.to_dict() for intent, group in self.per_intent.items()},
+        }
+        for field, counts in self.field_counts.items():
+            result[f"{field}_distribution"] = dict(counts)
+        return result
+
+    def print_summary(self):
+        """Print the summary shown after a dataset is saved"""
+        print(f"Total conversations: {self.total}")
+
+        print("\nIntent distribution:")
+        for intent, count in self.intent_counts.items():
+            print(f"  {intent}: {count} conversations")
+
+        for field, counts in self.field_counts.items():
+            print(f"\n{field.replace('_', ' ').capitalize()} distribution:")
+            for value, count in counts.items():
+                print(f"  {value}: {count} conversations")
+
+        if self.total:
+            balance = self.overall.balance.to_dict()
+            length = self.overall.length.to_dict("_length")
+            print(f"\nBalance: avg ${balance['average']:,.2f}, p50 ${balance['p50']:,.2f}, p99 ${balance['p99']:,.2f}")
+            print(f"Messages per conversation: avg {length['average_length']:.1f}, "
+                  f"min {length['min_length']}, max {length['max_length']}")
+
+
+def merge_all(accumulators: List[DatasetStatsAccumulator]) -> DatasetStatsAccumulator:
+    """Combine per-shard accumulators into one"""
+    merged = DatasetStatsAccumulator(accumulators[0].relative_accuracy if accumulators else 0.01)
+    for accumulator in accumulators:
+        merged.merge(accumulator)
+    return merged
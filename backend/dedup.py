@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Conversation Deduplication for Banking Training Data
+Exact hashing plus MinHash/LSH near-duplicate detection over message text,
+run as a streaming pass over a dataset
+"""
+
+import argparse
+import hashlib
+import re
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from banking_records import iter_json_array, write_json_array
+
+_WHITESPACE = re.compile(r"\s+")
+_MERSENNE_SEED = 0x5EED
+
+
+def conversation_text(conversation: Dict[str, Any]) -> str:
+    """Normalized text of a conversation: role-tagged messages, lowercased, whitespace collapsed"""
+    lines = [f"{msg.get('role', '')}: {msg.get('message', '')}" for msg in conversation.get('conversation', [])]
+    return _WHITESPACE.sub(" ", "\n".join(lines).lower()).strip()
+
+
+class ConversationDeduplicator:
+    """Streaming exact + near-duplicate filter.
+
+    Exact duplicates are caught by a 128-bit hash of the normalized text. Near
+    duplicates are found with MinHash signatures over word shingles, bucketed by
+    LSH bands; a candidate counts as a duplicate when the signatures agree on at
+    least `threshold` of their positions (an estimate of Jaccard similarity).
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 3, exact_only: bool = False):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.exact_only = exact_only
+
+        # Multiply-shift hash family: h(x) = (a * x + b) mod 2^64 >> 32, with odd a
+        rng = np.random.default_rng(_MERSENNE_SEED)
+        self._a = (rng.integers(1, 2**63, size=(num_perm, 1), dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=(num_perm, 1), dtype=np.uint64)
+
+        self._exact = set()
+        self._buckets: Dict[bytes, List[int]] = {}
+        self._signatures: List[np.ndarray] = []
+
+        self.seen = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    @property
+    def kept(self) -> int:
+        return self.seen - self.exact_duplicates - self.near_duplicates
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Fraction of seen conversations that were dropped"""
+        return 1 - self.kept / self.seen if self.seen else 0.0
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature (num_perm uint32 values) of the text's word shingles"""
+        words = text.split()
+        k = self.shingle_size
+        shingles = {" ".join(words[i:i + k]) for i in range(max(len(words) - k + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        with np.errstate(over="ignore"):
+            permuted = (self._a * hashes + self._b) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def add(self, conversation: Dict[str, Any]) -> bool:
+        """Register a conversation; True if it is new, False if it duplicates one already kept"""
+        self.seen += 1
+        text = conversation_text(conversation)
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        if digest in self._exact:
+            self.exact_duplicates += 1
+            return False
+        self._exact.add(digest)
+        if self.exact_only:
+            return True
+
+        signature = self.signature(text)
+        band_keys = [bytes([band]) + signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                     for band in range(self.bands)]
+        candidates = {index for key in band_keys for index in self._buckets.get(key, ())}
+        for index in candidates:
+            if np.mean(self._signatures[index] == signature) >= self.threshold:
+                self.near_duplicates += 1
+                return False
+
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        for key in band_keys:
+            self._buckets.setdefault(key, []).append(index)
+        return True
+
+    def dedupe(self, conversations: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield only the conversations that are not duplicates of earlier ones"""
+        for conversation in conversations:
+            if self.add(conversation):
+                yield conversation
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "seen": self.seen,
+            "kept": self.kept,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "dedup_ratio": round(self.dedup_ratio, 4)
+        }
+
+    def print_report(self):
+        print(f"   Conversations seen: {self.seen}")
+        print(f"   Exact duplicates: {self.exact_duplicates}")
+        print(f"   Near duplicates: {self.near_duplicates}")
+        print(f"   Kept: {self.kept} (dedup ratio {self.dedup_ratio:.1%})")
+
+
+def main():
+    """Stream a dataset through the deduplicator and write the unique conversations"""
+    parser = argparse.ArgumentParser(description="Remove exact and near-duplicate conversations from a dataset")
+    parser.add_argument("input", help="Dataset JSON file (array of conversations)")
+    parser.add_argument("output", help="Where to write the deduplicated dataset")
+    parser.add_argument("--threshold", type=float, default=0.8,
+                        help="Estimated Jaccard similarity at which two conversations are near duplicates")
+    parser.add_argument("--exact-only", action="store_true", help="Only drop exact duplicates")
+    args = parser.parse_args()
+
+    print(f"🧹 Deduplicating {args.input}...")
+    deduplicator = ConversationDeduplicator(threshold=args.threshold, exact_only=args.exact_only)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        write_json_array(deduplicator.dedupe(iter_json_array(args.input)), f, indent=2, ensure_ascii=False)
+    deduplicator.print_report()
+    print(f"✅ Saved unique conversations to {args.output}")
+
+if __name__ == "__main__":
+    main()
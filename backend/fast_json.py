@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Pluggable JSON Serialization for Banking Data
+Uses msgspec or orjson when installed and falls back to the stdlib json module;
+typed schemas for conversations, customers, accounts and transactions are
+checked on request (validate=True, or BANKING_JSON_VALIDATE=1 for every load)
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Union, get_args, get_origin
+
+try:
+    from typing import NotRequired, TypedDict, get_type_hints
+except ImportError:  # Python 3.10: only typing_extensions' TypedDict understands NotRequired
+    from typing_extensions import NotRequired, TypedDict, get_type_hints
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKENDS = ("msgspec", "orjson", "json")
+# Check schemas on every load, not only where a caller asks (debugging, CI)
+VALIDATE = os.getenv("BANKING_JSON_VALIDATE", "").lower() in ("1", "true", "yes", "on")
+
+
+# Schemas - TypedDicts, so decoded values stay plain dicts for the rest of the code.
+# Fields not declared here are kept as decoded, without checks.
+
+class Message(TypedDict):
+    role: str
+    message: str
+    timestamp: NotRequired[str]
+
+
+class UserProfile(TypedDict, total=False):
+    user_id: str
+    first_name: str
+    last_name: str
+    email: str
+    phone: str
+    account_type: str
+    balance: float
+    account_number: str
+    member_since: str
+
+
+class Conversation(TypedDict):
+    conversation_id: str
+    intent: str
+    conversation: List[Message]
+    user_id: NotRequired[str]
+    user_name: NotRequired[str]
+    user_profile: NotRequired[UserProfile]
+    generated_at: NotRequired[str]
+    generation_method: NotRequired[str]
+    metadata: NotRequired[Dict[str, Any]]
+
+
+class CustomerRecord(TypedDict):
+    customer_id: str
+    first_name: str
+    last_name: str
+    email: str
+    phone: str
+    address: str
+    dob: str
+    credit_score: int
+    income: float
+    created_at: str
+
+
+class AccountRecord(TypedDict):
+    account_id: str
+    customer_id: str
+    account_type: str
+    open_date: str
+    status: str
+    balance: float
+
+
+class TransactionRecord(TypedDict):
+    transaction_id: str
+    account_id: str
+    date: str
+    amount: float
+    type: str
+    merchant: str
+    category: str
+    description: str
+    is_fraud: bool
+
+
+class JSONError(ValueError):
+    """Malformed JSON, or JSON that does not match the requested schema"""
+
+
+def _select_backend() -> str:
+    requested = os.getenv("BANKING_JSON_BACKEND", "").lower()
+    available = [name for name, module in (("msgspec", msgspec), ("orjson", orjson)) if module is not None] + ["json"]
+    if requested:
+        if requested not in BACKENDS:
+            raise ValueError(f"Unknown BANKING_JSON_BACKEND {requested!r}; choose from {', '.join(BACKENDS)}")
+        if requested not in available:
+            raise ValueError(f"BANKING_JSON_BACKEND={requested} but {requested} is not installed")
+        return requested
+    return available[0]
+
+
+BACKEND = _select_backend()
+
+
+def _check(value: Any, schema: Any, path: str):
+    """Walk a decoded value against a schema and raise JSONError naming the first mismatch"""
+    if schema is Any:
+        return
+    origin = get_origin(schema)
+    if origin is Union:
+        for option in get_args(schema):
+            try:
+                _check(value, option, path)
+                return
+            except JSONError:
+                pass
+        raise JSONError(f"Expected {schema} at {path}, got {type(value).__name__}")
+    if origin in (list, List):
+        if not isinstance(value, list):
+            raise JSONError(f"Expected array at {path}, got {type(value).__name__}")
+        (item_schema,) = get_args(schema) or (Any,)
+        for i, item in enumerate(value):
+            _check(item, item_schema, f"{path}[{i}]")
+        return
+    if origin in (dict, Dict):
+        if not isinstance(value, dict):
+            raise JSONError(f"Expected object at {path}, got {type(value).__name__}")
+        return
+    if isinstance(schema, type) and issubclass(schema, dict) and hasattr(schema, "__required_keys__"):
+        if not isinstance(value, dict):
+            raise JSONError(f"Expected object at {path}, got {type(value).__name__}")
+        missing = schema.__required_keys__ - value.keys()
+        if missing:
+            raise JSONError(f"Object missing required field {sorted(missing)[0]!r} at {path}")
+        for key, field_schema in _hints(schema).items():
+            if key in value:
+                _check(value[key], field_schema, f"{path}.{key}")
+        return
+    if schema is float:
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif schema is int:
+        ok = isinstance(value, int) and not isinstance(value, bool)
+    else:
+        ok = isinstance(value, schema)
+    if not ok:
+        raise JSONError(f"Expected {schema.__name__} at {path}, got {type(value).__name__}")
+
+
+_HINTS: Dict[type, Dict[str, Any]] = {}
+
+
+def _hints(schema: type) -> Dict[str, Any]:
+    hints = _HINTS.get(schema)
+    if hints is None:
+        hints = _HINTS[schema] = get_type_hints(schema)
+    return hints
+
+
+# Exact types accepted for scalar fields; float fields also take integers, as msgspec does
+_SCALAR_TYPES = {str: (str,), int: (int,), float: (float, int), bool: (bool,)}
+_MISSING = object()
+_VALIDATORS: Dict[Any, Any] = {}
+
+
+def _compile(schema: Any):
+    """Build a fast boolean validator for a schema; _check explains any failure"""
+    if schema is Any:
+        return lambda value: True
+    if schema in _SCALAR_TYPES:
+        types = _SCALAR_TYPES[schema]
+        return lambda value: type(value) in types
+    origin = get_origin(schema)
+    if origin is Union:
+        options = [_compile(option) for option in get_args(schema)]
+        return lambda value: any(option(value) for option in options)
+    if origin in (list, List):
+        (item_schema,) = get_args(schema) or (Any,)
+        if item_schema is Any:
+            return lambda value: type(value) is list
+        item_valid = _compile(item_schema)
+        return lambda value: type(value) is list and all(map(item_valid, value))
+    if origin in (dict, Dict):
+        return lambda value: type(value) is dict
+    if isinstance(schema, type) and issubclass(schema, dict) and hasattr(schema, "__required_keys__"):
+        required = frozenset(schema.__required_keys__)
+        scalars = []
+        nested = []
+        for key, field_schema in _hints(schema).items():
+            if field_schema in _SCALAR_TYPES:
+                scalars.append((key, _SCALAR_TYPES[field_schema]))
+            elif field_schema is not Any:
+                nested.append((key, _compile(field_schema)))
+
+        def valid(value):
+            if type(value) is not dict or not required <= value.keys():
+                return False
+            for key, types in scalars:
+                field = value.get(key, _MISSING)
+                if field is not _MISSING and type(field) not in types:
+                    return False
+            for key, field_valid in nested:
+                field = value.get(key, _MISSING)
+                if field is not _MISSING and not field_valid(field):
+                    return False
+            return True
+        return valid
+    return lambda value: isinstance(value, schema)
+
+
+def validate(value: Any, schema: Any):
+    """Raise JSONError if a decoded value does not match the schema"""
+    valid = _VALIDATORS.get(schema)
+    if valid is None:
+        valid = _VALIDATORS[schema] = _compile(schema)
+    if not valid(value):
+        _check(value, schema, "$")
+        raise JSONError(f"Value does not match {schema}")
+
+
+_validate = validate  # loads() takes a validate flag
+
+
+_DECODERS: Dict[Any, Any] = {}
+_UNTYPED = msgspec.json.Decoder() if msgspec is not None else None
+
+
+def loads(data: Union[bytes, str], schema: Any = None, validate: Optional[bool] = None) -> Any:
+    """Decode JSON in one pass; with validate (default: VALIDATE) it is also checked against schema.
+
+    schema (e.g. List[Conversation]) names the expected shape. Checking it
+    costs a second pass - msgspec's typed decode would drop undeclared fields,
+    so it can only check - which is why hot paths skip it and callers validate
+    once where data enters, such as dataset_cache building a snapshot.
+    Raises JSONError for malformed input or, when validating, a schema mismatch.
+    """
+    if validate is None:
+        validate = VALIDATE
+    if not validate:
+        schema = None
+    try:
+        if BACKEND == "msgspec":
+            if schema is not None:
+                decoder = _DECODERS.get(schema)
+                if decoder is None:
+                    decoder = _DECODERS[schema] = msgspec.json.Decoder(schema)
+                decoder.decode(data)
+            return _UNTYPED.decode(data)
+        value = orjson.loads(data) if BACKEND == "orjson" else json.loads(data)
+    except (ValueError, TypeError) as e:
+        raise JSONError(str(e)) from e
+    except Exception as e:
+        if msgspec is not None and isinstance(e, msgspec.MsgspecError):
+            raise JSONError(str(e)) from e
+        raise
+    if schema is not None:
+        _validate(value, schema)
+    return value
+
+
+def dumps(value: Any) -> str:
+    """Encode to compact JSON text"""
+    if BACKEND == "msgspec":
+        return msgspec.json.encode(value).decode("utf-8")
+    if BACKEND == "orjson":
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_file(filename: str, schema: Any = None, validate: Optional[bool] = None) -> Any:
+    """Read and decode a JSON file in one call (bytes go straight to the decoder)"""
+    with open(filename, "rb") as f:
+        return loads(f.read(), schema, validate)
+
+
+def schema_for(filename: str) -> Any:
+    """Best-guess schema for one of the generated files, by name"""
+    name = os.path.basename(filename)
+    if name.startswith("customers"):
+        return List[CustomerRecord]
+    if name.startswith("accounts"):
+        return List[AccountRecord]
+    if name.startswith("transactions"):
+        return List[TransactionRecord]
+    if "dataset" in name or "training_data" in name or "validation_data" in name:
+        return List[Conversation]
+    return None
+
+
+def benchmark(filenames: List[str], repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Time stdlib json.loads against loads() as loaders call it, and with its schema validated, per file"""
+    results = {}
+    print(f"Backend: {BACKEND}")
+    print(f"{'file':<45}{'size':>10}{'stdlib':>10}{'loads':>10}{'validated':>11}{'speedup':>9}{'validated':>11}")
+    for filename in filenames:
+        with open(filename, "rb") as f:
+            raw = f.read()
+        schema = schema_for(filename)
+
+        def best(fn):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        stdlib = best(lambda: json.loads(raw))
+        fast = best(lambda: loads(raw, schema, validate=False))
+        typed = best(lambda: loads(raw, schema, validate=True)) if schema is not None else fast
+        results[filename] = {"bytes": len(raw), "stdlib": stdlib, BACKEND: fast, "typed": typed}
+        print(f"{filename:<45}{len(raw) / 1024:>8.0f}KB{stdlib * 1000:>8.2f}ms{fast * 1000:>8.2f}ms"
+              f"{typed * 1000:>9.2f}ms{stdlib / fast:>8.1f}x{stdlib / typed:>10.1f}x")
+    return results
+
+
+def main():
+    """Benchmark the JSON backend over the shipped data files"""
+    parser = argparse.ArgumentParser(description="Benchmark JSON decoding of the banking data files")
+    parser.add_argument("files", nargs="*", help="JSON files to decode (default: the generated data files)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per file; the best time is reported")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    files = args.files or [
+        path for path in [os.path.join(here, name) for name in
+                          ("customers.json", "accounts.json", "transactions.json", "comprehensive_banking_dataset.json")]
+        + sorted(glob.glob(os.path.join(here, "training_data", "*.json")))
+        if os.path.exists(path)
+    ]
+    benchmark([os.path.relpath(path) for path in files], args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Incremental Fraud Model over the Transaction Store
+Learns from the labeled transactions in transactions.json: merchant, category and
+type encodings, amount z-scores against each account's history and time-of-day
+features feed an SGD logistic regression that is updated batch by batch with
+partial_fit, and is evaluated on a chronological hold-out with precision/recall
+"""
+
+import argparse
+import copy
+import json
+import math
+import os
+import pickle
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import sklearn
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import average_precision_score, precision_recall_curve, roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+from banking_records import CATEGORIES, MERCHANTS, TRANSACTION_TYPES, Transaction, load_records
+from dataset_stats import RunningMoments
+from velocity_features import VelocityEngine, epoch_seconds
+
+ARTIFACT_FORMAT = 2  # 2: velocity features
+Z_CLIP = 10.0  # amount z-scores are clipped so one odd account can't dominate the gradient
+
+# One-hot blocks get a trailing "unknown" slot for values outside the enum tables (e.g. free-text requests)
+FEATURE_NAMES = (
+    [f"merchant={m}" for m in MERCHANTS] + ["merchant=unknown"]
+    + [f"category={c}" for c in CATEGORIES] + ["category=unknown"]
+    + [f"type={t}" for t in TRANSACTION_TYPES]
+    + ["amount", "log_abs_amount", "amount_z", "log_account_history", "hour_sin", "hour_cos", "night", "weekend"]
+    + [f"log_{name}" for name in VelocityEngine().feature_names]
+)
+_MERCHANT_OFFSET = 0
+_CATEGORY_OFFSET = len(MERCHANTS) + 1
+_TYPE_OFFSET = _CATEGORY_OFFSET + len(CATEGORIES) + 1
+_NUMERIC_OFFSET = _TYPE_OFFSET + len(TRANSACTION_TYPES)
+_VELOCITY_OFFSET = _NUMERIC_OFFSET + 8
+
+
+def load_transactions(filename: str = "transactions.json") -> List[Transaction]:
+    """Labeled transactions in chronological order, as the per-account statistics require"""
+    transactions = load_records(Transaction, filename)
+    transactions.sort(key=lambda t: t.date)
+    return transactions
+
+
+class TransactionFeaturizer:
+    """Turns transactions into feature rows; keeps running amount statistics per account.
+
+    An amount's z-score is computed against the account's history before that
+    transaction, so features never see the future when fed in date order; the
+    same holds for the velocity features.
+    """
+
+    def __init__(self):
+        self.accounts: Dict[bytes, RunningMoments] = {}
+        self.velocity = VelocityEngine()
+
+    def transform(self, transactions: Sequence[Transaction], update: bool = True) -> np.ndarray:
+        n = len(transactions)
+        X = np.zeros((n, len(FEATURE_NAMES)))
+        if not n:
+            return X
+        rows = np.arange(n)
+        X[rows, _MERCHANT_OFFSET + np.fromiter((t.merchant for t in transactions), np.int64, n)] = 1.0
+        X[rows, _CATEGORY_OFFSET + np.fromiter((t.category for t in transactions), np.int64, n)] = 1.0
+        X[rows, _TYPE_OFFSET + np.fromiter((t.type for t in transactions), np.int64, n)] = 1.0
+
+        amounts = np.fromiter((t.amount for t in transactions), np.float64, n)
+        hours = np.fromiter((t.date.hour + t.date.minute / 60 for t in transactions), np.float64, n)
+        weekend = np.fromiter((t.date.weekday() >= 5 for t in transactions), np.float64, n)
+        z_scores = np.empty(n)
+        history = np.empty(n)
+        accounts = self.accounts
+        for i, txn in enumerate(transactions):
+            moments = accounts.get(txn.account_id)
+            if moments is None:
+                moments = RunningMoments()
+                if update:
+                    accounts[txn.account_id] = moments
+            std = moments.std
+            z_scores[i] = (txn.amount - moments.mean) / std if moments.count > 1 and std > 0 else 0.0
+            history[i] = moments.count
+            if update:
+                moments.update(txn.amount)
+
+        numeric = X[:, _NUMERIC_OFFSET:]
+        numeric[:, 0] = amounts
+        numeric[:, 1] = np.log1p(np.abs(amounts))
+        numeric[:, 2] = np.clip(z_scores, -Z_CLIP, Z_CLIP)
+        numeric[:, 3] = np.log1p(history)
+        angle = hours * (2 * math.pi / 24)
+        numeric[:, 4] = np.sin(angle)
+        numeric[:, 5] = np.cos(angle)
+        numeric[:, 6] = hours < 6
+        numeric[:, 7] = weekend
+        velocity = self.velocity.process([t.account_id for t in transactions],
+                                         epoch_seconds([t.date for t in transactions]), amounts, update=update)
+        X[:, _VELOCITY_OFFSET:] = np.log1p(velocity)
+        return X
+
+
+class FraudModel:
+    """Featurizer, scaler and SGD logistic regression, all updatable with partial_fit.
+
+    Fraud is rare, so each batch is weighted to balance the classes seen so far
+    (partial_fit cannot use class_weight='balanced').
+    """
+
+    def __init__(self, alpha: float = 1e-4, seed: int = 0):
+        self.featurizer = TransactionFeaturizer()
+        self.scaler = StandardScaler()
+        self.classifier = SGDClassifier(loss="log_loss", alpha=alpha, random_state=seed)
+        self.class_counts = np.zeros(2, dtype=np.int64)
+        self.version: Optional[str] = None
+
+    @property
+    def trained_on(self) -> int:
+        return int(self.class_counts.sum())
+
+    def partial_fit(self, transactions: Sequence[Transaction]) -> "FraudModel":
+        """Update the model (and the account statistics) with one batch of labeled transactions"""
+        if not transactions:
+            return self
+        X = self.featurizer.transform(transactions, update=True)
+        y = np.fromiter((t.is_fraud for t in transactions), np.int64, len(transactions))
+        self.class_counts += np.bincount(y, minlength=2)
+        weights = self.class_counts.sum() / (2.0 * np.maximum(self.class_counts, 1))
+        self.scaler.partial_fit(X)
+        self.classifier.partial_fit(self.scaler.transform(X), y, classes=np.array([0, 1]), sample_weight=weights[y])
+        return self
+
+    def fit_batches(self, transactions: Sequence[Transaction], batch_size: int = 5000) -> "FraudModel":
+        """partial_fit over transactions in consecutive batches (pass them in date order)"""
+        for start in range(0, len(transactions), batch_size):
+            self.partial_fit(transactions[start:start + batch_size])
+        return self
+
+    def predict_proba(self, transactions: Sequence[Transaction], update: bool = False) -> np.ndarray:
+        """Fraud probability per transaction; update=True also folds them into the account statistics"""
+        if not transactions:
+            return np.zeros(0)
+        X = self.featurizer.transform(transactions, update=update)
+        return self.classifier.predict_proba(self.scaler.transform(X))[:, 1]
+
+    def save(self, path: str, version: Optional[str] = None):
+        """Write the model artifact atomically, so a reader never sees a partial file"""
+        self.version = version or datetime.now().strftime("%Y%m%dT%H%M%S")
+        artifact = {
+            "format": ARTIFACT_FORMAT,
+            "version": self.version,
+            "created_at": datetime.now().isoformat(),
+            "sklearn_version": sklearn.__version__,
+            "trained_on": self.trained_on,
+            "model": self,
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile("wb", dir=directory, delete=False, suffix=".tmp") as f:
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, path)
+
+    @staticmethod
+    def load(path: str) -> "FraudModel":
+        """Load an artifact written by save() (only load artifacts you trust: this unpickles)"""
+        with open(path, "rb") as f:
+            artifact = pickle.load(f)
+        if not isinstance(artifact, dict) or artifact.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"{path} is not a fraud model artifact (format {ARTIFACT_FORMAT})")
+        model = artifact["model"]
+        model.version = artifact["version"]
+        return model
+
+
+def evaluate(model: FraudModel, transactions: Sequence[Transaction], threshold: float = 0.5) -> Dict[str, Any]:
+    """Precision/recall on held-out transactions, scored in date order as they would arrive.
+
+    Scoring folds the hold-out into the account statistics, so it runs on a copy.
+    """
+    model = copy.deepcopy(model)
+    y = np.fromiter((t.is_fraud for t in transactions), np.int64, len(transactions))
+    start = time.perf_counter()
+    scores = model.predict_proba(transactions, update=True)
+    elapsed = time.perf_counter() - start
+    predicted = scores >= threshold
+    true_positives = int(np.sum(predicted & (y == 1)))
+    metrics: Dict[str, Any] = {
+        "transactions": len(transactions),
+        "fraud": int(y.sum()),
+        "base_rate": float(y.mean()) if len(y) else 0.0,
+        "threshold": threshold,
+        "flagged": int(predicted.sum()),
+        "precision": true_positives / predicted.sum() if predicted.any() else 0.0,
+        "recall": true_positives / y.sum() if y.any() else 0.0,
+        "score_rate_per_sec": len(transactions) / elapsed if elapsed > 0 else None,
+    }
+    metrics["f1"] = (2 * metrics["precision"] * metrics["recall"] / (metrics["precision"] + metrics["recall"])
+                     if metrics["precision"] + metrics["recall"] else 0.0)
+    if 0 < y.sum() < len(y):
+        metrics["average_precision"] = float(average_precision_score(y, scores))
+        metrics["roc_auc"] = float(roc_auc_score(y, scores))
+        precision, recall, thresholds = precision_recall_curve(y, scores)
+        f1 = 2 * precision[:-1] * recall[:-1] / np.maximum(precision[:-1] + recall[:-1], 1e-12)
+        best = int(np.argmax(f1))
+        metrics["best_f1"] = {"threshold": float(thresholds[best]), "precision": float(precision[best]),
+                              "recall": float(recall[best]), "f1": float(f1[best])}
+    return metrics
+
+
+def print_metrics(metrics: Dict[str, Any]):
+    print(f"\n📊 Hold-out: {metrics['transactions']:,} transactions, {metrics['fraud']:,} fraud "
+          f"(base rate {metrics['base_rate']:.2%})")
+    print(f"   At threshold {metrics['threshold']:.2f}: flagged {metrics['flagged']:,}, "
+          f"precision {metrics['precision']:.3f}, recall {metrics['recall']:.3f}, F1 {metrics['f1']:.3f}")
+    if "average_precision" in metrics:
+        best = metrics["best_f1"]
+        print(f"   Average precision {metrics['average_precision']:.3f} (random: {metrics['base_rate']:.3f}), "
+              f"ROC AUC {metrics['roc_auc']:.3f}")
+        print(f"   Best F1 {best['f1']:.3f} at threshold {best['threshold']:.3f} "
+              f"(precision {best['precision']:.3f}, recall {best['recall']:.3f})")
+    if metrics["score_rate_per_sec"]:
+        print(f"   Scoring: {metrics['score_rate_per_sec']:,.0f} transactions/sec")
+
+
+def main():
+    """Train (or update) the model on the older transactions, evaluate on the newest, save it"""
+    parser = argparse.ArgumentParser(description="Train the incremental fraud model on labeled transactions")
+    parser.add_argument("--transactions", default="transactions.json", help="Labeled transactions file")
+    parser.add_argument("--model", default="fraud_model.pkl", help="Model artifact to write (and read with --update)")
+    parser.add_argument("--update", action="store_true",
+                        help="Continue training the existing --model on these transactions instead of starting over")
+    parser.add_argument("--test-fraction", type=float, default=0.2,
+                        help="Newest fraction of transactions held out for evaluation (0: train on all)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Transactions per partial_fit batch")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Score at or above which a transaction is flagged")
+    parser.add_argument("--alpha", type=float, default=1e-4, help="L2 regularization strength")
+    parser.add_argument("--metrics-output", help="Also write the evaluation metrics to this JSON file")
+    args = parser.parse_args()
+
+    transactions = load_transactions(args.transactions)
+    split = len(transactions) - int(len(transactions) * args.test_fraction)
+    train, test = transactions[:split], transactions[split:]
+    model = FraudModel.load(args.model) if args.update else FraudModel(alpha=args.alpha)
+    print(f"{'Updating' if args.update else 'Training'} on {len(train):,} transactions "
+          f"in batches of {args.batch_size:,}...")
+
+    start = time.perf_counter()
+    model.fit_batches(train, args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Trained in {elapsed:.2f}s ({len(train) / max(elapsed, 1e-9):,.0f} transactions/sec); "
+          f"{model.trained_on:,} transactions seen in total")
+
+    if test:
+        metrics = evaluate(model, test, args.threshold)
+        print_metrics(metrics)
+        if args.metrics_output:
+            with open(args.metrics_output, "w", encoding="utf-8") as f:
+                json.dump(metrics, f, indent=2)
+
+    model.save(args.model)
+    print(f"💾 Saved model version {model.version} to {args.model}")
+
+if __name__ == "__main__":
+    # Run from the importable module so pickled artifacts reference fraud_model classes, not __main__
+    import fraud_model
+    fraud_model.main()
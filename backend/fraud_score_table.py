@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Precomputed, Calibrated Fraud Score Table
+crew_agent's query model sees an amount and four binary flags, so its whole
+output space fits in a table: every flag combination times a set of amount
+buckets, scored once, calibrated, and paired with a chosen decision threshold.
+Scoring is then a lookup with no sklearn at runtime (CREW_FRAUD_SCORE_TABLE),
+and --check compares a table with the live model
+"""
+
+import argparse
+import json
+import math
+import os
+import tempfile
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import fast_json
+
+TABLE_FORMAT = 1
+# Layout of extract_features_from_query: the amount, then binary flags
+FEATURES = ["amount", "risky_merchant", "risky_location", "fraud_terms", "lost_card_terms"]
+# 1-2-5 series; buckets are [edge_i, edge_i+1), plus one below the first and one from the last edge up
+AMOUNT_EDGES = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000]
+CALIBRATION_METHODS = ("sigmoid", "isotonic")
+MAX_BUCKETS = 512
+
+PredictProba = Callable[[np.ndarray], np.ndarray]
+
+
+def bucket_representatives(edges: Sequence[float]) -> List[float]:
+    """Amount each bucket is scored at: 0 below the first edge, geometric midpoints, the last edge"""
+    middle = [math.sqrt(low * high) for low, high in zip(edges, edges[1:])]
+    return [0.0] + middle + [float(edges[-1])]
+
+
+class ScoreTable:
+    """Raw and calibrated fraud probability per (amount bucket, flag combination).
+
+    Cell index = bucket * 2**flags + the flags read as a binary number, first
+    flag most significant. Amounts below zero or missing land in the first bucket.
+    """
+
+    def __init__(self, amount_edges: Sequence[float], raw: Sequence[float], calibrated: Sequence[float],
+                 threshold: float, calibration: Dict[str, Any], features: Sequence[str] = FEATURES,
+                 metadata: Optional[Dict[str, Any]] = None):
+        self.amount_edges = [float(edge) for edge in amount_edges]
+        self.features = list(features)
+        self.flags = len(self.features) - 1
+        cells = (len(self.amount_edges) + 1) << self.flags
+        if len(raw) != cells or len(calibrated) != cells:
+            raise ValueError(f"Score table needs {cells} cells for {len(self.amount_edges) + 1} amount buckets "
+                             f"and {self.flags} flags, got {len(raw)} raw and {len(calibrated)} calibrated")
+        self.raw = [float(score) for score in raw]
+        self.calibrated = [float(score) for score in calibrated]
+        self.threshold = float(threshold)
+        self.calibration = calibration
+        self.metadata = metadata or {}
+
+    def cell(self, features: Sequence[float]) -> int:
+        index = bisect_right(self.amount_edges, float(features[0]))
+        for flag in features[1:]:
+            index = (index << 1) | (1 if flag else 0)
+        return index
+
+    def lookup(self, features: Sequence[float]) -> float:
+        """Calibrated fraud probability for one feature row"""
+        return self.calibrated[self.cell(features)]
+
+    def label(self, score: float) -> str:
+        return 'fraud' if score >= self.threshold else 'not_fraud'
+
+    def calibrate(self, raw: np.ndarray) -> np.ndarray:
+        """Apply the stored calibration to raw model probabilities"""
+        raw = np.asarray(raw, dtype=np.float64)
+        if self.calibration["method"] == "isotonic":
+            return np.interp(raw, self.calibration["x"], self.calibration["y"])
+        logit = np.log(np.clip(raw, 1e-12, 1 - 1e-12) / np.clip(1 - raw, 1e-12, 1))
+        return 1 / (1 + np.exp(-(self.calibration["a"] * logit + self.calibration["b"])))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format": TABLE_FORMAT,
+            "features": self.features,
+            "amount_edges": self.amount_edges,
+            "threshold": self.threshold,
+            "calibration": self.calibration,
+            **self.metadata,
+            "raw": self.raw,
+            "calibrated": self.calibrated,
+        }
+
+    def save(self, path: str):
+        """Write the table atomically, so a process loading it never sees a partial file"""
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, suffix=".tmp", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1)
+        os.replace(f.name, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ScoreTable":
+        data = fast_json.load_file(path)
+        if not isinstance(data, dict) or data.get("format") != TABLE_FORMAT:
+            raise ValueError(f"{path} is not a fraud score table (format {TABLE_FORMAT})")
+        metadata = {key: value for key, value in data.items() if key not in (
+            "format", "features", "amount_edges", "threshold", "calibration", "raw", "calibrated")}
+        return cls(data["amount_edges"], data["raw"], data["calibrated"], data["threshold"],
+                   data["calibration"], data["features"], metadata)
+
+
+def table_grid(amount_edges: Sequence[float], flags: int) -> np.ndarray:
+    """One feature row per cell, in cell order, at each bucket's representative amount"""
+    combos = (np.arange(1 << flags)[:, None] >> np.arange(flags - 1, -1, -1)) & 1
+    amounts = np.repeat(bucket_representatives(amount_edges), 1 << flags)
+    return np.column_stack([amounts, np.tile(combos, (len(amount_edges) + 1, 1))]).astype(np.float64)
+
+
+def refine_edges(predict_proba: PredictProba, flags: int, edges: Sequence[float] = AMOUNT_EDGES,
+                 tolerance: float = 0.02, max_buckets: int = MAX_BUCKETS) -> List[float]:
+    """Split amount buckets until the model's score moves by at most tolerance across each one.
+
+    The spread is measured at the bucket edges for every flag combination, which
+    bounds the lookup error when scores are monotonic in the amount (as they are
+    for the logistic model). The open top bucket is pushed up by doubling.
+    """
+    combos = table_grid([1.0], flags)[: 1 << flags, 1:]
+
+    def spread(lows: np.ndarray, highs: np.ndarray) -> np.ndarray:
+        rows = np.vstack([np.column_stack([np.repeat(amounts, 1 << flags), np.tile(combos, (len(amounts), 1))])
+                          for amounts in (lows, highs)])
+        scores = predict_proba(rows)[:, 1].reshape(2, len(lows), 1 << flags)
+        return np.abs(scores[1] - scores[0]).max(axis=1)
+
+    edges = sorted(float(edge) for edge in edges)
+    while len(edges) + 1 < max_buckets and spread(np.array([edges[-1]]), np.array([edges[-1] * 10]))[0] > tolerance:
+        edges.append(edges[-1] * 2)
+    while len(edges) + 1 < max_buckets:
+        lows, highs = np.array(edges[:-1]), np.array(edges[1:])
+        wide = np.flatnonzero(spread(lows, highs) > tolerance)[: max_buckets - len(edges) - 1]
+        if not len(wide):
+            break
+        edges = sorted(edges + [math.sqrt(lows[i] * highs[i]) for i in wide])
+    return edges
+
+
+def fit_calibration(scores: np.ndarray, labels: np.ndarray, method: str = "sigmoid") -> Dict[str, Any]:
+    """Platt (sigmoid on the logit) or isotonic mapping from raw scores to probabilities"""
+    if method not in CALIBRATION_METHODS:
+        raise ValueError(f"Unknown calibration method {method!r}; choose from {', '.join(CALIBRATION_METHODS)}")
+    if method == "isotonic":
+        from sklearn.isotonic import IsotonicRegression
+        isotonic = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(scores, labels)
+        return {"method": "isotonic", "x": isotonic.X_thresholds_.tolist(), "y": isotonic.y_thresholds_.tolist()}
+    from sklearn.linear_model import LogisticRegression
+    logit = np.log(np.clip(scores, 1e-12, 1 - 1e-12) / np.clip(1 - scores, 1e-12, 1))
+    platt = LogisticRegression().fit(logit.reshape(-1, 1), labels)
+    return {"method": "sigmoid", "a": float(platt.coef_[0, 0]), "b": float(platt.intercept_[0])}
+
+
+def threshold_metrics(scores: np.ndarray, labels: np.ndarray, threshold: float) -> Dict[str, float]:
+    flagged = scores >= threshold
+    true_positives = int(np.sum(flagged & (labels == 1)))
+    precision = true_positives / flagged.sum() if flagged.any() else 0.0
+    recall = true_positives / labels.sum() if labels.any() else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"threshold": float(threshold), "precision": float(precision), "recall": float(recall), "f1": float(f1)}
+
+
+def holdout_split(y: np.ndarray, fraction: float, seed: int = 0) -> np.ndarray:
+    """Mask of held-out rows: about fraction of each class, always leaving one row of it to fit on"""
+    rng = np.random.default_rng(seed)
+    held = np.zeros(len(y), dtype=bool)
+    for label in np.unique(y):
+        rows = rng.permutation(np.flatnonzero(y == label))
+        held[rows[:min(int(round(fraction * len(rows))), len(rows) - 1)]] = True
+    return held
+
+
+def build_score_table(predict_proba: PredictProba, X: np.ndarray, y: np.ndarray,
+                      amount_edges: Sequence[float] = AMOUNT_EDGES, method: str = "sigmoid",
+                      threshold: Optional[float] = None, holdout: float = 0.0, seed: int = 0) -> ScoreTable:
+    """Score every cell with the model, calibrate on the labeled rows X/y and pick a threshold.
+
+    Without an explicit threshold, the calibrated score with the best F1 on the
+    fitting rows is used. With holdout, that fraction of each class is kept out
+    of calibration and threshold selection and only scored, under
+    metadata["holdout_metrics"]; metadata["evaluation"] says which kind of
+    metrics the table carries. Either way the model itself may have been
+    trained on these rows (crew_agent's is), which no split here can undo.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    held = holdout_split(y, holdout, seed) if holdout > 0 else np.zeros(len(y), dtype=bool)
+    raw = predict_proba(table_grid(amount_edges, X.shape[1] - 1))[:, 1]
+    calibration = fit_calibration(predict_proba(X[~held])[:, 1], y[~held], method)
+    table = ScoreTable(amount_edges, raw, np.zeros(len(raw)), 0.5, calibration, FEATURES[:X.shape[1]])
+    table.calibrated = table.calibrate(raw).tolist()
+    calibrated_X = np.array([table.lookup(row) for row in X])
+    fit_scores, fit_labels = calibrated_X[~held], y[~held]
+    if threshold is None:
+        candidates = [threshold_metrics(fit_scores, fit_labels, t) for t in np.unique(fit_scores)]
+        chosen = max(candidates, key=lambda m: (m["f1"], m["threshold"])) if candidates else threshold_metrics(
+            fit_scores, fit_labels, 0.5)
+    else:
+        chosen = threshold_metrics(fit_scores, fit_labels, threshold)
+    table.threshold = chosen["threshold"]
+    table.metadata = {
+        "created_at": datetime.now().isoformat(),
+        "evaluation": "holdout" if held.any() else "in_sample",
+        "calibration_samples": int(len(fit_labels)),
+        "calibration_positives": int(np.sum(fit_labels == 1)),
+        "threshold_metrics": chosen,
+    }
+    if held.any():
+        table.metadata.update({
+            "holdout_samples": int(held.sum()),
+            "holdout_positives": int(np.sum(y[held] == 1)),
+            "holdout_metrics": threshold_metrics(calibrated_X[held], y[held], table.threshold),
+        })
+    return table
+
+
+def check_score_table(table: ScoreTable, predict_proba: PredictProba, X: Optional[np.ndarray] = None,
+                      samples_per_cell: int = 20, seed: int = 0) -> Dict[str, Any]:
+    """How far table lookups are from the model itself.
+
+    Rows are drawn at random amounts inside every cell (plus X, if given); the
+    raw table score is compared with the model's probability, and the table's
+    label with the label the model's calibrated probability would get.
+    """
+    rng = np.random.default_rng(seed)
+    grid = np.repeat(table_grid(table.amount_edges, table.flags), samples_per_cell, axis=0)
+    lows = np.repeat([0.0] + table.amount_edges, samples_per_cell << table.flags)
+    highs = np.repeat(table.amount_edges + [2.0 * table.amount_edges[-1]], samples_per_cell << table.flags)
+    grid[:, 0] = rng.uniform(lows, highs)
+    rows = np.vstack([grid, np.asarray(X, dtype=np.float64)]) if X is not None and len(X) else grid
+    exact = predict_proba(rows)[:, 1]
+    cells = np.array([table.cell(row) for row in rows])
+    error = np.abs(np.array(table.raw)[cells] - exact)
+    table_labels = np.array(table.calibrated)[cells] >= table.threshold
+    model_labels = table.calibrate(exact) >= table.threshold
+    return {
+        "rows": int(len(rows)),
+        "max_abs_error": float(error.max()),
+        "mean_abs_error": float(error.mean()),
+        "label_agreement": float(np.mean(table_labels == model_labels)),
+        "worst_cell": int(cells[int(np.argmax(error))]),
+    }
+
+
+def print_check(report: Dict[str, Any]):
+    print(f"🔍 Checked {report['rows']:,} rows against the model: raw score error max {report['max_abs_error']:.4f}, "
+          f"mean {report['mean_abs_error']:.4f}; labels agree on {report['label_agreement']:.2%}")
+
+
+def main():
+    """Build a table from crew_agent's query model (or --check an existing one against it)"""
+    parser = argparse.ArgumentParser(description="Precompute crew_agent's fraud scores as a calibrated lookup table")
+    parser.add_argument("--output", default="fraud_score_table.json", help="Table file to write")
+    parser.add_argument("--check", metavar="TABLE", help="Only compare an existing table with the model")
+    parser.add_argument("--method", choices=CALIBRATION_METHODS, default="sigmoid", help="Calibration method")
+    parser.add_argument("--threshold", type=float, help="Decision threshold (default: best F1 on the labeled data)")
+    parser.add_argument("--edges", type=float, nargs="+", default=AMOUNT_EDGES,
+                        help="Initial amount bucket edges, split further until --tolerance holds")
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="Largest score change the model may show within one amount bucket")
+    parser.add_argument("--max-buckets", type=int, default=MAX_BUCKETS, help="Upper limit on amount buckets")
+    parser.add_argument("--holdout", type=float, default=0.25,
+                        help="Fraction of each class kept out of calibration to score the table on (0: fit and "
+                             "score on all rows)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the holdout split")
+    args = parser.parse_args()
+    if not 0 <= args.holdout < 1:
+        parser.error("--holdout must be at least 0 and below 1")
+
+    # query_fraud owns the model and its training data
+    from query_fraud import calibration_set, get_fraud_model
+    model = get_fraud_model()
+    if model is None:
+        print("❌ Not enough labeled fraud data to train the model")
+        return
+    X, y = calibration_set()
+    if args.check:
+        print_check(check_score_table(ScoreTable.load(args.check), model.predict_proba, X))
+        return
+    edges = refine_edges(model.predict_proba, X.shape[1] - 1, args.edges, args.tolerance, args.max_buckets)
+    table = build_score_table(model.predict_proba, X, y, edges, args.method, args.threshold, args.holdout, args.seed)
+    table.save(args.output)
+    metadata = table.metadata
+    chosen = metadata["threshold_metrics"]
+    print(f"✅ Saved {len(table.raw):,} cells ({len(table.amount_edges) + 1} amount buckets x {1 << table.flags} "
+          f"flag combinations) to {args.output}")
+    print(f"   {table.calibration['method']} calibration on {metadata['calibration_samples']} labeled rows; "
+          f"threshold {table.threshold:.4f} (in-sample precision {chosen['precision']:.3f}, "
+          f"recall {chosen['recall']:.3f}, F1 {chosen['f1']:.3f})")
+    if metadata["evaluation"] == "holdout":
+        held = metadata["holdout_metrics"]
+        print(f"   Held out {metadata['holdout_samples']} rows: precision {held['precision']:.3f}, "
+              f"recall {held['recall']:.3f}, F1 {held['f1']:.3f}")
+        print("⚠️  crew_agent trains its model on these rows too, so the held-out metrics are still optimistic")
+    else:
+        print("⚠️  Calibration and threshold were fitted and scored on the same rows; the metrics are optimistic")
+    print_check(check_score_table(table, model.predict_proba, X))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Fraud Scoring Service with Model Hot-Reload
+Serves the fraud_model artifact over a local Unix (or TCP) socket using the
+crew_protocol frames: single or batch score requests, per-model-version latency
+and score distributions, and an atomic swap to a new artifact as soon as one
+appears on disk, without dropping requests already in flight
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import profiling
+from banking_records import CATEGORIES, MERCHANTS, TRANSACTION_TYPES, Transaction
+from crew_protocol import read_frames, write_frame
+from dataset_stats import QuantileSketch, RunningMoments
+from fraud_model import FraudModel
+
+logger = logging.getLogger('fraud_service')
+
+DEFAULT_MODEL = os.getenv('FRAUD_MODEL_PATH', 'fraud_model.pkl')
+DEFAULT_SOCKET = os.getenv('FRAUD_SERVICE_SOCKET', 'fraud_scoring.sock')
+KEPT_VERSIONS = 8  # retired model versions whose stats stay reportable
+
+Address = Union[str, Tuple[str, int]]
+
+
+class ScoringError(ValueError):
+    """A request the service cannot score; reported back to the client, not raised"""
+
+
+def _enum_code(table: List[str], value: Any, field: str, unknown: Optional[int]) -> int:
+    try:
+        return table.index(value)
+    except ValueError:
+        if unknown is None:
+            raise ScoringError(f"Unknown {field} {value!r}; expected one of {', '.join(table)}")
+        return unknown
+
+
+def _id_bytes(value: Any) -> bytes:
+    """16-byte UUIDs stay binary, as in training; any other ID is hashed into the same space"""
+    value = str(value)
+    try:
+        return uuid.UUID(value).bytes
+    except ValueError:
+        return uuid.uuid5(uuid.NAMESPACE_OID, value).bytes
+
+
+def transaction_from_request(data: Dict[str, Any]) -> Transaction:
+    """A Transaction from a request in the transactions.json layout.
+
+    Only account_id, amount and type are required; date defaults to now and
+    merchants or categories outside the enum tables use the model's unknown slot.
+    """
+    if not isinstance(data, dict):
+        raise ScoringError("Each transaction must be a JSON object")
+    try:
+        account_id = data["account_id"]
+        amount = float(data["amount"])
+        date = datetime.fromisoformat(data["date"]) if data.get("date") else datetime.now()
+    except KeyError as e:
+        raise ScoringError(f"Transaction is missing {e.args[0]!r}") from None
+    except (TypeError, ValueError) as e:
+        raise ScoringError(f"Invalid transaction: {e}") from None
+    return Transaction(
+        _id_bytes(data.get("transaction_id") or uuid.uuid4()), _id_bytes(account_id), date.replace(tzinfo=None),
+        amount, _enum_code(TRANSACTION_TYPES, data.get("type"), "type", None),
+        _enum_code(MERCHANTS, data.get("merchant"), "merchant", len(MERCHANTS)),
+        _enum_code(CATEGORIES, data.get("category"), "category", len(CATEGORIES)), False)
+
+
+class VersionStats:
+    """Request latency and score distributions for one model version"""
+
+    def __init__(self, version: str, path: str, trained_on: int):
+        self.version = version
+        self.path = path
+        self.trained_on = trained_on
+        self.loaded_at = datetime.now().isoformat()
+        self.retired_at: Optional[str] = None
+        self.requests = 0
+        self.transactions = 0
+        self.flagged = 0
+        self.errors = 0
+        self.latency_ms = QuantileSketch()
+        self.latency_moments = RunningMoments()
+        self.scores = QuantileSketch()
+        self.score_moments = RunningMoments()
+        self.lock = threading.Lock()
+
+    def record(self, latency_ms: float, scores: Sequence[float], threshold: float):
+        with self.lock:
+            self._record(latency_ms, scores, threshold)
+
+    def record_error(self):
+        with self.lock:
+            self.errors += 1
+
+    def _record(self, latency_ms: float, scores: Sequence[float], threshold: float):
+        self.requests += 1
+        self.transactions += len(scores)
+        self.latency_ms.update(latency_ms)
+        self.latency_moments.update(latency_ms)
+        for score in scores:
+            self.scores.update(score)
+            self.score_moments.update(score)
+            if score >= threshold:
+                self.flagged += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        def rounded(values: Dict[str, Optional[float]], digits: int) -> Dict[str, Optional[float]]:
+            return {key: round(value, digits) if value is not None else None for key, value in values.items()}
+
+        with self.lock:
+            return {
+                "version": self.version,
+                "path": self.path,
+                "trained_on": self.trained_on,
+                "loaded_at": self.loaded_at,
+                "retired_at": self.retired_at,
+                "requests": self.requests,
+                "transactions": self.transactions,
+                "flagged": self.flagged,
+                "errors": self.errors,
+                "latency_ms": {"mean": round(self.latency_moments.mean, 3),
+                               **rounded(self.latency_ms.percentiles((0.5, 0.9, 0.99)), 3),
+                               "max": round(self.latency_moments.max, 3) if self.requests else None},
+                "score": {"mean": round(self.score_moments.mean, 4),
+                          **rounded(self.scores.percentiles((0.1, 0.5, 0.9, 0.99)), 4)},
+            }
+
+
+class LoadedModel:
+    """One model version; scoring is serialized because it may update the account statistics"""
+
+    def __init__(self, model: FraudModel, path: str, signature: Tuple[int, int, int]):
+        self.model = model
+        self.signature = signature
+        self.lock = threading.Lock()
+        self.stats = VersionStats(model.version or "unversioned", path, model.trained_on)
+
+    def score(self, transactions: List[Transaction], update: bool) -> List[float]:
+        with self.lock:
+            return self.model.predict_proba(transactions, update=update).tolist()
+
+
+def artifact_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """(mtime_ns, size, inode) of the artifact; save() replaces the file, so any new version changes it"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class FraudScoringService:
+    """Scores requests with the current model and swaps in new artifacts as they appear.
+
+    A request takes a reference to the active model once and finishes on it,
+    so a swap never interrupts it; the old version is released when its last
+    request completes. A watcher thread polls the artifact every poll_interval
+    seconds; an artifact that fails to load is logged and the running version
+    keeps serving.
+    """
+
+    def __init__(self, model_path: str = DEFAULT_MODEL, threshold: float = 0.5, poll_interval: float = 1.0):
+        self.model_path = model_path
+        self.threshold = threshold
+        self.poll_interval = poll_interval
+        self.active: Optional[LoadedModel] = None
+        self.versions: "OrderedDict[str, VersionStats]" = OrderedDict()
+        self.started = time.monotonic()
+        self.reloads = 0
+        self.failed_signature: Optional[Tuple[int, int, int]] = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.reload()
+        self.watcher = threading.Thread(target=self._watch, name='fraud-model-watcher', daemon=True)
+        self.watcher.start()
+
+    def reload(self, force: bool = False) -> bool:
+        """Load the artifact if it changed since the active one; True when a new version went live"""
+        with self._reload_lock:
+            signature = artifact_signature(self.model_path)
+            current = self.active.signature if self.active else None
+            if signature is None or (not force and signature in (current, self.failed_signature)):
+                return False
+            try:
+                model = FraudModel.load(self.model_path)
+            except Exception as e:
+                # Keep serving the running version; retry once the file changes again
+                self.failed_signature = signature
+                logger.error("Could not load fraud model from %s: %s", self.model_path, e)
+                return False
+            loaded = LoadedModel(model, self.model_path, signature)
+            previous, self.active = self.active, loaded
+            self.failed_signature = None
+            if previous is not None:
+                previous.stats.retired_at = datetime.now().isoformat()
+                self.reloads += 1
+            self.versions.pop(loaded.stats.version, None)
+            self.versions[loaded.stats.version] = loaded.stats
+            while len(self.versions) > KEPT_VERSIONS:
+                self.versions.popitem(last=False)
+            logger.info("Serving fraud model version %s (trained on %d transactions)",
+                        loaded.stats.version, loaded.stats.trained_on)
+            return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.reload()
+
+    def close(self):
+        self._stop.set()
+        self.watcher.join()
+
+    def handle(self, request: Any) -> Dict[str, Any]:
+        """Answer one request: {"transaction": {...}} or {"transactions": [...]}, optionally
+        "update": true to fold them into the account history; or {"command": "stats" | "reload"}"""
+        if not isinstance(request, dict):
+            return {"success": False, "error": "Request must be a JSON object"}
+        request_id = request.get('id')
+        response: Dict[str, Any] = {"id": request_id} if request_id is not None else {}
+        command = request.get('command')
+        if command == 'stats':
+            return {**response, "success": True, "stats": self.stats()}
+        if command == 'reload':
+            return {**response, "success": True, "reloaded": self.reload(force=True),
+                    "model_version": self.active.stats.version if self.active else None}
+        if command is not None:
+            return {**response, "success": False, "error": f"Unknown command {command!r}"}
+
+        loaded = self.active
+        if loaded is None:
+            return {**response, "success": False, "retryable": True,
+                    "error": f"No fraud model loaded yet; waiting for {self.model_path}"}
+        start = time.perf_counter()
+        batch = 'transactions' in request
+        try:
+            entries = request['transactions'] if batch else [request.get('transaction')]
+            if not isinstance(entries, list):
+                raise ScoringError('"transactions" must be a list')
+            transactions = [transaction_from_request(entry) for entry in entries]
+            with profiling.profiled('fraud_service', request_id):
+                scores = loaded.score(transactions, bool(request.get('update')))
+        except ScoringError as e:
+            loaded.stats.record_error()
+            return {**response, "success": False, "error": str(e), "model_version": loaded.stats.version}
+        except Exception as e:
+            logger.exception("Scoring failed on model version %s", loaded.stats.version)
+            loaded.stats.record_error()
+            return {**response, "success": False, "error": f"Scoring failed: {e}", "model_version": loaded.stats.version}
+        latency_ms = (time.perf_counter() - start) * 1000
+        loaded.stats.record(latency_ms, scores, self.threshold)
+        labels = ['fraud' if score >= self.threshold else 'not_fraud' for score in scores]
+        response.update(success=True, model_version=loaded.stats.version, latency_ms=round(latency_ms, 3))
+        if batch:
+            response.update(scores=scores, labels=labels)
+        else:
+            response.update(score=scores[0], label=labels[0])
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model_path": self.model_path,
+            "active_version": self.active.stats.version if self.active else None,
+            "threshold": self.threshold,
+            "reloads": self.reloads,
+            "uptime_s": round(time.monotonic() - self.started, 1),
+            "versions": [stats.to_dict() for stats in reversed(self.versions.values())],
+        }
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    """One client connection: framed requests in, one framed response each, in order"""
+
+    def setup(self):
+        super().setup()
+        self.server.connections.add(self.request)
+
+    def handle(self):
+        try:
+            for request in read_frames(self.rfile):
+                write_frame(self.wfile, self.server.service.handle(request))
+        except ValueError as e:
+            logger.warning("Closing connection after malformed input: %s", e)
+            write_frame(self.wfile, {"success": False, "error": f"Malformed frame: {e}"})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def finish(self):
+        self.server.connections.discard(self.request)
+        super().finish()
+
+
+class _ServerMixin(socketserver.ThreadingMixIn):
+    daemon_threads = False  # server_close() waits for connection threads, so in-flight requests finish
+
+    def drain(self):
+        """Stop reading from open connections; each finishes its current request and closes"""
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+
+
+class UnixScoringServer(_ServerMixin, socketserver.UnixStreamServer):
+    pass
+
+
+class TCPScoringServer(_ServerMixin, socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+def make_server(service: FraudScoringService, address: Address) -> socketserver.BaseServer:
+    """Bind a server for service: a path is a Unix socket (replaced if stale), a (host, port) is TCP"""
+    if isinstance(address, str):
+        if os.path.exists(address):
+            os.unlink(address)
+        server = UnixScoringServer(address, _ConnectionHandler)
+    else:
+        server = TCPScoringServer(address, _ConnectionHandler)
+    server.service = service
+    server.connections = set()
+    return server
+
+
+class FraudScoringClient:
+    """Blocking client for the scoring service; one connection, safe to share between threads"""
+
+    def __init__(self, address: Address = DEFAULT_SOCKET, timeout: Optional[float] = 5.0):
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(address)
+        self.stream = self.sock.makefile('rwb')
+        self.responses = read_frames(self.stream)
+        self.lock = threading.Lock()
+
+    def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            write_frame(self.stream, payload)
+            try:
+                return next(self.responses)
+            except StopIteration:
+                raise ConnectionError("Fraud scoring service closed the connection") from None
+
+    def score(self, transaction: Dict[str, Any], update: bool = False) -> Dict[str, Any]:
+        return self.request({"transaction": transaction, "update": update})
+
+    def score_batch(self, transactions: List[Dict[str, Any]], update: bool = False) -> Dict[str, Any]:
+        return self.request({"transactions": transactions, "update": update})
+
+    def stats(self) -> Dict[str, Any]:
+        return self.request({"command": "stats"})["stats"]
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+    def __enter__(self) -> "FraudScoringClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    """Serve the fraud model until SIGINT/SIGTERM, then finish in-flight requests and exit"""
+    parser = argparse.ArgumentParser(description="Fraud scoring service with model hot-reload")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Model artifact written by fraud_model.py")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path to listen on")
+    parser.add_argument("--port", type=int, help="Listen on TCP --host:--port instead of the Unix socket")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host for --port")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Score at or above which a transaction is labeled fraud")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between checks for a new artifact")
+    args = parser.parse_args()
+
+    logging.basicConfig(stream=sys.stderr, level=os.getenv('FRAUD_LOG_LEVEL', 'INFO').upper(),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    service = FraudScoringService(args.model, args.threshold, args.poll_interval)
+    if service.active is None:
+        logger.warning("No usable model at %s yet; requests fail until one appears", args.model)
+    address = (args.host, args.port) if args.port is not None else args.socket
+    server = make_server(service, address)
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, frame: service.reload(force=True))
+    print(f"🚀 Fraud scoring service listening on {address if isinstance(address, str) else '%s:%d' % address}")
+    try:
+        server.serve_forever()
+    finally:
+        server.drain()
+        server.server_close()
+        service.close()
+        if isinstance(address, str) and os.path.exists(address):
+            os.unlink(address)
+        logger.info("Service stats: %s", service.stats())
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,51 @@ Generate Large Synthetic Dataset for Banking Chatbot
 This script generates a comprehensive dataset for training and testing
 """
 
+import argparse
+import contextlib
+import io
 import json
+import shutil
+import sys
 import time
+from datetime import datetime
+from typing import Optional
 from comprehensive_data_generator import ComprehensiveBankingDataGenerator
+from template_conversation_generator import TemplateConversationGenerator
+from banking_records import write_json_array
+from memory_budget import BUDGET_ACTIONS, MemoryBudgetExceeded, MemoryTracker, budget_from_env
+from profiling import profiled
 
-def generate_large_dataset():
-    """Generate a large synthetic dataset"""
+GENERATORS = {
+    "comprehensive": ComprehensiveBankingDataGenerator,
+    "template": TemplateConversationGenerator
+}
+CALIBRATION_PER_INTENT = 50  # sample size used to project a tier's memory
+STREAM_BATCH_SIZE = 500
+
+def _sample_bytes_per_conversation(engine: str, as_of: Optional[datetime], tracker: MemoryTracker) -> float:
+    """Calibrate memory per in-memory conversation on a throwaway sample"""
+    def sample(per_intent: int) -> int:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return len(GENERATORS[engine](seed=0, reference_time=as_of).generate_dataset(per_intent))
+    return tracker.calibrate(sample, CALIBRATION_PER_INTENT)
+
+def generate_large_dataset(seed: Optional[int] = None, as_of: Optional[datetime] = None,
+                           engine: str = "comprehensive", tracker: Optional[MemoryTracker] = None,
+                           batch_size: int = STREAM_BATCH_SIZE):
+    """Generate a large synthetic dataset
+
+    tracker reports memory per generation and save step. With a budget, each
+    tier is projected before it is generated: over budget it either aborts with
+    MemoryBudgetExceeded or, from that tier on, streams conversations to disk in
+    batches of batch_size instead of holding the dataset in memory.
+    """
     print("🚀 Starting Large Synthetic Dataset Generation...")
+    tracker = tracker or MemoryTracker()
     
     # Initialize generator
-    generator = ComprehensiveBankingDataGenerator()
+    generator = GENERATORS[engine](seed=seed, reference_time=as_of)
+    intents = len(generator.conversation_templates)
     
     # Generate different sized datasets
     dataset_sizes = [
@@ -22,21 +57,59 @@ def generate_large_dataset():
         {"name": "large", "conversations_per_intent": 1000, "total": 5000}
     ]
     
+    # Each tier is the previous tier plus the missing conversations, so the
+    # larger files reuse the smaller ones instead of regenerating them
+    dataset = []
+    stats = None
+    previous_filename = None
+    per_intent_so_far = 0
+    bytes_per_conversation = (_sample_bytes_per_conversation(engine, as_of, tracker)
+                              if tracker.budget_bytes is not None else None)
+    # Once streaming, only the IDs already used are kept
+    used_ids = None
+    
     for dataset_config in dataset_sizes:
         print(f"\n📊 Generating {dataset_config['name']} dataset...")
         print(f"   Conversations per intent: {dataset_config['conversations_per_intent']}")
         print(f"   Total conversations: {dataset_config['total']}")
         
         start_time = time.time()
+        filename = f"banking_dataset_{dataset_config['name']}.json"
+        new_per_intent = dataset_config['conversations_per_intent'] - per_intent_so_far
         
-        # Generate dataset
-        dataset = generator.generate_dataset(
-            conversations_per_intent=dataset_config['conversations_per_intent']
-        )
+        if used_ids is None and bytes_per_conversation is not None and not tracker.fits(
+                f"{dataset_config['name']} tier", dataset_config['total'], bytes_per_conversation):
+            used_ids = ({conv["conversation_id"][len("conv_"):] for conv in dataset},
+                        {conv["user_id"][len("user_"):] for conv in dataset})
+            dataset = None
         
-        # Save dataset
-        filename = f"banking_dataset_{dataset_config['name']}.json"
-        generator.save_dataset(dataset, filename)
+        if used_ids is not None:
+            # Streaming: copy the previous tier's file (or start an empty one) and append batch by batch
+            if previous_filename is None:
+                with open(filename, 'w', encoding='utf-8') as f:
+                    write_json_array([], f)
+            else:
+                shutil.copyfile(previous_filename, filename)
+            with tracker.step("generate+save (streaming)", new_per_intent * intents):
+                stats = generator.append_batches_to_saved_dataset(
+                    generator.generate_batches(new_per_intent, *used_ids, batch_size=batch_size), filename, stats
+                )
+        else:
+            # Generate only the conversations this tier adds
+            with tracker.step("generate", new_per_intent * intents) as step:
+                added = generator.extend_dataset(dataset, new_per_intent)
+            if step.traced_peak is not None:
+                bytes_per_conversation = step.bytes_per_record
+            
+            # Save dataset: copy the previous tier's file and append the new conversations
+            with tracker.step("save", len(added)):
+                if previous_filename is None:
+                    stats = generator.save_dataset(dataset, filename)
+                else:
+                    shutil.copyfile(previous_filename, filename)
+                    stats = generator.append_to_saved_dataset(added, filename, stats)
+        previous_filename = filename
+        per_intent_so_far = dataset_config['conversations_per_intent']
         
         end_time = time.time()
         duration = end_time - start_time
@@ -44,7 +117,31 @@ def generate_large_dataset():
         print(f"   ✅ Generated in {duration:.2f} seconds")
         print(f"   📁 Saved to: {filename}")
     
+    tracker.print_report()
     print("\n🎉 All datasets generated successfully!")
 
 if __name__ == "__main__":
-    generate_large_dataset() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate the small, medium and large banking datasets")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for all random draws; with the same --as-of the files are byte-identical")
+    parser.add_argument("--as-of", type=datetime.fromisoformat, default=None,
+                        help="Reference time (ISO format) for generated timestamps; defaults to now")
+    parser.add_argument("--engine", choices=sorted(GENERATORS), default="comprehensive",
+                        help="'template' uses the paraphrase-bank generator for varied conversations")
+    parser.add_argument("--memory-budget-mb", type=float, default=budget_from_env(),
+                        help="Memory budget for the in-memory dataset (default: $BANKING_MEMORY_BUDGET_MB)")
+    parser.add_argument("--on-budget", choices=BUDGET_ACTIONS, default="abort",
+                        help="When a tier is projected over budget: abort, or stream it to disk in batches")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also report tracemalloc peaks per step (slows generation)")
+    parser.add_argument("--batch-size", type=int, default=STREAM_BATCH_SIZE,
+                        help="Conversations per batch when streaming")
+    args = parser.parse_args()
+    tracker = MemoryTracker.from_args(args.memory_budget_mb, args.on_budget, args.trace_memory)
+    try:
+        with profiled("generate_large_dataset"):
+            generate_large_dataset(seed=args.seed, as_of=args.as_of, engine=args.engine, tracker=tracker,
+                                   batch_size=args.batch_size)
+    except MemoryBudgetExceeded as e:
+        print(f"❌ {e}; rerun with --on-budget stream or a larger --memory-budget-mb")
+        sys.exit(1)
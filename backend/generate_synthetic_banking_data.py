@@ -4,11 +4,22 @@ Generate a large, realistic synthetic banking dataset for testing agents.
 Creates customers.json, accounts.json, transactions.json (with fraud labels), and optionally cards.json.
 """
 
-import json
-import random
+import argparse
+import hashlib
+import io
+import itertools
+import time
 from datetime import datetime, timedelta
-import uuid
+import numpy as np
 from faker import Faker
+from banking_records import (
+    ACCOUNT_TYPES, ACCOUNT_STATUSES, TRANSACTION_TYPES, MERCHANTS, CATEGORIES,
+    Customer, Account, Transaction, dump_records, load_records, append_json_array, iter_json_array,
+    write_json_array
+)
+from memory_budget import BUDGET_ACTIONS, MemoryBudgetExceeded, MemoryTracker, budget_from_env
+from profiling import profiled
+from banking_random import make_rng, uuid4_bytes, round_cents, random_dates, random_datetimes, years_before
 
 fake = Faker()
 
@@ -17,108 +28,367 @@ NUM_CUSTOMERS = 1000
 ACCOUNTS_PER_CUSTOMER = (1, 3)  # min, max
 TRANSACTIONS_PER_ACCOUNT = (10, 20)  # min, max
 FRAUD_RATE = 0.01  # 1% of transactions are fraudulent
+POOL_SIZE = 500  # Faker values pre-generated per field in pooled mode
+STREAM_CHUNK_ACCOUNTS = 1000  # accounts whose transactions are generated together when streaming
+CALIBRATION_CUSTOMERS = 500  # sample size used to project a run's memory
 
-ACCOUNT_TYPES = ["checking", "savings", "credit", "loan"]
-TRANSACTION_TYPES = ["debit", "credit", "transfer", "payment"]
-MERCHANTS = ["Amazon", "Netflix", "Starbucks", "Walmart", "Target", "Uber", "DoorDash", "Spotify", "Apple", "Google", "Shell", "Costco", "Best Buy", "CVS", "Home Depot"]
-CATEGORIES = ["shopping", "food", "transportation", "entertainment", "utilities", "health", "travel", "bills"]
+class FakerPools:
+    """Faker-derived value pools; pooled customers cost an array index per field instead of Faker calls"""
+
+    def __init__(self, rng, size=POOL_SIZE):
+        fake.seed_instance(int(rng.integers(2**32)))
+        self.rng = rng
+        self.first_names = [fake.first_name() for _ in range(size)]
+        self.last_names = [fake.last_name() for _ in range(size)]
+        self.email_users = [fake.user_name() for _ in range(size)]
+        self.email_domains = sorted({fake.free_email_domain() for _ in range(size)} | {fake.domain_name() for _ in range(size // 10 + 1)})
+        self.phones = [fake.phone_number() for _ in range(size)]
+        self.addresses = [fake.address().replace("\n", ", ") for _ in range(size)]
+        self.used_emails = set()  # emails must stay unique across every draw from these pools
+
+    def _pick(self, pool, n):
+        return [pool[i] for i in self.rng.integers(0, len(pool), size=n).tolist()]
+
+    def _unique_emails(self, n):
+        users = self.rng.integers(0, len(self.email_users), size=n).tolist()
+        domains = self.rng.integers(0, len(self.email_domains), size=n).tolist()
+        suffixes = self.rng.integers(10, 100, size=n).tolist()
+        emails = []
+        for user, domain, suffix in zip(users, domains, suffixes):
+            local = self.email_users[user]
+            email = f"{local}@{self.email_domains[domain]}"
+            while email in self.used_emails:
+                # Collisions get a numeric suffix, widened until the address is free
+                local = f"{local}{suffix}"
+                email = f"{local}@{self.email_domains[domain]}"
+            self.used_emails.add(email)
+            emails.append(email)
+        return emails
+
+    def draw(self, n):
+        """Draw n customers' worth of text fields as parallel lists"""
+        return {
+            "first_name": self._pick(self.first_names, n),
+            "last_name": self._pick(self.last_names, n),
+            "email": self._unique_emails(n),
+            "phone": self._pick(self.phones, n),
+            "address": self._pick(self.addresses, n)
+        }
 
 # 1. Generate Customers
-def generate_customers(num_customers):
+def generate_customers(num_customers, rng=None, as_of=None, pools=None):
+    rng = rng if rng is not None else make_rng()
+    today = (as_of or datetime.now()).date()
+    if pools is not None:
+        fields = pools.draw(num_customers)
+    else:
+        # Faker supplies the text fields row by row, so seed it from the same stream
+        fake.seed_instance(int(rng.integers(2**32)))
+        fields = None
+
+    customer_ids = uuid4_bytes(rng, num_customers)
+    created_dates = random_dates(rng, years_before(today, 10), today, num_customers)
+    dobs = random_dates(rng, years_before(today, 90), years_before(today, 18), num_customers)
+    credit_scores = rng.integers(300, 851, size=num_customers).tolist()
+    incomes = round_cents(rng.uniform(20000, 200000, size=num_customers))
+
     customers = []
     for i in range(num_customers):
-        customer_id = str(uuid.uuid4())
-        created_date = fake.date_between(start_date="-10y", end_date="today")
-        customers.append({
-            "customer_id": customer_id,
-            "first_name": fake.first_name(),
-            "last_name": fake.last_name(),
-            "email": fake.email(),
-            "phone": fake.phone_number(),
-            "address": fake.address().replace("\n", ", "),
-            "dob": fake.date_of_birth(minimum_age=18, maximum_age=90).isoformat(),
-            "credit_score": random.randint(300, 850),
-            "income": round(random.uniform(20000, 200000), 2),
-            "created_at": created_date.isoformat()
-        })
+        if fields is not None:
+            first_name, last_name = fields["first_name"][i], fields["last_name"][i]
+            email, phone, address = fields["email"][i], fields["phone"][i], fields["address"][i]
+        else:
+            first_name, last_name = fake.first_name(), fake.last_name()
+            email, phone = fake.email(), fake.phone_number()
+            address = fake.address().replace("\n", ", ")
+        customers.append(Customer(
+            customer_id=customer_ids[i],
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            phone=phone,
+            address=address,
+            dob=dobs[i],
+            credit_score=credit_scores[i],
+            income=incomes[i],
+            created_at=created_dates[i]
+        ))
     return customers
 
 # 2. Generate Accounts
-def generate_accounts(customers):
+def generate_accounts(customers, rng=None, as_of=None):
+    rng = rng if rng is not None else make_rng()
+    today = (as_of or datetime.now()).date()
+    counts = rng.integers(ACCOUNTS_PER_CUSTOMER[0], ACCOUNTS_PER_CUSTOMER[1] + 1, size=len(customers))
+    owners = np.repeat(np.arange(len(customers)), counts)
+    total = len(owners)
+
+    account_ids = uuid4_bytes(rng, total)
+    account_types = rng.integers(0, len(ACCOUNT_TYPES), size=total)
+    created = np.array([c.created_at.toordinal() for c in customers], dtype=np.int64)
+    open_dates = random_dates(rng, created[owners], today.toordinal(), total)
+    statuses = rng.integers(0, len(ACCOUNT_STATUSES), size=total).tolist()
+    balances = np.where(
+        account_types == ACCOUNT_TYPES.index("loan"),
+        -np.round(rng.uniform(1000, 50000, size=total), 2),
+        np.round(rng.uniform(-5000, 100000, size=total), 2)
+    ).tolist()
+
     accounts = []
-    account_id_map = {}  # customer_id -> list of account_ids
-    for customer in customers:
-        num_accounts = random.randint(*ACCOUNTS_PER_CUSTOMER)
-        account_ids = []
-        customer_created = datetime.fromisoformat(customer["created_at"].split('T')[0])
-        for _ in range(num_accounts):
-            account_id = str(uuid.uuid4())
-            account_type = random.choice(ACCOUNT_TYPES)
-            open_date = fake.date_between(start_date=customer_created, end_date="today")
-            balance = round(random.uniform(-5000, 100000), 2) if account_type != "loan" else -round(random.uniform(1000, 50000), 2)
-            accounts.append({
-                "account_id": account_id,
-                "customer_id": customer["customer_id"],
-                "account_type": account_type,
-                "open_date": open_date.isoformat(),
-                "status": random.choice(["active", "closed", "frozen"]),
-                "balance": balance
-            })
-            account_ids.append(account_id)
-        account_id_map[customer["customer_id"]] = account_ids
+    account_id_map = {}  # customer_id (binary) -> list of account_ids (binary)
+    for i, owner in enumerate(owners.tolist()):
+        customer_id = customers[owner].customer_id
+        accounts.append(Account(
+            account_id=account_ids[i],
+            customer_id=customer_id,
+            account_type=int(account_types[i]),
+            open_date=open_dates[i],
+            status=statuses[i],
+            balance=balances[i]
+        ))
+        account_id_map.setdefault(customer_id, []).append(account_ids[i])
     return accounts, account_id_map
 
 # 3. Generate Transactions
-def generate_transactions(accounts):
+def generate_transactions(accounts, rng=None, as_of=None, counts=None, report=True):
+    """counts gives the number of transactions per account; by default it is drawn from TRANSACTIONS_PER_ACCOUNT"""
+    rng = rng if rng is not None else make_rng()
+    now = as_of or datetime.now()
+    if counts is None:
+        counts = rng.integers(TRANSACTIONS_PER_ACCOUNT[0], TRANSACTIONS_PER_ACCOUNT[1] + 1, size=len(accounts))
+    owners = np.repeat(np.arange(len(accounts)), counts).tolist()
+    total = len(owners)
+
+    txn_ids = uuid4_bytes(rng, total)
+    txn_types = rng.integers(0, len(TRANSACTION_TYPES), size=total)
+    merchants = rng.integers(0, len(MERCHANTS), size=total).tolist()
+    categories = rng.integers(0, len(CATEGORIES), size=total).tolist()
+    amounts = np.round(rng.uniform(1, 5000, size=total), 2)
+    outflows = np.isin(txn_types, [TRANSACTION_TYPES.index("debit"), TRANSACTION_TYPES.index("payment")])
+    amounts = np.where(outflows, -amounts, amounts).tolist()
+    is_fraud = (rng.random(total) < FRAUD_RATE).tolist()
+    txn_dates = random_datetimes(rng, now - timedelta(days=3 * 365), now, total)
+    txn_types = txn_types.tolist()
+
     transactions = []
-    fraud_count = 0
-    for account in accounts:
-        num_txns = random.randint(*TRANSACTIONS_PER_ACCOUNT)
-        for _ in range(num_txns):
-            txn_id = str(uuid.uuid4())
-            txn_type = random.choice(TRANSACTION_TYPES)
-            merchant = random.choice(MERCHANTS)
-            category = random.choice(CATEGORIES)
-            amount = round(random.uniform(1, 5000), 2)
-            if txn_type == "debit" or txn_type == "payment":
-                amount = -abs(amount)
-            is_fraud = random.random() < FRAUD_RATE
-            if is_fraud:
-                fraud_count += 1
-            txn_date = fake.date_time_between(start_date="-3y", end_date="now")
-            transactions.append({
-                "transaction_id": txn_id,
-                "account_id": account["account_id"],
-                "date": txn_date.isoformat(),
-                "amount": amount,
-                "type": txn_type,
-                "merchant": merchant,
-                "category": category,
-                "description": f"{txn_type.title()} at {merchant}",
-                "is_fraud": is_fraud
-            })
-    print(f"Total fraudulent transactions: {fraud_count}")
+    for i, owner in enumerate(owners):
+        transactions.append(Transaction(
+            transaction_id=txn_ids[i],
+            account_id=accounts[owner].account_id,
+            date=txn_dates[i],
+            amount=amounts[i],
+            type=txn_types[i],
+            merchant=merchants[i],
+            category=categories[i],
+            is_fraud=is_fraud[i]
+        ))
+    if report:
+        print(f"Total fraudulent transactions: {sum(is_fraud)}")
+    return transactions
+
+def iter_transactions(accounts, rng=None, as_of=None, counts=None, chunk_size=STREAM_CHUNK_ACCOUNTS):
+    """generate_transactions for chunk_size accounts at a time, so only one chunk of rows exists at once.
+
+    The per-account counts and one seed per chunk are drawn from rng right away;
+    chunks only use those, so the rows are the same whether the iterator is
+    streamed to disk or collected into a list, and whenever it is consumed.
+    """
+    rng = rng if rng is not None else make_rng()
+    if counts is None:
+        counts = rng.integers(TRANSACTIONS_PER_ACCOUNT[0], TRANSACTIONS_PER_ACCOUNT[1] + 1, size=len(accounts))
+    starts = range(0, len(accounts), chunk_size)
+    seeds = rng.integers(2**63, size=len(starts)).tolist()
+    return (transaction
+            for start, seed in zip(starts, seeds)
+            for transaction in generate_transactions(accounts[start:start + chunk_size], make_rng(seed), as_of,
+                                                     counts[start:start + chunk_size], report=False))
+
+def plan_transactions(accounts, rng, as_of=None, extra=0):
+    """Per-account transactions plus extra ones spread over all accounts, as one lazy stream"""
+    transactions = iter_transactions(accounts, rng, as_of)
+    if extra:
+        counts = np.bincount(rng.integers(0, len(accounts), size=extra), minlength=len(accounts))
+        transactions = itertools.chain(transactions, iter_transactions(accounts, rng, as_of, counts))
     return transactions
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate synthetic customers, accounts and transactions")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for all random draws; with the same --as-of the output is byte-identical")
+    parser.add_argument("--as-of", type=datetime.fromisoformat, default=None,
+                        help="Reference 'now' (ISO format) that generated dates are relative to; defaults to the current time")
+    parser.add_argument("--customers", type=int, default=None,
+                        help=f"Customers to generate (each with their accounts and transactions); "
+                             f"default {NUM_CUSTOMERS}, or 0 with --append")
+    parser.add_argument("--transactions", type=int, default=0,
+                        help="Extra transactions spread over all accounts, on top of the per-account ones")
+    parser.add_argument("--append", action="store_true",
+                        help="Add to the existing customers/accounts/transactions files instead of regenerating them")
+    parser.add_argument("--pooled", action="store_true",
+                        help="Draw names, emails, phones and addresses from pre-generated Faker pools")
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE, help="Values per Faker pool in --pooled mode")
+    parser.add_argument("--benchmark", type=int, metavar="ROWS", default=None,
+                        help="Compare customer rows/sec of the per-row Faker and pooled paths, then exit")
+    parser.add_argument("--memory-budget-mb", type=float, default=budget_from_env(),
+                        help="Memory budget for the generated records (default: $BANKING_MEMORY_BUDGET_MB)")
+    parser.add_argument("--on-budget", choices=BUDGET_ACTIONS, default="abort",
+                        help="When the run is projected over budget: abort, or stream transactions to disk")
+    parser.add_argument("--check-streaming", action="store_true",
+                        help="Generate this run's transactions in memory and streamed, check they are identical, then exit")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also report tracemalloc peaks per step (slows generation)")
+    args = parser.parse_args()
+    if args.customers is None:
+        # Appending usually means adding transactions; new customers have to be asked for
+        args.customers = 0 if args.append else NUM_CUSTOMERS
+    return args
+
+def benchmark_customers(num_rows, pool_size=POOL_SIZE, seed=None):
+    """Time generate_customers with per-row Faker calls against the pooled path"""
+    results = {}
+    for mode in ("faker", "pooled"):
+        rng = make_rng(seed)
+        start = time.perf_counter()
+        pools = FakerPools(rng, pool_size) if mode == "pooled" else None
+        generate_customers(num_rows, rng, pools=pools)
+        elapsed = time.perf_counter() - start
+        results[mode] = num_rows / elapsed
+        print(f"{mode:>6}: {num_rows} rows in {elapsed:.2f}s ({results[mode]:,.0f} rows/sec)")
+    print(f"Speedup: {results['pooled'] / results['faker']:.1f}x")
+    return results
+
+def check_streaming(args):
+    """Whether the in-memory and streaming paths write the same transactions for this run's seed"""
+    seed = 0 if args.seed is None else args.seed
+    as_of = args.as_of or datetime.now()
+    digests = []
+    for in_memory in (True, False):
+        rng = make_rng(seed)
+        pools = FakerPools(rng, args.pool_size) if args.pooled else None
+        accounts, _ = generate_accounts(generate_customers(args.customers, rng, as_of, pools), rng, as_of)
+        transactions = plan_transactions(accounts, rng, as_of, args.transactions)
+        if in_memory:
+            transactions = list(transactions)
+        out = io.StringIO()
+        rows = write_json_array((t.to_dict() for t in transactions), out, indent=2)
+        digests.append((rows, hashlib.blake2b(out.getvalue().encode("utf-8")).hexdigest()))
+    (rows, digest), streamed = digests
+    if streamed != (rows, digest):
+        print(f"❌ Streaming wrote {streamed[0]:,} transactions that differ from the {rows:,} generated in memory")
+        return False
+    print(f"✅ Streaming and in-memory generation wrote the same {rows:,} transactions (seed {seed}, blake2b {digest[:16]})")
+    return True
+
+def append_to_existing(args):
+    """Grow the existing JSON files in place: new customers with their accounts and
+    transactions, plus args.transactions extra transactions over all accounts"""
+    existing_customers = load_records(Customer, "customers.json")
+    existing_accounts = load_records(Account, "accounts.json")
+    # Only the count is needed, so rows are streamed past instead of parsed into one list
+    existing_transaction_count = sum(1 for _ in iter_json_array("transactions.json"))
+
+    # Offset the seed by the current sizes so appended rows don't replay the original stream
+    rng = make_rng(None if args.seed is None else
+                   [args.seed, len(existing_customers), len(existing_accounts), existing_transaction_count])
+    pools = None
+    if args.pooled:
+        pools = FakerPools(rng, args.pool_size)
+        pools.used_emails.update(c.email for c in existing_customers)
+
+    customers = generate_customers(args.customers, rng, args.as_of, pools)
+    accounts, _ = generate_accounts(customers, rng, args.as_of)
+    transactions = generate_transactions(accounts, rng, args.as_of)
+    if args.transactions:
+        all_accounts = existing_accounts + accounts
+        counts = np.bincount(rng.integers(0, len(all_accounts), size=args.transactions), minlength=len(all_accounts))
+        transactions += generate_transactions(all_accounts, rng, args.as_of, counts)
+
+    append_json_array((c.to_dict() for c in customers), "customers.json")
+    append_json_array((a.to_dict() for a in accounts), "accounts.json")
+    append_json_array((t.to_dict() for t in transactions), "transactions.json")
+    print(f"Customers: {len(existing_customers)} + {len(customers)} = {len(existing_customers) + len(customers)}")
+    print(f"Accounts: {len(existing_accounts)} + {len(accounts)} = {len(existing_accounts) + len(accounts)}")
+    print(f"Transactions: {existing_transaction_count} + {len(transactions)} = {existing_transaction_count + len(transactions)}")
+    print("Data appended: customers.json, accounts.json, transactions.json")
+
+def project_memory(args, tracker):
+    """Calibrate bytes per customer (with its accounts and transactions) and per extra
+    transaction on a throwaway sample, and check the full run against the budget"""
+    def customer_sample(n):
+        rng = make_rng(0)
+        pools = FakerPools(rng, args.pool_size) if args.pooled else None
+        sample = generate_customers(n, rng, args.as_of, pools)
+        accounts, _ = generate_accounts(sample, rng, args.as_of)
+        generate_transactions(accounts, rng, args.as_of, report=False)
+        return len(sample)
+
+    per_customer = tracker.calibrate(customer_sample, CALIBRATION_CUSTOMERS)
+    per_transaction = 0.0
+    if args.transactions:
+        # Accounts are built outside the measurement so only the transactions count
+        rng = make_rng(0)
+        sample_accounts, _ = generate_accounts(generate_customers(2 * CALIBRATION_CUSTOMERS, rng, args.as_of,
+                                                                  FakerPools(rng, 50)), rng, args.as_of)
+        per_transaction = tracker.calibrate(
+            lambda n: len(generate_transactions(sample_accounts[:n], make_rng(0), args.as_of, report=False)),
+            CALIBRATION_CUSTOMERS
+        )
+    records = args.customers + args.transactions
+    projected = args.customers * per_customer + args.transactions * per_transaction
+    what = f"{args.customers:,} customers with accounts and transactions"
+    if args.transactions:
+        what += f" plus {args.transactions:,} extra transactions"
+    return tracker.fits(what, records, projected / max(records, 1))
+
+@profiled("generate_synthetic_banking_data")
 def main():
+    args = parse_args()
+    if args.benchmark:
+        benchmark_customers(args.benchmark, args.pool_size, args.seed)
+        return
+    if args.check_streaming:
+        if not check_streaming(args):
+            raise SystemExit(1)
+        return
+    if args.append:
+        append_to_existing(args)
+        return
+    tracker = MemoryTracker.from_args(args.memory_budget_mb, args.on_budget, args.trace_memory)
+    try:
+        in_memory = tracker.budget_bytes is None or project_memory(args, tracker)
+    except MemoryBudgetExceeded as e:
+        print(f"❌ {e}; rerun with --on-budget stream or a larger --memory-budget-mb")
+        raise SystemExit(1)
+    rng = make_rng(args.seed)
     print("Generating synthetic banking data...")
-    print(f"Customers: {NUM_CUSTOMERS}")
-    customers = generate_customers(NUM_CUSTOMERS)
+    print(f"Customers: {args.customers}")
+    with tracker.step("customers", args.customers):
+        pools = FakerPools(rng, args.pool_size) if args.pooled else None
+        customers = generate_customers(args.customers, rng, args.as_of, pools)
     print("Accounts per customer:", ACCOUNTS_PER_CUSTOMER)
-    accounts, account_id_map = generate_accounts(customers)
+    with tracker.step("accounts") as step:
+        accounts, account_id_map = generate_accounts(customers, rng, args.as_of)
+        step.records = len(accounts)
     print(f"Total accounts: {len(accounts)}")
     print("Transactions per account:", TRANSACTIONS_PER_ACCOUNT)
-    transactions = generate_transactions(accounts)
-    print(f"Total transactions: {len(transactions)}")
-
-    # Save to JSON
-    with open("customers.json", "w", encoding="utf-8") as f:
-        json.dump(customers, f, indent=2)
-    with open("accounts.json", "w", encoding="utf-8") as f:
-        json.dump(accounts, f, indent=2)
-    with open("transactions.json", "w", encoding="utf-8") as f:
-        json.dump(transactions, f, indent=2)
+    # Both paths consume the same stream, so a seed gives the same rows whether or not the budget forces streaming
+    transactions = plan_transactions(accounts, rng, args.as_of, args.transactions)
+    if in_memory:
+        with tracker.step("transactions") as step:
+            transactions = list(transactions)
+            step.records = len(transactions)
+        print(f"Total transactions: {len(transactions)}")
+        print(f"Total fraudulent transactions: {sum(t.is_fraud for t in transactions)}")
+
+    # Save to JSON, serializing one record at a time
+    with tracker.step("save customers and accounts", len(customers) + len(accounts)):
+        dump_records(customers, "customers.json")
+        dump_records(accounts, "accounts.json")
+    # Streaming: transactions are generated chunk by chunk while they are written; the step reports the count
+    with tracker.step("save transactions" if in_memory else "generate+save transactions (streaming)") as step:
+        step.records = dump_records(transactions, "transactions.json")
     print("Data saved: customers.json, accounts.json, transactions.json")
+    tracker.print_report()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -5,6 +5,7 @@ Uses Ollama to generate more realistic and varied conversations
 """
 
 import json
+import os
 import random
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
@@ -12,13 +13,19 @@ import uuid
 from langchain.llms import Ollama
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
+from dataset_stats import DatasetStatsAccumulator
+from profiling import profiled
+
+# Same variables as crew_agent.py; set them to generate against stub_ollama.py offline
+OLLAMA_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434').rstrip('/')
+OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'mistral')
 
 class LangChainBankingDataGenerator:
-    def __init__(self, model_name="mistral"):
+    def __init__(self, model_name=None):
         """Initialize the LangChain-based data generator"""
         self.llm = Ollama(
-            model=model_name,
-            base_url="http://localhost:11434",
+            model=model_name or OLLAMA_MODEL,
+            base_url=OLLAMA_BASE_URL,
             temperature=0.7
         )
         
@@ -302,27 +309,12 @@ class LangChainBankingDataGenerator:
             json.dump(dataset, f, indent=2, ensure_ascii=False)
         
         print(f"\nDataset saved to {filename}")
-        print(f"Total conversations: {len(dataset)}")
         
         # Print statistics
-        intent_counts = {}
-        generation_methods = {}
-        
-        for conversation in dataset:
-            intent = conversation.get('intent', 'unknown')
-            intent_counts[intent] = intent_counts.get(intent, 0) + 1
-            
-            method = conversation.get('generation_method', 'unknown')
-            generation_methods[method] = generation_methods.get(method, 0) + 1
-        
-        print("\nIntent distribution:")
-        for intent, count in intent_counts.items():
-            print(f"  {intent}: {count} conversations")
-        
-        print("\nGeneration method distribution:")
-        for method, count in generation_methods.items():
-            print(f"  {method}: {count} conversations")
+        stats = DatasetStatsAccumulator.from_conversations(dataset, count_fields=("generation_method",))
+        stats.print_summary()
 
+@profiled("langchain_data_generator")
 def main():
     """Main function to generate the dataset"""
     print("🚀 Starting LangChain Banking Synthetic Data Generation...")
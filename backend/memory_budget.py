@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Memory Tracking and Budgets for the Dataset Generators
+Measures tracemalloc peak and process RSS per generation/save step, reports
+bytes per record, and projects whether a run fits a memory budget before it
+starts, so an oversized tier fails early (or streams) instead of meeting the
+OOM killer
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BUDGET_ACTIONS = ("abort", "stream")
+MIB = 1024 * 1024
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """A projected run would not fit the configured memory budget"""
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size of this process, or None where it cannot be read"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Highest resident set size this process has reached"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # kilobytes everywhere but macOS
+
+
+def budget_from_env() -> Optional[float]:
+    """Default for the generators' --memory-budget-mb: BANKING_MEMORY_BUDGET_MB, if set"""
+    value = os.getenv("BANKING_MEMORY_BUDGET_MB")
+    return float(value) if value else None
+
+
+def _mib(value: Optional[int]) -> str:
+    return f"{value / MIB:,.1f} MiB" if value is not None else "n/a"
+
+
+class MemoryStep:
+    """Measurements for one generation or save step"""
+
+    def __init__(self, name: str, records: Optional[int] = None):
+        self.name = name
+        self.records = records
+        self.seconds = 0.0
+        self.traced_peak: Optional[int] = None
+        self.rss_before = rss_bytes()
+        self.rss_after: Optional[int] = None
+        self.peak_rss: Optional[int] = None
+
+    @property
+    def bytes_per_record(self) -> Optional[float]:
+        """Traced peak per record, or the RSS growth per record when tracemalloc was off"""
+        if not self.records:
+            return None
+        if self.traced_peak is not None:
+            return self.traced_peak / self.records
+        if self.rss_before is not None and self.rss_after is not None:
+            return max(self.rss_after - self.rss_before, 0) / self.records
+        return None
+
+    def summary(self) -> str:
+        parts = [f"{self.name}: {self.seconds:.2f}s"]
+        if self.traced_peak is not None:
+            parts.append(f"traced peak {_mib(self.traced_peak)}")
+        parts.append(f"RSS {_mib(self.rss_after)} (process peak {_mib(self.peak_rss)})")
+        if self.bytes_per_record is not None:
+            parts.append(f"{self.bytes_per_record:,.0f} B/record over {self.records:,} records")
+        return ", ".join(parts)
+
+
+class MemoryTracker:
+    """Per-step memory measurements plus an optional budget for projected runs.
+
+    With trace=True each step also runs under tracemalloc, which gives exact
+    Python allocation peaks but slows allocation-heavy code several times; RSS
+    is always read. Projections calibrate under tracemalloc either way, on a
+    small sample.
+    When a projection exceeds budget_bytes, action 'abort' raises
+    MemoryBudgetExceeded and 'stream' tells the caller to switch to streaming.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None, action: str = "abort", trace: bool = False):
+        if action not in BUDGET_ACTIONS:
+            raise ValueError(f"Unknown budget action {action!r}; choose from {', '.join(BUDGET_ACTIONS)}")
+        self.budget_bytes = budget_bytes
+        self.action = action
+        self.trace = trace
+        self.steps: List[MemoryStep] = []
+
+    @classmethod
+    def from_args(cls, budget_mb: Optional[float], action: str, trace: bool) -> "MemoryTracker":
+        """Tracker for the generators' command-line flags"""
+        return cls(int(budget_mb * MIB) if budget_mb else None, action, trace)
+
+    @contextmanager
+    def step(self, name: str, records: Optional[int] = None) -> Iterator[MemoryStep]:
+        """Measure the enclosed block; set step.records inside it if the count is only known then"""
+        step = MemoryStep(name, records)
+        started_tracing = self.trace and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield step
+        finally:
+            step.seconds = time.perf_counter() - start
+            if self.trace:
+                step.traced_peak = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+            if started_tracing:
+                tracemalloc.stop()
+            step.rss_after = rss_bytes()
+            step.peak_rss = max(filter(None, (peak_rss_bytes(), step.rss_after)), default=None)
+            self.steps.append(step)
+            print(f"   🧠 {step.summary()}")
+
+    def calibrate(self, sample: Callable[[int], int], size: int) -> float:
+        """Bytes per record from throwaway runs: sample(n) generates about n units and returns its record count.
+
+        Runs size and 2*size and uses the difference, so fixed costs (lookup
+        tables, pools) don't inflate the per-record figure of a small sample.
+        """
+        def measure(n: int):
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            try:
+                records = sample(n)
+                return records, tracemalloc.get_traced_memory()[1] - baseline
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+
+        small_records, small_peak = measure(size)
+        large_records, large_peak = measure(2 * size)
+        if large_records > small_records and large_peak > small_peak:
+            return (large_peak - small_peak) / (large_records - small_records)
+        return large_peak / max(large_records, 1)
+
+    def fits(self, what: str, records: int, bytes_per_record: float) -> bool:
+        """Whether records at bytes_per_record fit the budget (always True without one).
+
+        Over budget, 'abort' raises MemoryBudgetExceeded and 'stream' returns False.
+        """
+        if self.budget_bytes is None:
+            return True
+        projected = records * bytes_per_record
+        if projected <= self.budget_bytes:
+            print(f"   🧠 {what}: projected {_mib(int(projected))} for {records:,} records "
+                  f"fits the {_mib(self.budget_bytes)} budget")
+            return True
+        message = (f"{what}: projected {_mib(int(projected))} for {records:,} records "
+                   f"({bytes_per_record:,.0f} B/record) exceeds the {_mib(self.budget_bytes)} memory budget")
+        if self.action == "abort":
+            raise MemoryBudgetExceeded(message)
+        print(f"   ⚠️  {message}; switching to streaming")
+        return False
+
+    def print_report(self):
+        if not self.steps:
+            return
+        print("\n🧠 Memory by step:")
+        for step in self.steps:
+            print(f"   {step.summary()}")
+        print(f"   Process peak RSS: {_mib(peak_rss_bytes())}")
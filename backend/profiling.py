@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Opt-in Profiling Hooks
+BANKING_PROFILE=cprofile|pyinstrument|tracemalloc profiles each request or CLI
+invocation wrapped in profiled() and writes the result to BANKING_PROFILE_DIR
+(default: profiles/), one file per invocation named after its request ID.
+Unset, profiled() costs one environment lookup.
+
+BANKING_PROFILE_MIN_MS keeps only invocations slower than that many milliseconds,
+so the switch can stay on in production and capture just the slow requests.
+"""
+
+import cProfile
+import logging
+import os
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+PROFILE_MODES = ("cprofile", "pyinstrument", "tracemalloc")
+TRACEMALLOC_TOP = 25  # allocation sites listed in a tracemalloc report
+
+logger = logging.getLogger('profiling')
+
+# Profilers are process-wide (sys.monitoring, the allocation tracer), so one
+# invocation is profiled at a time; concurrent ones run unprofiled
+_active = threading.Lock()
+_warned = set()
+
+
+def _warn_once(message: str):
+    if message not in _warned:
+        _warned.add(message)
+        logger.warning(message)
+
+
+def profile_mode() -> Optional[str]:
+    """The configured profiler, or None when profiling is off or misconfigured"""
+    mode = os.getenv("BANKING_PROFILE", "").strip().lower()
+    if not mode:
+        return None
+    if mode not in PROFILE_MODES:
+        _warn_once(f"Ignoring BANKING_PROFILE={mode!r}; choose from {', '.join(PROFILE_MODES)}")
+        return None
+    if mode == "pyinstrument":
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError:
+            _warn_once("pyinstrument is not installed; profiling with cProfile instead")
+            return "cprofile"
+    return mode
+
+
+def profile_path(name: str, request_id: str, suffix: str) -> str:
+    """<dir>/<name>-<request id>-<timestamp>-<pid><suffix>, with the ID made filename-safe"""
+    directory = os.getenv("BANKING_PROFILE_DIR") or "profiles"
+    os.makedirs(directory, exist_ok=True)
+    safe_id = re.sub(r"[^A-Za-z0-9_.-]+", "_", request_id)[:64]
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    return os.path.join(directory, f"{name}-{safe_id}-{stamp}-{os.getpid()}{suffix}")
+
+
+@contextmanager
+def profiled(name: str, request_id: Optional[str] = None) -> Iterator[None]:
+    """Profile the enclosed block with the BANKING_PROFILE profiler, if any.
+
+    Without a request_id a random one is used. Also usable as a decorator; each
+    call then gets its own profile. Files:
+    cprofile -> .prof (load with pstats or snakeviz), pyinstrument -> .html,
+    tracemalloc -> .txt peak/top-allocation report plus a .tracemalloc snapshot.
+    """
+    mode = profile_mode()
+    if mode is None or not _active.acquire(blocking=False):
+        yield
+        return
+    request_id = str(request_id) if request_id is not None else uuid.uuid4().hex[:12]
+    try:
+        start = time.perf_counter()
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        elif mode == "pyinstrument":
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+        else:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if mode == "cprofile":
+                profiler.disable()
+            elif mode == "pyinstrument":
+                profiler.stop()
+            else:
+                current, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot()
+                if started_tracing:
+                    tracemalloc.stop()
+            if elapsed_ms >= float(os.getenv("BANKING_PROFILE_MIN_MS", "0") or 0):
+                try:
+                    if mode == "cprofile":
+                        path = profile_path(name, request_id, ".prof")
+                        profiler.dump_stats(path)
+                    elif mode == "pyinstrument":
+                        path = profile_path(name, request_id, ".html")
+                        with open(path, "w", encoding="utf-8") as f:
+                            f.write(profiler.output_html())
+                    else:
+                        path = profile_path(name, request_id, ".txt")
+                        _write_memory_report(path, name, request_id, elapsed_ms, current, peak, snapshot)
+                    logger.info("Wrote %s profile of %s (%.0f ms) to %s", mode, name, elapsed_ms, path)
+                except OSError as e:
+                    logger.warning("Could not write %s profile: %s", mode, e)
+    finally:
+        _active.release()
+
+
+def _write_memory_report(path: str, name: str, request_id: str, elapsed_ms: float,
+                         current: int, peak: int, snapshot: tracemalloc.Snapshot):
+    snapshot.dump(os.path.splitext(path)[0] + ".tracemalloc")
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    lines = [
+        f"{name} request {request_id}",
+        f"elapsed: {elapsed_ms:.1f} ms",
+        f"peak traced memory: {peak / 1024 / 1024:.2f} MiB",
+        f"traced memory at exit: {current / 1024 / 1024:.2f} MiB",
+        "",
+        f"Top {TRACEMALLOC_TOP} allocation sites still live at exit:",
+    ]
+    lines += [str(stat) for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
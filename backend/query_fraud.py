@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Fraud Scoring for Crew Agent Queries
+The semi-supervised query model behind crew_agent's fraud route: features from
+a request's text, amount, merchant and location, the labeled training data, and
+batch scoring through the model or a precomputed score table. Kept free of
+CrewAI so the scorer can be trained, benchmarked and tabulated without it
+"""
+
+import logging
+import os
+from functools import lru_cache
+
+import numpy as np
+
+import dataset_cache
+import fast_json
+from fraud_score_table import ScoreTable
+
+# Optional precomputed fraud scores (fraud_score_table.py): lookups replace the
+# model, so sklearn is never imported
+FRAUD_SCORE_TABLE = os.getenv('CREW_FRAUD_SCORE_TABLE') or None
+
+logger = logging.getLogger('query_fraud')
+
+# Fewer labeled fraud conversations than this and there is no model to train
+MIN_LABELED_ROWS = 2
+
+
+def extract_features_from_query(query, amount, merchant, location):
+    # Very basic feature extraction for demo
+    features = [
+        float(amount) if amount else 0.0,
+        int(any(word in (merchant or '').lower() for word in ['electronics', 'jewelry', 'luxury', 'gaming', 'mall', 'overseas', 'unknown'])),
+        int(any(word in (location or '').lower() for word in ['overseas', 'high-risk', 'unknown', 'mall', 'shopping center'])),
+        int('suspicious' in query.lower() or 'fraud' in query.lower()),
+        int('lost card' in query.lower() or 'block' in query.lower()),
+    ]
+    return np.array(features)
+
+
+def load_labeled_fraud_data():
+    data_path = os.path.join(os.path.dirname(__file__), 'training_data', 'fraud_training_data.json')
+    if not os.path.exists(data_path):
+        return [], []
+    data = dataset_cache.load(data_path, fast_json.List[fast_json.Conversation])
+    X, y = [], []
+    for entry in data:
+        # Use the first user message in the conversation as the query
+        user_msgs = [m['message'] for m in entry.get('conversation', []) if m['role'] == 'user']
+        query = user_msgs[0] if user_msgs else ''
+        # Use metadata if available, else random
+        amount = 500 if 'not me' in query.lower() else 100
+        merchant = 'unknown' if 'unknown' in query.lower() else 'grocery'
+        location = 'unknown' if 'unknown' in query.lower() else 'local'
+        X.append(extract_features_from_query(query, amount, merchant, location))
+        y.append(1)  # All labeled as fraud
+    return np.array(X), np.array(y)
+
+
+def simulated_normal_purchases():
+    """A few pseudo-unlabeled samples (simulated ordinary purchases)"""
+    return np.array([extract_features_from_query('normal purchase', amt, 'grocery', 'local')
+                     for amt in [20, 50, 100, 200, 500, 1000]])
+
+
+def calibration_set():
+    """Labeled fraud plus the simulated normal purchases as negatives, for calibrating scores"""
+    X_labeled, y_labeled = load_labeled_fraud_data()
+    X_normal = simulated_normal_purchases()
+    return (np.vstack([X_labeled, X_normal]) if len(X_labeled) else X_normal,
+            np.concatenate([y_labeled, np.zeros(len(X_normal), dtype=int)]))
+
+
+@lru_cache(maxsize=1)
+def get_fraud_model():
+    """Train the semi-supervised fraud model once per process; None without enough labeled data"""
+    from sklearn.linear_model import LogisticRegression
+    # Load labeled data
+    X_labeled, y_labeled = load_labeled_fraud_data()
+    if len(X_labeled) < MIN_LABELED_ROWS:
+        return None
+    X_unlabeled = simulated_normal_purchases()
+    # Train initial model; the labeled set is all fraud, so the simulated normal
+    # purchases stand in for the negative class until they are pseudo-labeled
+    model = LogisticRegression()
+    if len(np.unique(y_labeled)) < 2:
+        model.fit(np.vstack([X_labeled, X_unlabeled]), np.concatenate([y_labeled, np.zeros(len(X_unlabeled), dtype=int)]))
+    else:
+        model.fit(X_labeled, y_labeled)
+    # Pseudo-label
+    pseudo_labels = model.predict(X_unlabeled)
+    X_combined = np.vstack([X_labeled, X_unlabeled])
+    y_combined = np.concatenate([y_labeled, pseudo_labels])
+    # Retrain
+    if len(np.unique(y_combined)) > 1:
+        model.fit(X_combined, y_combined)
+    return model
+
+
+@lru_cache(maxsize=1)
+def get_fraud_score_table():
+    """The CREW_FRAUD_SCORE_TABLE lookup table, loaded once; None when unset or unreadable"""
+    if not FRAUD_SCORE_TABLE:
+        return None
+    try:
+        return ScoreTable.load(FRAUD_SCORE_TABLE)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error("Ignoring fraud score table %s: %s", FRAUD_SCORE_TABLE, e)
+        return None
+
+
+def score_fraud_batch(requests):
+    """Fraud risk for several requests: table lookups when a score table is configured,
+    otherwise one predict_proba call"""
+    table = get_fraud_score_table()
+    if table is not None:
+        results = []
+        for r in requests:
+            score = table.lookup(extract_features_from_query(r.get('query', ''), r.get('amount', 0),
+                                                             r.get('merchant', ''), r.get('location', '')))
+            results.append({'risk_score': score, 'label': table.label(score), 'note': 'Calibrated score table'})
+        return results
+    model = get_fraud_model()
+    if model is None:
+        return [{'risk_score': 0.5, 'label': 'unknown', 'note': 'Insufficient labeled data'} for _ in requests]
+    if not requests:
+        return []
+    features = np.vstack([
+        extract_features_from_query(r.get('query', ''), r.get('amount', 0), r.get('merchant', ''), r.get('location', ''))
+        for r in requests
+    ])
+    risk_scores = model.predict_proba(features)[:, 1]
+    return [
+        {'risk_score': float(score), 'label': 'fraud' if score > 0.5 else 'not_fraud', 'note': 'Semi-supervised model'}
+        for score in risk_scores
+    ]
+
+
+def semi_supervised_fraud_detection(query, amount, merchant, location):
+    return score_fraud_batch([{'query': query, 'amount': amount, 'merchant': merchant, 'location': location}])[0]
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Streaming Samplers for Training Data Selection
+Uniform, weighted and stratified reservoirs that draw k items in one pass
+over a stream using O(k) memory
+"""
+
+import heapq
+import math
+import random
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def _open_unit(rng: random.Random) -> float:
+    """Uniform draw from the open interval (0, 1), safe to take the log of"""
+    u = rng.random()
+    while u == 0.0:
+        u = rng.random()
+    return u
+
+
+def _sample_size(k: int) -> int:
+    if k < 0:
+        raise ValueError(f"Sample size must be non-negative, got {k}")
+    return k
+
+
+class ReservoirSampler(Generic[T]):
+    """Uniform sample of k items from a stream (Li's Algorithm L).
+
+    After the reservoir fills, the gap to the next replacement is drawn directly,
+    so most offered items cost a counter increment and no random draws.
+    """
+
+    def __init__(self, k: int, rng: Optional[random.Random] = None):
+        self.k = _sample_size(k)
+        self.rng = rng or random.Random()
+        self.items: List[T] = []
+        self.seen = 0
+        self._w = 1.0
+        self._next = 0
+
+    def _advance(self):
+        self._w *= math.exp(math.log(_open_unit(self.rng)) / self.k)
+        self._next += int(math.log(_open_unit(self.rng)) / math.log1p(-self._w)) + 1
+
+    def offer(self, item: T):
+        self.seen += 1
+        if not self.k:
+            return
+        if len(self.items) < self.k:
+            self.items.append(item)
+            if len(self.items) == self.k:
+                self._next = self.seen
+                self._advance()
+        elif self.seen == self._next:
+            self.items[self.rng.randrange(self.k)] = item
+            self._advance()
+
+    def sample(self) -> List[T]:
+        """The current sample, in random order"""
+        items = list(self.items)
+        self.rng.shuffle(items)
+        return items
+
+
+class WeightedReservoirSampler(Generic[T]):
+    """Weighted sample of k items without replacement (Efraimidis-Spirakis A-Res).
+
+    Each item gets the key log(u) / weight and the k largest keys are kept in a heap.
+    Items with a non-positive weight are never selected.
+    """
+
+    def __init__(self, k: int, rng: Optional[random.Random] = None):
+        self.k = _sample_size(k)
+        self.rng = rng or random.Random()
+        self._heap: List[Any] = []
+        self._counter = 0  # tie-breaker so items themselves are never compared
+        self.seen = 0
+
+    def offer(self, item: T, weight: float):
+        self.seen += 1
+        if not weight or weight <= 0 or not self.k:
+            return
+        key = math.log(_open_unit(self.rng)) / weight
+        self._counter += 1
+        entry = (key, self._counter, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif key > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def sample(self) -> List[T]:
+        """The current sample, highest priority first"""
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+
+class StratifiedReservoirSampler(Generic[T]):
+    """Sample k items whose strata keep their proportions in the stream.
+
+    One k-sized reservoir per stratum plus stratum counts; quotas are assigned by
+    largest remainder once the stream ends. Memory is O(k * number of strata).
+    """
+
+    def __init__(self, k: int, key: Callable[[T], Any], rng: Optional[random.Random] = None):
+        self.k = _sample_size(k)
+        self.key = key
+        self.rng = rng or random.Random()
+        self.strata: Dict[Any, ReservoirSampler[T]] = {}
+        self.seen = 0
+
+    def offer(self, item: T):
+        self.seen += 1
+        stratum = self.key(item)
+        reservoir = self.strata.get(stratum)
+        if reservoir is None:
+            reservoir = self.strata[stratum] = ReservoirSampler(self.k, self.rng)
+        reservoir.offer(item)
+
+    def quotas(self) -> Dict[Any, int]:
+        """Samples allotted to each stratum, summing to min(k, items seen)"""
+        total = min(self.k, self.seen)
+        keys = sorted(self.strata, key=repr)
+        exact = {key: total * self.strata[key].seen / self.seen for key in keys}
+        quotas = {key: int(exact[key]) for key in keys}
+        leftover = total - sum(quotas.values())
+        for key in sorted(keys, key=lambda k: exact[k] - quotas[k], reverse=True)[:leftover]:
+            quotas[key] += 1
+        return quotas
+
+    def sample(self) -> List[T]:
+        """The stratified sample, in random order"""
+        if not self.seen:
+            return []
+        items: List[T] = []
+        for stratum, quota in self.quotas().items():
+            reservoir = self.strata[stratum].items
+            items.extend(self.rng.sample(reservoir, min(quota, len(reservoir))))
+        self.rng.shuffle(items)
+        return items
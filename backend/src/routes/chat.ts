@@ -1,4 +1,5 @@
 import { Router } from 'express';
+import { CrewAIService } from '../services/crewAIService';
 
 const router = Router();
 
@@ -343,6 +344,46 @@ router.post('/', async (req, res) => {
   }
 });
 
+// Streams the CrewAI answer as newline-delimited JSON: {"type":"chunk","content"} lines as the
+// LLM produces tokens, then one {"type":"result","result"} line (or {"type":"error"} on failure)
+router.post('/stream', async (req, res) => {
+  const { message, userId, sessionId } = req.body;
+  if (!message || !userId) {
+    return res.status(400).json({
+      success: false,
+      message: 'Message and userId are required'
+    });
+  }
+
+  res.status(200);
+  res.setHeader('Content-Type', 'application/x-ndjson; charset=utf-8');
+  res.setHeader('Cache-Control', 'no-cache');
+  res.setHeader('X-Accel-Buffering', 'no'); // keep proxies from holding chunks back
+  res.flushHeaders();
+  const send = (line: any) => {
+    // The agent keeps running if the client goes away; its output is dropped
+    if (!res.writableEnded && !res.destroyed) {
+      res.write(JSON.stringify(line) + '\n');
+    }
+  };
+
+  try {
+    const result = await CrewAIService.getInstance().runAgent(
+      { query: message, userId, sessionId },
+      (content: string) => send({ type: 'chunk', content })
+    );
+    send({ type: 'result', result });
+  } catch (error: any) {
+    console.error('Error in stream route:', error);
+    send({
+      type: 'error',
+      error: (error && error.error) || (error instanceof Error ? error.message : 'Unknown error'),
+      fallback: (error && error.fallback) || 'Using fallback response due to CrewAI error'
+    });
+  }
+  res.end();
+});
+
 router.post('/message', async (req, res) => {
   try {
     const { message, userId } = req.body;
@@ -1,15 +1,102 @@
 import { config } from '../config';
-import { spawn } from 'child_process';
-import fs from 'fs';
+import { spawn, ChildProcess } from 'child_process';
 import path from 'path';
+import { StringDecoder } from 'string_decoder';
 
 export class CrewAIService {
   private static instance: CrewAIService;
   private readonly scriptPath: string;
+  private readonly poolScriptPath: string;
+  // Set CREW_POOL_WORKERS to route requests through crew_pool.py's warm workers
+  // instead of spawning one Python process per request
+  private readonly poolWorkers: number;
+  private pool: ChildProcess | null = null;
+  private poolBuffer: Buffer = Buffer.alloc(0);
+  private readonly pending = new Map<number, { resolve: (value: any) => void; reject: (reason: any) => void }>();
+  private nextRequestId = 1;
 
   private constructor() {
     // Path to the Python script
     this.scriptPath = path.resolve(__dirname, '../../crew_agent.py');
+    this.poolScriptPath = path.resolve(__dirname, '../../crew_pool.py');
+    this.poolWorkers = parseInt(process.env.CREW_POOL_WORKERS || '0', 10) || 0;
+  }
+
+  private pythonEnv(): NodeJS.ProcessEnv {
+    return { ...process.env, OLLAMA_BASE_URL: config.ollama.apiUrl, OLLAMA_MODEL: config.ollama.model };
+  }
+
+  private startPool(): ChildProcess {
+    const pool = spawn('python', [this.poolScriptPath, '--workers', String(this.poolWorkers)], {
+      env: this.pythonEnv(),
+      stdio: ['pipe', 'pipe', 'inherit']
+    });
+    pool.stdout!.on('data', (data: Buffer) => {
+      this.poolBuffer = Buffer.concat([this.poolBuffer, data]);
+      this.drainPoolFrames();
+    });
+    pool.on('close', (code) => {
+      // Fail whatever was in flight; the next request starts a fresh pool
+      this.pool = null;
+      this.poolBuffer = Buffer.alloc(0);
+      for (const { reject } of this.pending.values()) {
+        reject({ success: false, error: `Crew pool exited with code ${code}`, fallback: 'Using fallback response due to CrewAI error' });
+      }
+      this.pending.clear();
+    });
+    pool.stdin!.on('error', () => {
+      // The pool died; 'close' rejects the pending requests
+    });
+    return pool;
+  }
+
+  // Results come back as frames tagged with the request id, in completion order
+  private drainPoolFrames() {
+    while (true) {
+      const newline = this.poolBuffer.indexOf(0x0a);
+      if (newline < 0) return;
+      const header = this.poolBuffer.subarray(0, newline).toString('ascii').trim();
+      if (!/^\d+$/.test(header)) {
+        // Blank line after a frame, or stray output: skip it
+        this.poolBuffer = this.poolBuffer.subarray(newline + 1);
+        continue;
+      }
+      const end = newline + 1 + parseInt(header, 10);
+      if (this.poolBuffer.length < end) return;
+      const frame = this.poolBuffer.subarray(newline + 1, end).toString('utf8');
+      this.poolBuffer = this.poolBuffer.subarray(end);
+      let result: any;
+      try {
+        result = JSON.parse(frame);
+      } catch (e) {
+        continue;
+      }
+      const waiter = this.pending.get(result.id);
+      if (!waiter) continue;
+      this.pending.delete(result.id);
+      if (result.success) {
+        waiter.resolve(result);
+      } else {
+        waiter.reject({
+          success: false,
+          error: result.error || 'Crew pool request failed',
+          fallback: result.fallback || 'Using fallback response due to CrewAI error',
+          retryable: result.retryable || false
+        });
+      }
+    }
+  }
+
+  private runPooled(request: any): Promise<any> {
+    if (!this.pool) {
+      this.pool = this.startPool();
+    }
+    const id = this.nextRequestId++;
+    const payload = Buffer.from(JSON.stringify({ ...request, id }), 'utf8');
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject });
+      this.pool!.stdin!.write(Buffer.concat([Buffer.from(`${payload.length}\n`, 'ascii'), payload, Buffer.from('\n')]));
+    });
   }
 
   public static getInstance(): CrewAIService {
@@ -19,7 +106,21 @@ export class CrewAIService {
     return CrewAIService.instance;
   }
 
-  async runAgent(input: any): Promise<any> {
+  // crew_agent.py writes one frame to stdout: the payload byte length, a newline, then the JSON
+  private static parseResultFrame(raw: Buffer): any {
+    const newline = raw.indexOf(0x0a);
+    const header = newline > 0 ? raw.subarray(0, newline).toString('ascii') : '';
+    if (/^\d+$/.test(header)) {
+      const start = newline + 1;
+      return JSON.parse(raw.subarray(start, start + parseInt(header, 10)).toString('utf8'));
+    }
+    // Unframed output from an older script
+    return JSON.parse(raw.toString('utf8'));
+  }
+
+  // With onChunk, the script runs in --stream mode: LLM tokens are passed to onChunk as they
+  // arrive and the promise resolves with the final result
+  async runAgent(input: any, onChunk?: (text: string) => void): Promise<any> {
     // Enhanced input data for the multi-agent CrewAI system
     const enhancedInput = {
       query: input.query || '',
@@ -37,41 +138,93 @@ export class CrewAIService {
       sessionId: input.sessionId || null
     };
 
-    // Write enhanced input to a temporary JSON file
-    const inputFile = path.resolve(__dirname, '../../crew_input.json');
-    fs.writeFileSync(inputFile, JSON.stringify(enhancedInput, null, 2));
+    if (this.poolWorkers > 0 && !onChunk) {
+      return this.runPooled(enhancedInput);
+    }
 
     return new Promise((resolve, reject) => {
-      const python = spawn('python', [this.scriptPath, inputFile]);
-      let output = '';
+      // The request goes over stdin, so concurrent runs share no files
+      const args = onChunk ? [this.scriptPath, '--stream'] : [this.scriptPath];
+      const python = spawn('python', args, { env: this.pythonEnv() });
+      const chunks: Buffer[] = [];
       let error = '';
+      // Streaming mode: newline-delimited JSON, parsed line by line as it arrives
+      const decoder = new StringDecoder('utf8'); // keeps multi-byte characters split across reads intact
+      let pending = '';
+      let streamed: any = null;
+      const handleLine = (line: string) => {
+        if (!line.trim()) return;
+        try {
+          const message = JSON.parse(line);
+          if (message.type === 'chunk') {
+            onChunk!(message.content);
+          } else if (message.type === 'result') {
+            streamed = message.result;
+          }
+        } catch (e) {
+          // Not a protocol line; ignore it
+        }
+      };
 
-      python.stdout.on('data', (data) => {
-        output += data.toString();
+      python.stdin.on('error', (err) => {
+        // The script exited before reading its input; 'close' reports the failure
+        error += `Failed to write request to Python stdin: ${err.message}\n`;
+      });
+      python.stdin.end(JSON.stringify(enhancedInput));
+
+      python.stdout.on('data', (data: Buffer) => {
+        if (!onChunk) {
+          chunks.push(data);
+          return;
+        }
+        pending += decoder.write(data);
+        const lines = pending.split('\n');
+        pending = lines.pop() || '';
+        lines.forEach(handleLine);
       });
       python.stderr.on('data', (data) => {
         error += data.toString();
       });
       python.on('close', (code) => {
-        fs.unlinkSync(inputFile); // Clean up temp file
+        if (onChunk) {
+          handleLine(pending + decoder.end());
+          if (streamed && streamed.success) {
+            resolve(streamed);
+          } else {
+            reject({
+              success: false,
+              error: (streamed && streamed.error) || error || 'Python script failed',
+              fallback: (streamed && streamed.fallback) || 'Using fallback response due to CrewAI error'
+            });
+          }
+          return;
+        }
+        const output = Buffer.concat(chunks);
         if (code === 0) {
           try {
-            const result = JSON.parse(output);
+            const result = CrewAIService.parseResultFrame(output);
             resolve(result);
           } catch (e) {
             reject({ 
               success: false, 
               error: 'Failed to parse Python output', 
-              details: output,
+              details: output.toString('utf8'),
               fallback: 'Using fallback response due to parsing error'
             });
           }
         } else {
+          // Failures still carry a result frame with the error; stderr only holds logs
+          let failure: any = {};
+          try {
+            failure = CrewAIService.parseResultFrame(output);
+          } catch (e) {
+            // No frame: the script died before it could answer
+          }
           reject({ 
             success: false, 
-            error: error || 'Python script failed', 
-            details: output,
-            fallback: 'Using fallback response due to CrewAI error'
+            error: failure.error || error || 'Python script failed', 
+            details: output.toString('utf8'),
+            fallback: failure.fallback || 'Using fallback response due to CrewAI error'
           });
         }
       });
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Per-Stage Latency Spans for Crew Requests
+Records named wall-clock spans for one request and renders them as a timings
+dict, Prometheus text exposition or OpenTelemetry (OTLP/JSON) spans
+"""
+
+import os
+import secrets
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+EXPORT_FORMATS = ("prometheus", "otel")
+
+
+class StageTimer:
+    """Spans for one request; stages may repeat (durations add up) or be recorded after the fact"""
+
+    def __init__(self, name: str = "crew_request"):
+        self.name = name
+        self.origin = time.perf_counter()
+        self.epoch_ns = time.time_ns()
+        self.spans: List[Tuple[str, float, float]] = []  # (stage, start, end) in perf_counter seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, start, time.perf_counter()))
+
+    def record(self, name: str, seconds: float, end: Optional[float] = None):
+        """Add a span measured elsewhere (e.g. module imports), ending at end or now"""
+        end = time.perf_counter() if end is None else end
+        self.spans.append((name, end - seconds, end))
+
+    def total_seconds(self) -> float:
+        latest = max((end for _, _, end in self.spans), default=self.origin)
+        earliest = min((start for _, start, _ in self.spans), default=self.origin)
+        return max(latest, time.perf_counter()) - min(earliest, self.origin)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Milliseconds per stage in first-seen order, plus the request total"""
+        timings: Dict[str, float] = {}
+        for name, start, end in self.spans:
+            timings[name] = timings.get(name, 0.0) + (end - start) * 1000
+        result = {name: round(ms, 2) for name, ms in timings.items()}
+        result["total"] = round(self.total_seconds() * 1000, 2)
+        return result
+
+    def to_prometheus(self, metric: str = "crew_stage_duration_seconds") -> str:
+        """Text exposition of the last request's stage durations as gauges"""
+        lines = [
+            f"# HELP {metric} Wall-clock seconds spent in each crew_agent stage of the last request",
+            f"# TYPE {metric} gauge",
+        ]
+        for name, ms in self.as_dict().items():
+            if name != "total":
+                lines.append(f'{metric}{{stage="{name}"}} {ms / 1000:.6f}')
+        lines += [
+            "# HELP crew_request_duration_seconds Wall-clock seconds for the last crew_agent request",
+            "# TYPE crew_request_duration_seconds gauge",
+            f"crew_request_duration_seconds {self.total_seconds():.6f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def to_otel(self, service_name: str = "crew_agent", attributes: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """One OTLP/JSON trace: a root request span with a child span per stage"""
+        trace_id = secrets.token_hex(16)
+        root_id = secrets.token_hex(8)
+
+        def unix_nano(t: float) -> str:
+            return str(self.epoch_ns + int((t - self.origin) * 1e9))
+
+        def attribute(key: str, value: Any) -> Dict[str, Any]:
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        start = min([self.origin] + [s for _, s, _ in self.spans])
+        end = start + self.total_seconds()
+        spans = [{
+            "traceId": trace_id, "spanId": root_id, "name": self.name, "kind": 1,
+            "startTimeUnixNano": unix_nano(start), "endTimeUnixNano": unix_nano(end),
+            "attributes": [attribute(k, v) for k, v in (attributes or {}).items()],
+        }]
+        for name, span_start, span_end in self.spans:
+            spans.append({
+                "traceId": trace_id, "spanId": secrets.token_hex(8), "parentSpanId": root_id,
+                "name": name, "kind": 1,
+                "startTimeUnixNano": unix_nano(span_start), "endTimeUnixNano": unix_nano(span_end),
+            })
+        return {"resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", service_name)]},
+            "scopeSpans": [{"scope": {"name": "stage_timings"}, "spans": spans}],
+        }]}
+
+
+def export(timer: StageTimer, fmt: Optional[str], path: Optional[str] = None,
+           attributes: Optional[Dict[str, Any]] = None, dumps=None):
+    """Export a request's spans.
+
+    prometheus: the file is replaced atomically (node_exporter textfile collector style).
+    otel: one OTLP/JSON document per line is appended (collector file receiver style).
+    Without a path the export goes to stderr.
+    """
+    if not fmt:
+        return
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown timings format {fmt!r}; choose from {', '.join(EXPORT_FORMATS)}")
+    if fmt == "prometheus":
+        text = timer.to_prometheus()
+        if not path:
+            sys.stderr.write(text)
+            return
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, suffix=".tmp") as f:
+            f.write(text)
+        os.replace(f.name, path)
+        return
+    if dumps is None:
+        import json
+        dumps = json.dumps
+    line = dumps(timer.to_otel(attributes=attributes)) + "\n"
+    if not path:
+        sys.stderr.write(line)
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
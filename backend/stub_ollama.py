@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Stub Ollama Server for Offline Performance Testing
+Serves /api/version, /api/generate and /api/chat with canned banking answers,
+configurable latency and token rates, and Ollama-style NDJSON streaming, so the
+agent and data generators can be load-tested without a model
+"""
+
+import argparse
+import itertools
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+
+import fast_json
+
+VERSION = "0.0.0-stub"
+INTENTS = ("balance_inquiry", "transaction_request", "fraud_alert", "financial_advice", "account_management")
+
+# Checked in order; the first intent with a matching keyword wins
+INTENT_KEYWORDS = (
+    ("fraud_alert", ("fraud", "suspicious", "unauthorized", "lost card", "block")),
+    ("transaction_request", ("transfer", "transaction request", "payment", "send money", "withdraw")),
+    ("balance_inquiry", ("balance",)),
+    ("financial_advice", ("advice", "budget", "saving", "invest", "retirement", "debt")),
+    ("account_management", ("account", "password", "address", "statement")),
+)
+
+# Answers for agent prompts (CrewAI expects a ReAct-style final answer)
+AGENT_ANSWERS = {
+    "balance_inquiry": "Your checking account balance is $2,450.18 as of this morning, with two pending "
+                       "card transactions totalling $63.40.",
+    "transaction_request": "I have scheduled the transfer of $250.00 to the recipient. It will arrive within "
+                           "one business day and you will receive a confirmation by email.",
+    "fraud_alert": "I have temporarily blocked your card and flagged the transaction as suspicious. A fraud "
+                   "specialist will review it and a replacement card will be sent within 3-5 business days.",
+    "financial_advice": "Start by setting aside 20% of your monthly income for savings, build an emergency "
+                        "fund covering three to six months of expenses, then pay down high-interest debt.",
+    "account_management": "Your account details have been updated. For your security we have sent a "
+                          "confirmation code to the phone number on file.",
+}
+
+_TOKEN = re.compile(r"\s*\S+")
+
+
+class LatencyModel:
+    """Seconds before the first token, drawn from a distribution given as 'kind:params' in milliseconds.
+
+    fixed:MS, uniform:LOW,HIGH, normal:MEAN,STDEV, lognormal:MEDIAN,SIGMA or exponential:MEAN;
+    negative draws are clamped to zero.
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, spec: str = "fixed:0", rng: Optional[random.Random] = None):
+        kind, _, params = spec.partition(":")
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution {kind!r}; choose from {', '.join(self.KINDS)}")
+        try:
+            self.params = [float(p) for p in params.split(",")] if params else []
+        except ValueError:
+            raise ValueError(f"Invalid latency parameters in {spec!r}") from None
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}[kind]
+        if len(self.params) != expected:
+            raise ValueError(f"{kind} latency takes {expected} parameter(s), got {spec!r}")
+        self.kind = kind
+        self.spec = spec
+        self.rng = rng or random.Random()
+        self.lock = threading.Lock()
+
+    def sample(self) -> float:
+        p = self.params
+        with self.lock:
+            if self.kind == "fixed":
+                ms = p[0]
+            elif self.kind == "uniform":
+                ms = self.rng.uniform(p[0], p[1])
+            elif self.kind == "normal":
+                ms = self.rng.gauss(p[0], p[1])
+            elif self.kind == "lognormal":
+                ms = p[0] * self.rng.lognormvariate(0.0, p[1]) if p[0] > 0 else 0.0
+            else:
+                ms = self.rng.expovariate(1.0 / p[0]) if p[0] > 0 else 0.0
+        return max(ms, 0.0) / 1000
+
+
+class CannedResponses:
+    """Deterministic response texts per intent: JSON conversations for generation prompts,
+    ReAct final answers for agent prompts. Each intent cycles through its canned list.
+    """
+
+    def __init__(self, seed: int = 0, per_intent: int = 20, overrides: Optional[Dict[str, List[Any]]] = None):
+        from template_conversation_generator import TemplateConversationGenerator
+        generator = TemplateConversationGenerator(seed=seed, reference_time=datetime(2024, 1, 15, 10, 30))
+        self.conversations = {
+            intent: [fast_json.dumps(conv) for conv in generator.generate_intent_batch(intent, per_intent)]
+            for intent in INTENTS
+        }
+        self.answers = {intent: [f"Thought: I now know the final answer\nFinal Answer: {answer}"]
+                        for intent, answer in AGENT_ANSWERS.items()}
+        for intent, texts in (overrides or {}).items():
+            if intent not in INTENTS or not texts:
+                raise ValueError(f"Canned responses need a non-empty list per intent ({', '.join(INTENTS)}); "
+                                 f"got {intent!r}")
+            # Overrides replace both lists; objects are served as their JSON text
+            texts = [t if isinstance(t, str) else fast_json.dumps(t) for t in texts]
+            self.conversations[intent] = self.answers[intent] = texts
+        self.lock = threading.Lock()
+        self.cycles = {}
+        for intent in INTENTS:
+            self.cycles["json", intent] = itertools.cycle(self.conversations[intent])
+            self.cycles["agent", intent] = itertools.cycle(self.answers[intent])
+
+    @staticmethod
+    def intent_for(prompt: str) -> str:
+        explicit = re.search(r'"intent":\s*"(\w+)"', prompt)
+        if explicit and explicit.group(1) in INTENTS:
+            return explicit.group(1)
+        lowered = prompt.lower()
+        for intent, keywords in INTENT_KEYWORDS:
+            if any(keyword in lowered for keyword in keywords):
+                return intent
+        return "account_management"
+
+    def respond(self, prompt: str, wants_json: bool) -> str:
+        key = ("json" if wants_json or "json" in prompt.lower() else "agent", self.intent_for(prompt))
+        with self.lock:
+            return next(self.cycles[key])
+
+
+class StubOllama:
+    """Response timing and content shared by every request the server handles"""
+
+    def __init__(self, latency: str = "fixed:0", tokens_per_second: float = 0.0, model: str = "mistral",
+                 seed: int = 0, responses: Optional[Dict[str, List[Any]]] = None):
+        self.latency = LatencyModel(latency, random.Random(seed))
+        self.tokens_per_second = tokens_per_second
+        self.model = model
+        self.canned = CannedResponses(seed, overrides=responses)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def tokens(self, text: str) -> List[str]:
+        return _TOKEN.findall(text) or [text]
+
+    def timed_tokens(self, text: str) -> Iterator[str]:
+        """Yield tokens at the configured rate after the first-token latency"""
+        time.sleep(self.latency.sample())
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        next_at = time.perf_counter()
+        for token in self.tokens(text):
+            yield token
+            if interval:
+                next_at += interval
+                time.sleep(max(next_at - time.perf_counter(), 0.0))
+
+    def final_fields(self, prompt: str, text: str, started: float, first_token: float) -> Dict[str, Any]:
+        """The statistics Ollama reports on its last message (durations in nanoseconds)"""
+        now = time.perf_counter()
+        return {
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((now - started) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": len(self.tokens(prompt)),
+            "prompt_eval_duration": int((first_token - started) * 1e9),
+            "eval_count": len(self.tokens(text)),
+            "eval_duration": int((now - first_token) * 1e9),
+        }
+
+
+def _created_at() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "StubOllama/" + VERSION
+
+    @property
+    def stub(self) -> StubOllama:
+        return self.server.stub
+
+    def _send_json(self, body: Any, status: int = 200):
+        payload = fast_json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return fast_json.loads(self.rfile.read(length)) if length else {}
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            self._send_json({"version": VERSION})
+        elif self.path == "/api/tags":
+            self._send_json({"models": [{"name": f"{self.stub.model}:latest", "model": f"{self.stub.model}:latest",
+                                         "size": 0, "details": {"format": "gguf", "family": "stub"}}]})
+        elif self.path == "/":
+            body = b"Ollama is running"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json({"error": f"unknown endpoint {self.path}"}, 404)
+
+    def do_POST(self):
+        try:
+            request = self._read_body()
+        except (ValueError, fast_json.JSONError) as e:
+            self._send_json({"error": f"invalid request body: {e}"}, 400)
+            return
+        with self.stub.lock:
+            self.stub.requests += 1
+        if self.path == "/api/generate":
+            prompt = f"{request.get('system', '')}\n{request.get('prompt', '')}"
+            self._complete(request, prompt, lambda token: {"response": token})
+        elif self.path == "/api/chat":
+            prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages") or [])
+            self._complete(request, prompt, lambda token: {"message": {"role": "assistant", "content": token}})
+        elif self.path == "/api/show":
+            self._send_json({"modelfile": "", "parameters": "", "template": "{{ .Prompt }}",
+                             "details": {"format": "gguf", "family": "stub"}, "model_info": {}})
+        else:
+            self._send_json({"error": f"unknown endpoint {self.path}"}, 404)
+
+    def _complete(self, request: Dict[str, Any], prompt: str, piece):
+        stub = self.stub
+        model = request.get("model") or stub.model
+        text = stub.canned.respond(prompt, wants_json=request.get("format") == "json")
+        started = time.perf_counter()
+        tokens = stub.timed_tokens(text)
+        if request.get("stream", True) is False:
+            for _ in tokens:
+                pass
+            first_token = started  # nothing was observable before the full answer
+            self._send_json({"model": model, "created_at": _created_at(), **piece(text),
+                             **stub.final_fields(prompt, text, started, first_token)})
+            return
+
+        # Ollama streams one JSON object per line, ending with the statistics
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        first_token = None
+        for token in tokens:
+            if first_token is None:
+                first_token = time.perf_counter()
+            self._write_chunk({"model": model, "created_at": _created_at(), **piece(token), "done": False})
+        last = piece("")
+        self._write_chunk({"model": model, "created_at": _created_at(), **last,
+                           **stub.final_fields(prompt, text, started, first_token or started)})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _write_chunk(self, message: Dict[str, Any]):
+        line = fast_json.dumps(message).encode("utf-8") + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 11434, verbose: bool = False, **options) -> ThreadingHTTPServer:
+    """A stub server bound to host:port (port 0 picks a free one); options go to StubOllama"""
+    server = ThreadingHTTPServer((host, port), StubOllamaHandler)
+    server.daemon_threads = True
+    server.stub = StubOllama(**options)
+    server.verbose = verbose
+    return server
+
+
+def start_in_thread(**options) -> ThreadingHTTPServer:
+    """Serve on a free local port from a daemon thread; the base URL is server.url"""
+    server = make_server(port=0, **options)
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, name="stub-ollama", daemon=True).start()
+    return server
+
+
+def main():
+    """Run the stub in the foreground"""
+    parser = argparse.ArgumentParser(description="Stub Ollama server for offline load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--model", default="mistral", help="Model name reported when a request names none")
+    parser.add_argument("--latency", default="fixed:0",
+                        help="Time to first token in ms: fixed:MS, uniform:LOW,HIGH, normal:MEAN,STDEV, "
+                             "lognormal:MEDIAN,SIGMA or exponential:MEAN")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Generation rate after the first token (0: as fast as possible)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latencies and canned conversations")
+    parser.add_argument("--responses", help="JSON file mapping intents to lists of canned responses")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    try:
+        LatencyModel(args.latency)
+    except ValueError as e:
+        parser.error(str(e))
+    responses = fast_json.load_file(args.responses) if args.responses else None
+    server = make_server(args.host, args.port, args.verbose, latency=args.latency,
+                         tokens_per_second=args.tokens_per_second, model=args.model, seed=args.seed,
+                         responses=responses)
+    print(f"🧪 Stub Ollama listening on http://{args.host}:{server.server_port} "
+          f"(latency {args.latency}, {args.tokens_per_second or 'unlimited'} tokens/s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served {server.stub.requests} completions")
+
+if __name__ == "__main__":
+    main()
@@ -13,13 +13,18 @@ from langchain.llms import Ollama
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 import uuid
+from profiling import profiled
+
+# Overridable so generation can be load-tested against stub_ollama.py
+OLLAMA_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434').rstrip('/')
+OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'mistral')
 
 class BankingSyntheticDataGenerator:
-    def __init__(self, model_name="mistral"):
+    def __init__(self, model_name=None):
         """Initialize the synthetic data generator with Ollama"""
         self.llm = Ollama(
-            model=model_name,
-            base_url="http://localhost:11434",
+            model=model_name or OLLAMA_MODEL,
+            base_url=OLLAMA_BASE_URL,
             temperature=0.8
         )
         
@@ -417,6 +422,7 @@ class BankingSyntheticDataGenerator:
         print(f"Dataset saved to {filename}")
         print(f"Total conversations: {len(dataset)}")
 
+@profiled("synthetic_data_generator")
 def main():
     """Main function to generate the dataset"""
     print("🚀 Starting Banking Synthetic Data Generation...")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Streaming Per-Account Velocity Features
+Exponentially decayed transaction counts, amount sums and amount maxima per
+account over 1h/24h/7d horizons, updated in O(1) per event, for the fraud model
+and any other consumer of transaction streams
+"""
+
+import argparse
+import math
+import time
+from typing import Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+# (name, seconds): each horizon is the time constant of its decay
+WINDOWS: Tuple[Tuple[str, float], ...] = (("1h", 3600.0), ("24h", 86400.0), ("7d", 604800.0))
+STATS = ("count", "sum", "max")
+
+_EPOCH = np.datetime64(0, "us")
+
+
+def epoch_seconds(dates: Sequence) -> np.ndarray:
+    """Seconds since the epoch for naive datetimes, converted as one array"""
+    return (np.array(dates, dtype="datetime64[us]") - _EPOCH) / np.timedelta64(1, "s")
+
+
+class VelocityEngine:
+    """Decayed activity per account: O(1) time and memory per event and per account.
+
+    For a horizon T, an event t seconds old contributes exp(-t/T) to the count
+    and sum; the max decays the same way. Compared with an exact sliding window
+    this needs no event buffer, weighs a burst the same, and fades old activity
+    smoothly instead of dropping it at the edge. Features describe the activity
+    before each event (decayed to its time), so an event never sees itself.
+    Events for one account should arrive in time order; an earlier timestamp is
+    treated as simultaneous with the last one.
+    """
+
+    def __init__(self, windows: Sequence[Tuple[str, float]] = WINDOWS):
+        self.windows = tuple(windows)
+        self._inverse = tuple(1.0 / seconds for _, seconds in self.windows)
+        # account -> [last timestamp, count_0, sum_0, max_0, count_1, ...]
+        self.accounts: Dict[Hashable, List[float]] = {}
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [f"{stat}_{name}" for name, _ in self.windows for stat in STATS]
+
+    def update(self, account: Hashable, timestamp: float, amount: float) -> List[float]:
+        """Features for one event, then fold the event in; amount is taken as a magnitude"""
+        return self._step(account, timestamp, abs(amount), True)
+
+    def peek(self, account: Hashable, timestamp: float) -> List[float]:
+        """Features an event at timestamp would see, without recording it"""
+        return self._step(account, timestamp, 0.0, False)
+
+    def _step(self, account, timestamp, amount, record):
+        state = self.accounts.get(account)
+        if state is None:
+            if record:
+                self.accounts[account] = [timestamp] + [1.0, amount, amount] * len(self._inverse)
+            return [0.0] * (3 * len(self._inverse))
+        elapsed = timestamp - state[0]
+        if elapsed < 0:
+            elapsed = 0.0
+        features = []
+        i = 1
+        for inverse in self._inverse:
+            decay = math.exp(-elapsed * inverse)
+            count = state[i] * decay
+            total = state[i + 1] * decay
+            peak = state[i + 2] * decay
+            features += (count, total, peak)
+            if record:
+                state[i] = count + 1.0
+                state[i + 1] = total + amount
+                state[i + 2] = peak if peak > amount else amount
+            i += 3
+        if record and elapsed > 0:
+            state[0] = timestamp
+        return features
+
+    def process(self, accounts: Sequence[Hashable], timestamps: Sequence[float], amounts: Sequence[float],
+                update: bool = True) -> np.ndarray:
+        """Features for a batch of events in arrival order, one row per event.
+
+        Same arithmetic as update()/peek(), with the per-event loop kept flat
+        because it is the hot path of training and batch scoring.
+        """
+        if isinstance(timestamps, np.ndarray):
+            timestamps = timestamps.tolist()
+        if isinstance(amounts, np.ndarray):
+            amounts = amounts.tolist()
+        width = 3 * len(self._inverse)
+        zeros = [0.0] * width
+        slots = [(1 + 3 * j, inverse) for j, inverse in enumerate(self._inverse)]
+        states = self.accounts
+        get = states.get
+        exp = math.exp
+        out: List[float] = []
+        extend = out.extend
+        for account, timestamp, amount in zip(accounts, timestamps, amounts):
+            if amount < 0:
+                amount = -amount
+            state = get(account)
+            if state is None:
+                extend(zeros)
+                if update:
+                    states[account] = [timestamp] + [1.0, amount, amount] * len(slots)
+                continue
+            elapsed = timestamp - state[0]
+            if elapsed < 0:
+                elapsed = 0.0
+            for i, inverse in slots:
+                decay = exp(-elapsed * inverse)
+                count = state[i] * decay
+                total = state[i + 1] * decay
+                peak = state[i + 2] * decay
+                extend((count, total, peak))
+                if update:
+                    state[i] = count + 1.0
+                    state[i + 1] = total + amount
+                    state[i + 2] = peak if peak > amount else amount
+            if update and elapsed > 0:
+                state[0] = timestamp
+        return np.array(out, dtype=np.float64).reshape(-1, width)
+
+    def process_transactions(self, transactions: Sequence, update: bool = True) -> np.ndarray:
+        """process() for Transaction records (account_id, date, amount)"""
+        if not transactions:
+            return np.zeros((0, 3 * len(self._inverse)))
+        return self.process([t.account_id for t in transactions], epoch_seconds([t.date for t in transactions]),
+                            [t.amount for t in transactions], update)
+
+    def stream(self, events: Iterable[Tuple[Hashable, float, float]]) -> Iterator[List[float]]:
+        """Features for each (account, timestamp, amount) event of an unbounded stream"""
+        step = self._step
+        for account, timestamp, amount in events:
+            yield step(account, timestamp, abs(amount), True)
+
+
+def synthetic_events(count: int, accounts: int = 10_000, seed: int = 0):
+    """Random (account, timestamp, amount) columns in time order, for throughput tests"""
+    rng = np.random.default_rng(seed)
+    timestamps = np.sort(rng.uniform(0, 30 * 86400, size=count))
+    return (rng.integers(0, accounts, size=count).tolist(), timestamps, rng.uniform(1, 5000, size=count))
+
+
+def main():
+    """Measure events/sec over transactions.json or a synthetic stream"""
+    parser = argparse.ArgumentParser(description="Per-account decayed velocity features")
+    parser.add_argument("--transactions", help="Transactions file to process (default: a synthetic stream)")
+    parser.add_argument("--events", type=int, default=500_000, help="Synthetic events to process")
+    parser.add_argument("--accounts", type=int, default=10_000, help="Accounts in the synthetic stream")
+    args = parser.parse_args()
+
+    engine = VelocityEngine()
+    if args.transactions:
+        from fraud_model import load_transactions
+        transactions = load_transactions(args.transactions)
+        start = time.perf_counter()
+        features = engine.process_transactions(transactions)
+    else:
+        accounts, timestamps, amounts = synthetic_events(args.events, args.accounts)
+        start = time.perf_counter()
+        features = engine.process(accounts, timestamps, amounts)
+    elapsed = time.perf_counter() - start
+    print(f"⚡ {len(features):,} events for {len(engine.accounts):,} accounts in {elapsed:.2f}s "
+          f"({len(features) / max(elapsed, 1e-9):,.0f} events/sec)")
+    for name, column in zip(engine.feature_names, features.T):
+        print(f"   {name:<10} mean {column.mean():>12,.2f}   p99 {np.percentile(column, 99):>12,.2f}")
+
+if __name__ == "__main__":
+    main()